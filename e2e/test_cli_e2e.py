@@ -155,7 +155,8 @@ def test_webhook_relay_e2e() -> None:
         listed = requests.get(f"http://127.0.0.1:{port}/_relay/requests", timeout=3)
         assert listed.status_code == 200
         items = listed.json()
-        assert len(items) >= 1
+        assert isinstance(items, list) and len(items) >= 1
+        assert items[0]["path"] == "/hook"
     finally:
         proc.terminate()
         proc.wait(timeout=10)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .cache import DEFAULT_MAX_BYTES
+from .chunker import chunk_text
+from .dedup import DedupIndex, DedupStats, deduplicate, signature
+from .profiling import profiled, stage
+from .utils import DEFAULT_TOKEN_THREADS, load_encoding, map_text
+
+
+@dataclass
+class DocumentResult:
+    path: Path
+    total_chunks: int
+    total_tokens: int
+    chunks: List[Dict[str, object]] = field(default_factory=list)
+    # Seconds per stage in the worker, when profiling was requested.
+    timings: Dict[str, float] = field(default_factory=dict)
+    # MinHash signatures of ``chunks``, computed in the worker for batch dedup.
+    signatures: List[array] = field(default_factory=list, repr=False)
+    # Near-duplicates dropped or flagged in this document, when deduplicating.
+    dedup: Optional[DedupStats] = None
+    # Why the document could not be chunked; the other fields are then empty.
+    error: Optional[str] = None
+
+
+def expand_paths(patterns: Sequence[str] = (), manifest: Optional[Path] = None) -> List[Path]:
+    """Resolve glob patterns and manifest entries into an ordered, de-duplicated list.
+
+    Patterns that match nothing are dropped. Plain paths are kept whether or not
+    they exist, so a missing file is reported against its name.
+    """
+    candidates: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            candidates.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            candidates.append(pattern)
+    if manifest is not None:
+        for line in manifest.read_text(encoding="utf-8").splitlines():
+            entry = line.strip()
+            if entry and not entry.startswith("#"):
+                candidates.append(entry)
+    seen = set()
+    paths: List[Path] = []
+    for candidate in candidates:
+        if candidate in seen:
+            continue
+        seen.add(candidate)
+        path = Path(candidate)
+        if not path.is_dir():
+            paths.append(path)
+    return paths
+
+
+def output_path(output_dir: Path, source: Path) -> Path:
+    # Mirror the source layout so equal file names in different folders don't collide.
+    parts = [p for p in source.parts if p not in (source.anchor, "..", ".")]
+    return output_dir.joinpath(*parts).with_name(source.name + ".jsonl")
+
+
+def _init_worker(encoding: str) -> None:
+    # Load the encoding once per worker instead of once per document.
+    load_encoding(encoding)
+
+
+def _chunk_document(
+    path: Path,
+    params: Dict[str, object],
+    output_dir: Optional[Path],
+    profile: bool = False,
+    signatures: bool = False,
+) -> DocumentResult:
+    # A failing document is reported in its result so the rest of the batch runs.
+    try:
+        if not profile:
+            result = _chunk_one(path, params, output_dir)
+        else:
+            with profiled() as timings:
+                result = _chunk_one(path, params, output_dir)
+            result.timings = timings.seconds
+        if signatures:
+            result.signatures = [signature(str(chunk["text"])) for chunk in result.chunks]
+    except Exception as exc:
+        return DocumentResult(path=path, total_chunks=0, total_tokens=0, error=str(exc))
+    return result
+
+
+def _chunk_one(path: Path, params: Dict[str, object], output_dir: Optional[Path]) -> DocumentResult:
+    source = map_text(path)
+    # Chunks written here are serialized once, so keep them as a compact table.
+    payload = chunk_text(
+        source,
+        include_metadata=True,
+        compact=output_dir is not None,
+        **params,  # type: ignore[arg-type]
+    )
+    chunks = payload["chunks"]
+    metadata = payload["metadata"]
+    result = DocumentResult(
+        path=path,
+        total_chunks=int(metadata["total_chunks"]),
+        total_tokens=int(metadata["total_tokens"]),
+    )
+    if output_dir is None:
+        result.chunks = chunks
+        return result
+    _write_chunks(output_path(output_dir, path), chunks)
+    return result
+
+
+def _write_chunks(target: Path, chunks: Iterable[Dict[str, object]]) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with stage("serialization"), target.open("w", encoding="utf-8") as handle:
+        for chunk in chunks:
+            handle.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+
+
+def _dedup_results(
+    results: Iterable[DocumentResult],
+    output_dir: Optional[Path],
+    index: DedupIndex,
+    mode: str,
+) -> Iterator[DocumentResult]:
+    # Runs in the parent so every document is checked against all earlier ones,
+    # in input order, whichever worker chunked it.
+    for result in results:
+        if result.error is not None:
+            yield result
+            continue
+        chunks, stats = deduplicate(
+            result.chunks, index, mode=mode, source=str(result.path), signatures=result.signatures
+        )
+        result.signatures = []
+        result.dedup = stats
+        if mode == "drop":
+            result.total_chunks -= stats.chunks
+            result.total_tokens -= stats.tokens
+        if output_dir is not None:
+            _write_chunks(output_path(output_dir, result.path), chunks)
+            chunks = []
+        result.chunks = list(chunks)
+        yield result
+
+
+def chunk_files(
+    paths: Iterable[Path],
+    *,
+    workers: Optional[int] = None,
+    output_dir: Optional[Path] = None,
+    max_tokens: int = 1000,
+    max_chars: Optional[int] = None,
+    overlap: int = 0,
+    strategy: str = "sentence",
+    encoding: str = "cl100k_base",
+    cache_dir: Optional[Path] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    token_threads: int = DEFAULT_TOKEN_THREADS,
+    profile: bool = False,
+    dedup_threshold: Optional[float] = None,
+    dedup_mode: str = "drop",
+) -> Iterator[DocumentResult]:
+    """Chunk many documents on a process pool, yielding results in input order.
+
+    With ``output_dir`` each worker writes ``<source>.jsonl`` itself and results
+    carry only totals; otherwise the chunks are returned for merged output.
+    With ``profile`` each result carries the worker's per-stage timings. A
+    document that fails carries the reason in ``error`` instead of chunks.
+
+    With ``dedup_threshold`` near-duplicate chunks are dropped or flagged
+    across the whole run: workers sign their chunks and this process checks
+    them against one bounded :class:`DedupIndex`, writing ``output_dir`` files
+    itself; each result's ``dedup`` holds what was saved.
+    """
+    params: Dict[str, object] = {
+        "max_tokens": max_tokens,
+        "max_chars": max_chars,
+        "overlap": overlap,
+        "strategy": strategy,
+        "encoding": encoding,
+        "cache_dir": cache_dir,
+        "cache_max_bytes": cache_max_bytes,
+        "token_threads": token_threads,
+    }
+    index = DedupIndex(dedup_threshold) if dedup_threshold is not None else None
+    path_list = list(paths)
+    if not path_list:
+        return
+    worker_count = max(1, workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+        max_workers=worker_count, initializer=_init_worker, initargs=(encoding,)
+    ) as pool:
+        chunksize = max(1, min(64, len(path_list) // (worker_count * 4)))
+        # Executor.map yields in submission order whatever order workers finish in.
+        results = pool.map(
+            _chunk_document,
+            path_list,
+            repeat(params),
+            repeat(output_dir if index is None else None),
+            repeat(profile),
+            repeat(index is not None),
+            chunksize=chunksize,
+        )
+        if index is None:
+            yield from results
+        else:
+            yield from _dedup_results(results, output_dir, index, dedup_mode)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import gc
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from itertools import product
+from typing import Callable, Dict, Iterator, List, Sequence
+
+from .chunker import chunk_text
+from .utils import load_encoding
+
+_WORDS = (
+    "the a of and to in is that it for as with was on by be this are from at or an which "
+    "model token chunk text data system value result process memory budget window segment "
+    "language request server stream format boundary context sentence paragraph overlap "
+    "quickly carefully rarely always between during without however therefore because "
+    "retrieval embedding document section heading example version function parameter"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 24))]
+    if rng.random() < 0.3:
+        words[rng.randrange(len(words))] += ","
+    return " ".join(words).capitalize() + rng.choices(".!?", weights=(8, 1, 1))[0]
+
+
+def _prose(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 8))) + "\n\n"
+
+
+def _markdown(rng: random.Random) -> str:
+    block = f"{'#' * rng.randint(1, 3)} {_sentence(rng)[:-1]}\n\n"
+    block += _prose(rng)
+    if rng.random() < 0.5:
+        block += "".join(f"- {_sentence(rng)}\n" for _ in range(rng.randint(2, 5))) + "\n"
+    if rng.random() < 0.3:
+        block += "```python\n" + _code(rng) + "```\n\n"
+    return block
+
+
+def _code(rng: random.Random) -> str:
+    name = "_".join(rng.choice(_WORDS) for _ in range(2))
+    args = ", ".join(rng.sample(_WORDS, rng.randint(1, 3)))
+    lines = [f"def {name}({args}):"]
+    for _ in range(rng.randint(2, 8)):
+        left, right = rng.sample(_WORDS, 2)
+        lines.append(f"    {left} = {right}[{rng.randint(0, 99)}] + {rng.randint(0, 9999)}")
+    lines.append(f"    return {rng.choice(_WORDS)}\n\n")
+    return "\n".join(lines)
+
+
+def _single_line(rng: random.Random) -> str:
+    # Minified JSON without spaces or sentence punctuation: nothing to split on.
+    return (
+        f'{{"id":{rng.randint(0, 10**6)},"name":"{rng.choice(_WORDS)}",'
+        f'"tags":["{rng.choice(_WORDS)}","{rng.choice(_WORDS)}"],"n":{rng.randint(0, 10**9)}}},'
+    )
+
+
+CORPORA: Dict[str, Callable[[random.Random], str]] = {
+    "prose": _prose,
+    "markdown": _markdown,
+    "code": _code,
+    "single-line": _single_line,
+}
+
+
+def synthetic_text(corpus: str, size: int, seed: int = 0) -> str:
+    """Deterministic ``corpus`` text of exactly ``size`` characters."""
+    if corpus not in CORPORA:
+        raise ValueError(f"Unknown corpus: {corpus}")
+    rng = random.Random(f"{corpus}:{seed}")
+    block = CORPORA[corpus]
+    parts: List[str] = []
+    length = 0
+    while length < size:
+        part = block(rng)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size]
+
+
+@dataclass
+class BenchResult:
+    corpus: str
+    size: int
+    strategy: str
+    encoding: str
+    overlap: int
+    chunks: int
+    seconds: float
+    peak_bytes: int
+
+    @property
+    def chars_per_second(self) -> float:
+        return self.size / max(self.seconds, 1e-9)
+
+
+def run_benchmarks(
+    *,
+    corpora: Sequence[str] = tuple(CORPORA),
+    sizes: Sequence[int] = (10_000, 100_000, 1_000_000),
+    strategies: Sequence[str] = ("character", "token", "sentence", "paragraph", "semantic"),
+    encodings: Sequence[str] = ("cl100k_base",),
+    overlaps: Sequence[int] = (0, 64),
+    max_tokens: int = 512,
+    repeat: int = 3,
+    seed: int = 0,
+) -> Iterator[BenchResult]:
+    """Time ``chunk_text`` over every corpus x size x strategy x encoding x overlap.
+
+    ``seconds`` is the best of ``repeat`` runs; ``peak_bytes`` is the peak of
+    Python allocations during one extra run under ``tracemalloc``, which is kept
+    separate because tracing slows the timed runs down.
+    """
+    for encoding in encodings:
+        load_encoding(encoding)
+    for corpus, size in product(corpora, sizes):
+        text = synthetic_text(corpus, size, seed)
+        for strategy, encoding, overlap in product(strategies, encodings, overlaps):
+            params = dict(
+                max_tokens=max_tokens, overlap=overlap, strategy=strategy, encoding=encoding
+            )
+            best = float("inf")
+            for _ in range(max(1, repeat)):
+                gc.collect()
+                started = time.perf_counter()
+                payload = chunk_text(text, **params)  # type: ignore[arg-type]
+                best = min(best, time.perf_counter() - started)
+                del payload
+            gc.collect()
+            tracemalloc.start()
+            try:
+                payload = chunk_text(text, **params)  # type: ignore[arg-type]
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            yield BenchResult(
+                corpus=corpus,
+                size=size,
+                strategy=strategy,
+                encoding=encoding,
+                overlap=overlap,
+                chunks=len(payload["chunks"]),  # type: ignore[arg-type]
+                seconds=best,
+                peak_bytes=peak,
+            )
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Bump when the shape of cached payloads changes so stale entries are ignored.
+_CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Eviction trims to this fraction of the bound so it does not run on every write.
+_EVICT_TARGET = 0.9
+# Other processes (``--workers``) write to the same directory, so the size this
+# process tracks is refreshed from disk at least this often.
+_RESCAN_SECONDS = 1.0
+
+
+class ChunkCache:
+    """Content-addressed on-disk store of ``chunk_text`` payloads.
+
+    Entries are keyed by a hash of the document and the chunking parameters and
+    live in ``<dir>/<key[:2]>/<key>.json``. Reads refresh an entry's mtime, and
+    writes evict the least recently used entries once ``max_bytes`` is exceeded.
+    The bound covers every process sharing the directory, give or take what they
+    write between rescans.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._scanned_at = 0.0
+
+    @staticmethod
+    def key(text: str, params: Dict[str, object]) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps([_CACHE_VERSION, params], sort_keys=True).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, object]]:
+        path = self._path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return payload
+
+    def put(self, key: str, payload: Dict[str, object]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_name, path)
+        except OSError:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            return
+        if self._size is None or time.monotonic() - self._scanned_at > _RESCAN_SECONDS:
+            self._size = sum(size for _, size, _ in self._entries())
+            self._scanned_at = time.monotonic()
+        else:
+            self._size += len(data) - replaced
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries: List[Tuple[float, int, str]] = []
+        if not self.directory.is_dir():
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        size = sum(item[1] for item in entries)
+        target = int(self.max_bytes * _EVICT_TARGET)
+        for _, entry_size, entry_path in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                continue
+            size -= entry_size
+        self._size = size
+        self._scanned_at = time.monotonic()
+
+
+@lru_cache(maxsize=None)
+def open_cache(directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> ChunkCache:
+    """Shared :class:`ChunkCache` per directory, so its size is tracked once per process."""
+    return ChunkCache(Path(directory), max_bytes=max_bytes)
@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import re
 from collections import deque
-from dataclasses import asdict, dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from . import strategies
-from .utils import Segment, count_tokens, split_sentences, tail_tokens
+from .cache import DEFAULT_MAX_BYTES, ChunkCache, open_cache
+from .compact import ChunkTable
+from .dedup import DedupIndex, dedup_payload
+from .profiling import stage, timed
+from .utils import (
+    CHARS_PER_TOKEN,
+    DEFAULT_TOKEN_THREADS,
+    ESTIMATE_ENCODING,
+    Segment,
+    TokenIndex,
+    count_tokens,
+    count_tokens_many,
+    iter_words,
+    map_text,
+    split_sentences,
+    tail_tokens,
+)
 
 
 @dataclass
@@ -17,49 +35,335 @@ class Chunk:
     start_offset: int
     end_offset: int
     boundaries: Dict[str, object]
+    # Source ``(start, end)`` ranges the text was joined from; not serialized.
+    spans: List[Tuple[int, int]] = field(default_factory=list, repr=False)
 
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "index": self.index,
+            "text": self.text,
+            "tokens": self.tokens,
+            "characters": self.characters,
+            "start_offset": self.start_offset,
+            "end_offset": self.end_offset,
+            "boundaries": dict(self.boundaries),
+        }
+
+
+# Characters of context on each side of a join that are re-encoded to correct
+# the running token total for merges across segment boundaries.
+_JOIN_WINDOW = 16
+# The first estimate this close to the token budget is confirmed with an exact
+# encode of the candidate chunk.
+_EXACT_MARGIN = 4
+
+
+def _join_correction(left: str, right: str, encoding: str) -> int:
+    """Tokens gained (or lost) by concatenating ``left`` and ``right``."""
+    if not left or not right:
+        return 0
+    tail = left[-_JOIN_WINDOW:]
+    head = right[:_JOIN_WINDOW]
+    return (
+        count_tokens(tail + head, encoding)
+        - count_tokens(tail, encoding)
+        - count_tokens(head, encoding)
+    )
+
+
+def _index_slack(token_budget: int) -> int:
+    # Index counts ignore merges at segment edges and dropped separators; below
+    # this distance from the budget they are precise enough to skip encoding.
+    return max(8, token_budget // 8)
+
+
+def _segment_tokens(
+    seg: Segment, token_budget: int, encoding: str, token_index: Optional[TokenIndex]
+) -> int:
+    """Token count of ``seg``; exact whenever it could reach ``token_budget``."""
+    if token_index is not None:
+        tokens = token_index.count(seg.start, seg.end)
+        if tokens < token_budget - _index_slack(token_budget):
+            return tokens
+    return count_tokens(seg.text, encoding)
+
+
+class _ChunkPacker:
+    """Open chunk with running token/character totals.
+
+    Every segment is tokenized once by the caller. Joining it to the open chunk
+    only re-encodes a bounded window around the join, so packing is linear in
+    the input size instead of re-encoding the whole candidate text each time.
+
+    With a document :class:`TokenIndex`, segments are first counted from the
+    index without encoding anything; once the open chunk nears the budget it is
+    encoded once and packing continues with exact per-segment counts.
+    """
+
+    def __init__(
+        self,
+        token_budget: int,
+        char_budget: Optional[int],
+        encoding: str,
+        token_index: Optional[TokenIndex] = None,
+    ) -> None:
+        self.token_budget = token_budget
+        self.char_budget = char_budget
+        self.encoding = encoding
+        self.token_index = token_index
+        self.segments: List[Segment] = []
+        self.tokens = 0
+        self.characters = 0
+        # ``_precise``: ``tokens`` comes from exact counts and join corrections.
+        # ``_verified``: it has been confirmed by encoding the open chunk.
+        self._precise = token_index is None
+        self._verified = False
+        self._tail = ""
+
+    def __bool__(self) -> bool:
+        return bool(self.segments)
+
+    def _text(self) -> str:
+        return "".join(s.text for s in self.segments)
+
+    def _candidate_tokens(self, seg: Segment, seg_tokens: int) -> int:
+        if self.encoding == ESTIMATE_ENCODING:
+            # Estimates depend on length alone, so the joined count needs no text.
+            return -(-(self.characters + len(seg.text)) // CHARS_PER_TOKEN)
+        if not self._precise:
+            estimate = self.tokens + seg_tokens
+            if estimate < self.token_budget - _index_slack(self.token_budget):
+                return estimate
+            self.tokens = count_tokens(self._text(), self.encoding)
+            self._precise = self._verified = True
+        if self.token_index is not None:
+            seg_tokens = count_tokens(seg.text, self.encoding)
+        tokens = self.tokens + seg_tokens + _join_correction(self._tail, seg.text, self.encoding)
+        if not self._verified and abs(tokens - self.token_budget) <= _EXACT_MARGIN:
+            self._verified = True
+            return count_tokens(self._text() + seg.text, self.encoding)
+        return tokens
+
+    def offer(self, seg: Segment, seg_tokens: int, index: int) -> Optional[Chunk]:
+        """Add ``seg`` to the open chunk, closing and returning it first if full."""
+        closed: Optional[Chunk] = None
+        if self.segments:
+            tokens = self._candidate_tokens(seg, seg_tokens)
+            characters = self.characters + len(seg.text)
+            if tokens > self.token_budget or (
+                self.char_budget is not None and characters > self.char_budget
+            ):
+                closed = self.flush(index)
+            else:
+                self.tokens = tokens
+        if not self.segments:
+            self.tokens = seg_tokens
+        self.segments.append(seg)
+        self.characters += len(seg.text)
+        self._tail = (self._tail + seg.text)[-_JOIN_WINDOW:]
+        return closed
+
+    def flush(self, index: int) -> Chunk:
+        text = self._text()
+        first = self.segments[0]
+        last = self.segments[-1]
+        spans: List[Tuple[int, int]] = []
+        for seg in self.segments:
+            if spans and spans[-1][1] == seg.start:
+                spans[-1] = (spans[-1][0], seg.end)
+            else:
+                spans.append((seg.start, seg.end))
+        chunk = Chunk(
+            index=index,
+            text=text,
+            tokens=self.tokens if self._precise else count_tokens(text, self.encoding),
+            characters=len(text),
+            start_offset=first.start,
+            end_offset=last.end,
+            boundaries={
+                "type": first.boundary_type,
+                "complete": all(s.complete for s in self.segments),
+            },
+            spans=spans,
+        )
+        self.segments = []
+        self.tokens = 0
+        self.characters = 0
+        self._precise = self.token_index is None
+        self._verified = False
+        self._tail = ""
+        return chunk
 
-def _split_long_segment(segment: Segment, max_tokens: int, encoding: str) -> List[Segment]:
+
+def _split_long_segment(
+    segment: Segment, max_tokens: int, encoding: str, token_index: Optional[TokenIndex] = None
+) -> List[Tuple[Segment, int]]:
+    """Split an over-budget segment, returning the parts with their token counts."""
     parts = split_sentences(segment.text)
     if len(parts) <= 1:
-        from .utils import split_fixed_width
-
-        return [
-            Segment(
-                text=s.text,
-                start=segment.start + s.start,
-                end=segment.start + s.end,
-                boundary_type="split",
-                complete=False,
-            )
-            for s in split_fixed_width(
-                segment.text, width=max(1, min(2000, len(segment.text) // 2 or 1))
-            )
-        ]
-    split_parts: List[Segment] = []
+        return _split_by_tokens(segment, max_tokens, encoding)
+    split_parts: List[Tuple[Segment, int]] = []
     for p in parts:
+        part = Segment(
+            text=p.text,
+            start=segment.start + p.start,
+            end=segment.start + p.end,
+            boundary_type="split_sentence",
+        )
+        tokens = _segment_tokens(part, max_tokens, encoding, token_index)
         split_parts.append(
-            Segment(
-                text=p.text,
-                start=segment.start + p.start,
-                end=segment.start + p.end,
-                boundary_type="split_sentence",
-                complete=count_tokens(p.text, encoding) <= max_tokens,
+            (
+                Segment(
+                    text=part.text,
+                    start=part.start,
+                    end=part.end,
+                    boundary_type=part.boundary_type,
+                    complete=tokens <= max_tokens,
+                ),
+                tokens,
             )
         )
     return split_parts
 
 
-def _choose_segments(text: str, strategy: str, max_chars: int, overlap: int) -> List[Segment]:
+# Whitespace and punctuation runs an oversized segment is preferably cut after.
+_SOFT_CUT = re.compile(r"[\s,;:.!?)\]}>]+")
+
+
+def _split_by_tokens(segment: Segment, max_tokens: int, encoding: str) -> List[Tuple[Segment, int]]:
+    """Cut ``segment`` into maximal pieces of at most ``max_tokens`` tokens.
+
+    Cut points are read off the token offsets of a single encode of the segment
+    and moved back to the last whitespace or
+    punctuation in the second half of each piece. Every piece is confirmed with
+    an exact count and shrunk by bisection if encoding it alone went over.
+    """
+    text = segment.text
+    # The segment's own encoding, not the document index, so streamed and
+    # whole-document runs cut at the same places.
+    token_index = TokenIndex(text, encoding)
+    offsets = token_index.offsets
+    budget = max(1, max_tokens)
+    pieces: List[Tuple[Segment, int]] = []
+    start = 0
+    while start < len(text):
+        limit = token_index.position(start) + budget
+        end = offsets[limit] if limit < len(offsets) else len(text)
+        end = min(len(text), max(start + 1, end))
+        if end < len(text):
+            floor = start + (end - start) // 2
+            for match in _SOFT_CUT.finditer(text, floor, end):
+                end = match.end()
+        tokens = count_tokens(text[start:end], encoding)
+        if tokens > budget:
+            low, high = start + 1, end
+            while high - low > 1:
+                middle = (low + high) // 2
+                if count_tokens(text[start:middle], encoding) <= budget:
+                    low = middle
+                else:
+                    high = middle
+            end = low
+            tokens = count_tokens(text[start:end], encoding)
+        piece = Segment(
+            text=text[start:end],
+            start=segment.start + start,
+            end=segment.start + end,
+            boundary_type="split",
+            complete=False,
+        )
+        pieces.append((piece, tokens))
+        start = end
+    return pieces
+
+
+def _choose_segments(text: str, strategy: str, max_chars: int, overlap: int) -> Iterator[Segment]:
     if strategy == "character":
-        return strategies.by_character(text, max_chars=max_chars, overlap=overlap)
+        return strategies.by_character(text, max_chars=max_chars, overlap=overlap, lazy=True)
     if strategy == "token":
-        return strategies.by_token(text)
+        # Word+whitespace spans so spacing is preserved; packing applies the budget.
+        return iter_words(text)
     if strategy == "paragraph":
-        return strategies.by_paragraph(text)
+        return strategies.by_paragraph(text, lazy=True)
     if strategy == "semantic":
-        return strategies.by_semantic(text)
-    return strategies.by_sentence(text)
+        return strategies.by_semantic(text, lazy=True)
+    return strategies.by_sentence(text, lazy=True)
+
+
+# Segments per batched tokenizer call when no document index is available.
+_COUNT_BATCH = 256
+
+
+def _counted(
+    segments: Iterable[Segment],
+    token_budget: int,
+    encoding: str,
+    token_index: Optional[TokenIndex],
+    token_threads: int,
+) -> Iterator[Tuple[Segment, int]]:
+    if token_index is not None:
+        for seg in segments:
+            yield seg, _segment_tokens(seg, token_budget, encoding, token_index)
+        return
+    batch: List[Segment] = []
+    for seg in segments:
+        batch.append(seg)
+        if len(batch) >= _COUNT_BATCH:
+            counts = count_tokens_many([s.text for s in batch], encoding, token_threads)
+            yield from zip(batch, counts)
+            batch = []
+    counts = count_tokens_many([s.text for s in batch], encoding, token_threads)
+    yield from zip(batch, counts)
+
+
+def _pack(
+    segments: Iterable[Segment],
+    *,
+    strategy: str,
+    token_budget: int,
+    char_budget: Optional[int],
+    encoding: str,
+    token_index: Optional[TokenIndex] = None,
+    token_threads: int = DEFAULT_TOKEN_THREADS,
+) -> Iterator[Chunk]:
+    packer = _ChunkPacker(token_budget, char_budget, encoding, token_index)
+    index = 0
+    queue: Deque[Tuple[Segment, int]] = deque()
+    for incoming in _counted(segments, token_budget, encoding, token_index, token_threads):
+        queue.append(incoming)
+        while queue:
+            seg, seg_tokens = queue.popleft()
+            if seg_tokens > token_budget and strategy != "character":
+                split = _split_long_segment(seg, token_budget, encoding, token_index)
+                # A single character over the budget cannot be split further.
+                if len(split) > 1:
+                    queue.extendleft(reversed(split))
+                    continue
+
+            closed = packer.offer(seg, seg_tokens, index)
+            if closed is not None:
+                index += 1
+                yield closed
+
+    if packer:
+        yield packer.flush(index)
+
+
+def _with_overlap(chunks: Iterable[Chunk], overlap: int, encoding: str) -> Iterator[Chunk]:
+    previous: Optional[Chunk] = None
+    for chunk in chunks:
+        if overlap > 0 and previous is not None:
+            # The whole previous chunk is encoded: a tail cut from a shorter
+            # window can tokenize differently and break parity with chunk_stream.
+            prefix = tail_tokens(previous.text, overlap, encoding)
+            if prefix:
+                chunk.text = prefix + chunk.text
+                # Counted exactly: a merge at the join can reach past _JOIN_WINDOW.
+                chunk.tokens = count_tokens(chunk.text, encoding)
+                chunk.characters = len(chunk.text)
+                chunk.boundaries["complete"] = False
+        yield chunk
+        previous = chunk
 
 
 def chunk_text(
@@ -71,7 +375,23 @@ def chunk_text(
     strategy: str = "sentence",
     encoding: str = "cl100k_base",
     include_metadata: bool = True,
+    cache_dir: Optional[Union[str, Path]] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    token_threads: int = DEFAULT_TOKEN_THREADS,
+    compact: bool = False,
+    dedup_threshold: Optional[float] = None,
+    dedup_mode: str = "drop",
 ) -> Dict[str, object]:
+    """Chunk ``text`` and return ``{"chunks": [...], "metadata": {...}}``.
+
+    With ``compact=True`` the chunks are a :class:`ChunkTable` over ``text``
+    instead of a list of dicts; it yields identical dicts but joins each
+    chunk's text only when that chunk is read. Cache hits are plain lists.
+
+    With ``dedup_threshold`` chunks whose estimated Jaccard similarity to an
+    earlier chunk reaches it are dropped, or flagged with ``dedup_mode="flag"``;
+    ``metadata["dedup"]`` reports how many chunks and tokens that saved.
+    """
     if not text:
         metadata = {
             "total_chunks": 0,
@@ -82,108 +402,85 @@ def chunk_text(
             "overlap": overlap,
             "encoding": encoding,
         }
-        return {"chunks": [], "metadata": metadata if include_metadata else {}}
+        payload = {"chunks": [], "metadata": metadata}
+        if dedup_threshold is not None:
+            dedup_payload(payload, DedupIndex(dedup_threshold), dedup_mode)
+        return payload if include_metadata else {"chunks": [], "metadata": {}}
+
+    params: Dict[str, object] = {
+        "max_tokens": max_tokens,
+        "max_chars": max_chars,
+        "overlap": overlap,
+        "strategy": strategy,
+        "encoding": encoding,
+    }
+    cache = open_cache(str(cache_dir), cache_max_bytes) if cache_dir is not None else None
+    key = ChunkCache.key(text, params) if cache is not None else ""
+    payload = cache.get(key) if cache is not None else None
+    if payload is None:
+        payload = _chunk_payload(text, token_threads=token_threads, compact=compact, **params)
+        if cache is not None:
+            cache.put(key, dict(payload, chunks=list(payload["chunks"])))
+    if dedup_threshold is not None:
+        # Applied after the cache so one entry serves every threshold and mode.
+        dedup_payload(payload, DedupIndex(dedup_threshold), dedup_mode)
+    if not include_metadata:
+        payload.pop("metadata", None)
+    return payload
 
+
+def chunk_file(path: Union[str, Path], **params: object) -> Dict[str, object]:
+    """``chunk_text`` over a memory-mapped file, returning a compact result by default.
+
+    The document is decoded straight from the mapping, segments are produced
+    lazily, and chunk texts stay slices of it until they are read, so the file
+    is held in memory once.
+    """
+    params.setdefault("compact", True)
+    return chunk_text(map_text(Path(path)), **params)  # type: ignore[arg-type]
+
+
+def _chunk_payload(
+    text: str,
+    *,
+    max_tokens: int,
+    max_chars: Optional[int],
+    overlap: int,
+    strategy: str,
+    encoding: str,
+    token_threads: int,
+    compact: bool = False,
+) -> Dict[str, object]:
     token_budget = max_tokens if max_tokens > 0 else 1000
     char_budget = max_chars if max_chars and max_chars > 0 else None
     segments = _choose_segments(text, strategy, max_chars=max_chars or 1000, overlap=overlap)
 
-    if strategy == "token":
-        # Build pseudo-segments from word+whitespace spans so spacing is preserved.
-        import re
-
-        words = list(re.finditer(r"\S+\s*", text))
-        segments = []
-        for word in words:
-            start = word.start()
-            end = word.end()
-            segments.append(
-                Segment(text=text[start:end], start=start, end=end, boundary_type="token")
-            )
-
-    chunks: List[Chunk] = []
-    current: List[Segment] = []
-    queue = deque(segments)
-    while queue:
-        seg = queue.popleft()
-        seg_tokens = count_tokens(seg.text, encoding)
-        if seg_tokens > token_budget and strategy != "character":
-            split = _split_long_segment(seg, token_budget, encoding)
-            if len(split) == 1 and split[0].text == seg.text:
-                from .utils import split_fixed_width
-
-                split = [
-                    Segment(
-                        text=s.text,
-                        start=seg.start + s.start,
-                        end=seg.start + s.end,
-                        boundary_type="split",
-                        complete=False,
-                    )
-                    for s in split_fixed_width(seg.text, width=max(1, len(seg.text) // 2))
-                ]
-            queue.extendleft(reversed(split))
-            continue
-
-        candidate = current + [seg]
-        candidate_text = "".join(item.text for item in candidate)
-        candidate_tokens = count_tokens(candidate_text, encoding)
-        candidate_chars = len(candidate_text)
-        exceeds = candidate_tokens > token_budget or (
-            char_budget is not None and candidate_chars > char_budget
-        )
-        if exceeds and current:
-            chunk_text_value = "".join(item.text for item in current)
-            first = current[0]
-            last = current[-1]
-            chunks.append(
-                Chunk(
-                    index=len(chunks),
-                    text=chunk_text_value,
-                    tokens=count_tokens(chunk_text_value, encoding),
-                    characters=len(chunk_text_value),
-                    start_offset=first.start,
-                    end_offset=last.end,
-                    boundaries={
-                        "type": first.boundary_type,
-                        "complete": all(s.complete for s in current),
-                    },
-                )
-            )
-            current = [seg]
+    # One encode of the whole document serves every count below. Estimated
+    # counts are cheaper to take directly than to look up.
+    token_index = None
+    if encoding != ESTIMATE_ENCODING:
+        token_index = TokenIndex(text, encoding, token_threads)
+    packed = _pack(
+        timed(segments, "segmentation"),
+        strategy=strategy,
+        token_budget=token_budget,
+        char_budget=char_budget,
+        encoding=encoding,
+        token_index=token_index,
+        token_threads=token_threads,
+    )
+    chunks: Union[ChunkTable, List[Dict[str, object]]] = ChunkTable(text) if compact else []
+    total_tokens = 0
+    total_chars = 0
+    overlapped = _with_overlap(timed(packed, "packing"), overlap, encoding)
+    for chunk in timed(overlapped, "overlap"):
+        total_tokens += chunk.tokens
+        total_chars += chunk.characters
+        if isinstance(chunks, ChunkTable):
+            chunks.append(chunk)
         else:
-            current = candidate
-
-    if current:
-        chunk_text_value = "".join(item.text for item in current)
-        first = current[0]
-        last = current[-1]
-        chunks.append(
-            Chunk(
-                index=len(chunks),
-                text=chunk_text_value,
-                tokens=count_tokens(chunk_text_value, encoding),
-                characters=len(chunk_text_value),
-                start_offset=first.start,
-                end_offset=last.end,
-                boundaries={
-                    "type": first.boundary_type,
-                    "complete": all(s.complete for s in current),
-                },
-            )
-        )
-
-    if overlap > 0 and len(chunks) > 1:
-        for idx in range(1, len(chunks)):
-            prefix = tail_tokens(chunks[idx - 1].text, overlap, encoding)
-            if prefix:
-                chunks[idx].text = prefix + chunks[idx].text
-                chunks[idx].tokens = count_tokens(chunks[idx].text, encoding)
-                chunks[idx].characters = len(chunks[idx].text)
-                chunks[idx].boundaries["complete"] = False
-
-    total_tokens = sum(c.tokens for c in chunks)
-    total_chars = sum(c.characters for c in chunks)
+            with stage("serialization"):
+                chunks.append(chunk.to_dict())
     metadata = {
         "total_chunks": len(chunks),
         "total_tokens": total_tokens,
@@ -193,7 +490,39 @@ def chunk_text(
         "overlap": overlap,
         "encoding": encoding,
     }
-    payload = {"chunks": [asdict(c) for c in chunks]}
-    if include_metadata:
-        payload["metadata"] = metadata
-    return payload
+    return {"chunks": chunks, "metadata": metadata}
+
+
+def chunk_stream(
+    pieces: Iterable[str],
+    *,
+    max_tokens: int = 1000,
+    max_chars: Optional[int] = None,
+    overlap: int = 0,
+    strategy: str = "sentence",
+    encoding: str = "cl100k_base",
+    token_threads: int = DEFAULT_TOKEN_THREADS,
+) -> Iterator[Dict[str, object]]:
+    """Yield chunk dicts for text arriving in pieces as soon as each chunk closes.
+
+    Memory is bounded by the open chunk plus the unsplit tail of the input, so
+    arbitrarily large inputs can be chunked from a file or pipe. Chunks match
+    ``chunk_text`` on the joined text; no metadata block is produced.
+    """
+    token_budget = max_tokens if max_tokens > 0 else 1000
+    char_budget = max_chars if max_chars and max_chars > 0 else None
+    segments = strategies.stream_segments(
+        pieces, strategy, max_chars=max_chars or 1000, overlap=overlap
+    )
+    packed = _pack(
+        timed(segments, "segmentation"),
+        strategy=strategy,
+        token_budget=token_budget,
+        char_budget=char_budget,
+        encoding=encoding,
+        token_threads=token_threads,
+    )
+    for chunk in timed(_with_overlap(timed(packed, "packing"), overlap, encoding), "overlap"):
+        with stage("serialization"):
+            record = chunk.to_dict()
+        yield record
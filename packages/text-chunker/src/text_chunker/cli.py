@@ -2,23 +2,145 @@ from __future__ import annotations
 
 import json
 import sys
+import textwrap
+import time
+from dataclasses import asdict
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import click
 
-from .chunker import chunk_text
+from .dedup import DedupIndex, DedupStats, dedup_stream
+from .profiling import StageProfile, profiled, stage
+from .utils import DEFAULT_TOKEN_THREADS, ESTIMATE_ENCODING, map_text
+
+# The chunker, process pools and HTTP modules are imported by the commands that
+# use them, so `--help` and argument errors return without loading them.
+
+_READ_SIZE = 64 * 1024
+_ENCODINGS = ["cl100k_base", "p50k_base", "r50k_base", ESTIMATE_ENCODING]
+# Names of bench.CORPORA, listed here to keep the bench module out of startup.
+_CORPORA = ["prose", "markdown", "code", "single-line"]
 
 
 def _read_input(file: Optional[Path]) -> str:
     if file:
-        return file.read_text(encoding="utf-8")
+        return map_text(file)
     if not sys.stdin.isatty():
         return sys.stdin.read()
     raise click.ClickException("Provide a file or pipe text via stdin.")
 
 
-@click.command()
+def _iter_input(file: Optional[Path]) -> Iterator[str]:
+    if file:
+        with file.open(encoding="utf-8") as handle:
+            yield from iter(lambda: handle.read(_READ_SIZE), "")
+        return
+    if not sys.stdin.isatty():
+        yield from iter(lambda: sys.stdin.read(_READ_SIZE), "")
+        return
+    raise click.ClickException("Provide a file or pipe text via stdin.")
+
+
+def _echo_chunk(chunk: dict, output_format: str) -> None:
+    if output_format == "jsonl":
+        click.echo(json.dumps(chunk, ensure_ascii=False))
+        return
+    click.echo(f"# chunk={chunk['index']} tokens={chunk['tokens']} chars={chunk['characters']}")
+    click.echo(chunk["text"])
+    click.echo("---")
+
+
+def _echo_json(payload: Dict[str, object]) -> None:
+    """Write ``json.dumps(payload, indent=2)`` one chunk at a time."""
+    chunks = payload["chunks"]
+    if not chunks:
+        click.echo(json.dumps(payload, ensure_ascii=False, indent=2))
+        return
+    click.echo('{\n  "chunks": [')
+    last = len(chunks) - 1  # type: ignore[arg-type]
+    for position, chunk in enumerate(chunks):  # type: ignore[arg-type]
+        body = textwrap.indent(json.dumps(chunk, ensure_ascii=False, indent=2), "    ")
+        click.echo(body + ("," if position < last else ""))
+    rest = {key: value for key, value in payload.items() if key != "chunks"}
+    if not rest:
+        click.echo("  ]\n}")
+        return
+    # Reuse the encoder for the remaining keys, minus their opening brace.
+    click.echo("  ]," + json.dumps(rest, ensure_ascii=False, indent=2)[1:])
+
+
+def _run_batch(
+    paths: List[Path],
+    output_dir: Optional[Path],
+    workers: Optional[int],
+    timings: Optional[StageProfile],
+    **params: object,
+) -> None:
+    from .batch import chunk_files
+
+    started = time.perf_counter()
+    documents = 0
+    tokens = 0
+    failed = 0
+    duplicates = DedupStats()
+    results = chunk_files(
+        paths, workers=workers, output_dir=output_dir, profile=timings is not None, **params
+    )
+    for result in results:
+        documents += 1
+        if result.error is not None:
+            failed += 1
+            click.echo(f"{result.path}: {result.error}", err=True)
+            continue
+        tokens += result.total_tokens
+        if timings is not None:
+            timings.merge(result.timings)
+        if result.dedup is not None:
+            duplicates.chunks += result.dedup.chunks
+            duplicates.tokens += result.dedup.tokens
+        with stage("serialization"):
+            for chunk in result.chunks:
+                click.echo(json.dumps({"source": str(result.path), **chunk}, ensure_ascii=False))
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    click.echo(
+        f"Chunked {documents} documents ({tokens} tokens) in {elapsed:.2f}s: "
+        f"{documents / elapsed:.1f} docs/sec, {tokens / elapsed:.0f} tokens/sec",
+        err=True,
+    )
+    if params.get("dedup_threshold") is not None:
+        _echo_dedup(duplicates, str(params["dedup_mode"]))
+    if failed:
+        raise click.ClickException(f"{failed} of {documents} documents failed.")
+
+
+def _echo_dedup(stats: DedupStats, mode: str) -> None:
+    verb = "Dropped" if mode == "drop" else "Flagged"
+    click.echo(f"{verb} {stats.chunks} near-duplicate chunks ({stats.tokens} tokens)", err=True)
+
+
+class _DefaultGroup(click.Group):
+    """Runs the ``chunk`` command unless the first argument names another one.
+
+    ``--help`` still goes to the group, so it lists every command.
+    """
+
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = ["chunk", *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultGroup)
+def main() -> None:
+    """Split text for LLM processing.
+
+    Without a command, arguments go to `chunk`. To chunk a file named like a
+    command, name the command first: `text-chunker chunk serve`.
+    """
+
+
+@main.command("chunk")
 @click.argument("file", required=False, type=click.Path(path_type=Path))
 @click.option("--max-tokens", default=1000, show_default=True, type=int)
 @click.option("--max-chars", default=None, type=int)
@@ -31,15 +153,82 @@ def _read_input(file: Optional[Path]) -> str:
 )
 @click.option(
     "--encoding",
-    type=click.Choice(["cl100k_base", "p50k_base", "r50k_base"]),
+    type=click.Choice(_ENCODINGS),
     default="cl100k_base",
     show_default=True,
+    help=f"Tokenizer; `{ESTIMATE_ENCODING}` estimates 1 token per 4 characters without one.",
 )
 @click.option("--metadata/--no-metadata", default=True, show_default=True)
 @click.option(
-    "--format", "output_format", type=click.Choice(["json", "jsonl", "text"]), default="json"
+    "--format", "output_format", type=click.Choice(["json", "jsonl", "text"]), default=None
 )
-def main(
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Read input incrementally and write each chunk as soon as it closes (jsonl/text).",
+)
+@click.option(
+    "--glob",
+    "patterns",
+    multiple=True,
+    help="Batch mode: chunk every file matching this glob (repeatable, ** supported).",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Batch mode: file listing one input path per line.",
+)
+@click.option("--workers", default=None, type=int, help="Batch worker processes [default: CPUs].")
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Batch mode: write <source>.jsonl per document instead of merged jsonl on stdout.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Reuse chunks of unchanged documents from this content-addressed cache.",
+)
+@click.option("--cache-max-mb", default=1024, show_default=True, type=int)
+@click.option(
+    "--token-threads",
+    default=DEFAULT_TOKEN_THREADS,
+    show_default=True,
+    type=int,
+    help="Threads tiktoken uses for batched token counting.",
+)
+@click.option(
+    "--server",
+    "server_address",
+    envvar="TEXT_CHUNKER_SERVER",
+    default=None,
+    help="Forward to a running `text-chunker serve` (socket path or host:port); "
+    "chunks in-process if none answers.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Report time per stage (segmentation, tokenization, packing, overlap, "
+    "serialization) on stderr.",
+)
+@click.option(
+    "--dedup-threshold",
+    type=click.FloatRange(0, 1, min_open=True),
+    default=None,
+    help="Drop chunks whose estimated Jaccard similarity to an earlier chunk (across the "
+    "whole batch) is at least this, e.g. 0.8.",
+)
+@click.option(
+    "--dedup-mode",
+    type=click.Choice(["drop", "flag"]),
+    default="drop",
+    show_default=True,
+    help="With --dedup-threshold: drop near-duplicates or keep them with a duplicate_of field.",
+)
+def chunk(
     file: Optional[Path],
     max_tokens: int,
     max_chars: Optional[int],
@@ -47,38 +236,256 @@ def main(
     strategy: str,
     encoding: str,
     metadata: bool,
-    output_format: str,
+    output_format: Optional[str],
+    stream: bool,
+    patterns: Tuple[str, ...],
+    manifest: Optional[Path],
+    workers: Optional[int],
+    output_dir: Optional[Path],
+    cache_dir: Optional[Path],
+    cache_max_mb: int,
+    token_threads: int,
+    server_address: Optional[str],
+    profile: bool,
+    dedup_threshold: Optional[float],
+    dedup_mode: str,
 ) -> None:
-    """Split text for LLM processing."""
+    """Split FILE (or stdin) into chunks.
+
+    `text-chunker serve` runs a resident server that --server forwards to.
+    """
+    timings: Optional[StageProfile] = None
+    if profile:
+        ctx = click.get_current_context()
+        timings = ctx.with_resource(profiled())
+        report = timings.report
+        ctx.call_on_close(lambda: click.echo(report(), err=True))
     try:
+        if patterns or manifest:
+            from .batch import expand_paths
+
+            if output_format not in (None, "jsonl") or stream:
+                raise click.ClickException("Batch mode writes jsonl; drop --format/--stream.")
+            paths = expand_paths(patterns, manifest)
+            if file:
+                paths.insert(0, file)
+            if not paths:
+                raise click.ClickException("No input files matched.")
+            _run_batch(
+                paths,
+                output_dir,
+                workers,
+                timings,
+                max_tokens=max_tokens,
+                max_chars=max_chars,
+                overlap=overlap,
+                strategy=strategy,
+                encoding=encoding,
+                cache_dir=cache_dir,
+                cache_max_bytes=cache_max_mb * 1024 * 1024,
+                token_threads=token_threads,
+                dedup_threshold=dedup_threshold,
+                dedup_mode=dedup_mode,
+            )
+            return
+        if stream:
+            output_format = output_format or "jsonl"
+            if output_format == "json":
+                raise click.ClickException("--stream supports --format jsonl or text.")
+            from .chunker import chunk_stream
+
+            chunks = chunk_stream(
+                _iter_input(file),
+                max_tokens=max_tokens,
+                max_chars=max_chars,
+                overlap=overlap,
+                strategy=strategy,
+                encoding=encoding,
+                token_threads=token_threads,
+            )
+            duplicates = DedupStats()
+            if dedup_threshold is not None:
+                chunks = dedup_stream(chunks, DedupIndex(dedup_threshold), dedup_mode, duplicates)
+            for chunk in chunks:
+                with stage("serialization"):
+                    _echo_chunk(chunk, output_format)
+            if dedup_threshold is not None:
+                _echo_dedup(duplicates, dedup_mode)
+            return
+        from .chunker import chunk_text
+
+        output_format = output_format or "json"
         source = _read_input(file)
-        payload = chunk_text(
-            source,
+        params = dict(
             max_tokens=max_tokens,
             max_chars=max_chars,
             overlap=overlap,
             strategy=strategy,
             encoding=encoding,
             include_metadata=metadata,
+            dedup_threshold=dedup_threshold,
+            dedup_mode=dedup_mode,
         )
-        if output_format == "json":
-            click.echo(json.dumps(payload, ensure_ascii=False, indent=2))
-            return
-        if output_format == "jsonl":
-            for chunk in payload["chunks"]:
-                click.echo(json.dumps(chunk, ensure_ascii=False))
-            return
-        for chunk in payload["chunks"]:
-            click.echo(
-                f"# chunk={chunk['index']} tokens={chunk['tokens']} chars={chunk['characters']}"
+        payload = None
+        # A profiled run chunks locally so the report covers the real work.
+        if server_address and not profile:
+            from .server import request_chunks
+
+            # The server uses its own cache (`serve --cache-dir`).
+            payload = request_chunks(server_address, source, **params)
+        if payload is None:
+            payload = chunk_text(
+                source,
+                cache_dir=cache_dir,
+                cache_max_bytes=cache_max_mb * 1024 * 1024,
+                token_threads=token_threads,
+                compact=True,
+                **params,
             )
-            click.echo(chunk["text"])
-            click.echo("---")
+        with stage("serialization"):
+            if output_format == "json":
+                _echo_json(payload)
+                return
+            for chunk in payload["chunks"]:
+                _echo_chunk(chunk, output_format)
     except click.ClickException:
         raise
     except Exception as exc:
         raise click.ClickException(str(exc)) from exc
 
 
+@main.command("serve")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Unix socket to listen on [default: $TMPDIR/text-chunker.sock].",
+)
+@click.option("--port", default=None, type=int, help="Listen on host:port instead of a socket.")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--workers", default=None, type=int, help="Chunking processes [default: CPUs].")
+@click.option(
+    "--encoding",
+    type=click.Choice(_ENCODINGS),
+    default="cl100k_base",
+    show_default=True,
+    help="Encoding workers load before accepting requests.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Reuse chunks of unchanged documents from this content-addressed cache.",
+)
+@click.option("--cache-max-mb", default=1024, show_default=True, type=int)
+def serve(
+    socket_path: Optional[Path],
+    port: Optional[int],
+    host: str,
+    workers: Optional[int],
+    encoding: str,
+    cache_dir: Optional[Path],
+    cache_max_mb: int,
+) -> None:
+    """Keep encodings loaded and chunk documents sent over HTTP."""
+    from .server import DEFAULT_SOCKET, close_server, make_server
+
+    socket_path = socket_path or DEFAULT_SOCKET
+    try:
+        server = make_server(
+            socket_path=socket_path,
+            host=host,
+            port=port,
+            workers=workers,
+            encoding=encoding,
+            cache_dir=cache_dir,
+            cache_max_bytes=cache_max_mb * 1024 * 1024,
+        )
+    except Exception as exc:
+        raise click.ClickException(str(exc)) from exc
+    where = f"http://{host}:{port}" if port is not None else str(socket_path)
+    click.echo(f"text-chunker serving on {where}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_server(server)
+
+
+@main.command("bench")
+@click.option(
+    "--corpus",
+    "corpora",
+    multiple=True,
+    type=click.Choice(_CORPORA),
+    help="Synthetic input kind (repeatable) [default: all].",
+)
+@click.option(
+    "--size", "sizes", multiple=True, type=int, help="Input size in characters (repeatable)."
+)
+@click.option(
+    "--strategy",
+    "strategy_names",
+    multiple=True,
+    type=click.Choice(["character", "token", "sentence", "paragraph", "semantic"]),
+    help="Strategy to run (repeatable) [default: all].",
+)
+@click.option(
+    "--encoding",
+    "encodings",
+    multiple=True,
+    type=click.Choice(_ENCODINGS),
+    help="Encoding to run (repeatable) [default: cl100k_base].",
+)
+@click.option("--overlap", "overlaps", multiple=True, type=int, help="[default: 0 and 64]")
+@click.option("--max-tokens", default=512, show_default=True, type=int)
+@click.option("--repeat", default=3, show_default=True, type=int, help="Timed runs per case.")
+@click.option("--seed", default=0, show_default=True, type=int)
+@click.option("--format", "output_format", type=click.Choice(["table", "jsonl"]), default="table")
+def bench(
+    corpora: Tuple[str, ...],
+    sizes: Tuple[int, ...],
+    strategy_names: Tuple[str, ...],
+    encodings: Tuple[str, ...],
+    overlaps: Tuple[int, ...],
+    max_tokens: int,
+    repeat: int,
+    seed: int,
+    output_format: str,
+) -> None:
+    """Measure throughput and peak memory on reproducible synthetic inputs."""
+    options: Dict[str, object] = {
+        "corpora": corpora,
+        "sizes": sizes,
+        "strategies": strategy_names,
+        "encodings": encodings,
+        "overlaps": overlaps,
+    }
+    grid = {key: value for key, value in options.items() if value}
+    from .bench import run_benchmarks
+
+    try:
+        results = run_benchmarks(max_tokens=max_tokens, repeat=repeat, seed=seed, **grid)
+        if output_format == "table":
+            click.echo(
+                f"{'corpus':<12}{'size':>10} {'strategy':<10}{'encoding':<12}"
+                f"{'overlap':>8}{'chunks':>8}{'MB/s':>9}{'peak MB':>9}"
+            )
+        for result in results:
+            if output_format == "jsonl":
+                record = {**asdict(result), "chars_per_second": result.chars_per_second}
+                click.echo(json.dumps(record))
+                continue
+            click.echo(
+                f"{result.corpus:<12}{result.size:>10} {result.strategy:<10}"
+                f"{result.encoding:<12}{result.overlap:>8}{result.chunks:>8}"
+                f"{result.chars_per_second / 1e6:>9.2f}{result.peak_bytes / 1e6:>9.1f}"
+            )
+    except Exception as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
 if __name__ == "__main__":
     main()
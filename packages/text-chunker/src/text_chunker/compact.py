@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Union
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .chunker import Chunk
+
+
+class ChunkTable(Sequence):
+    """Chunks of one document stored as columns over the source text.
+
+    Offsets and counts live in ``array`` columns and each chunk's text is kept
+    as ``(start, end)`` spans into ``source`` (plus its overlap prefix), so the
+    table costs a few dozen bytes per chunk instead of a copy of the document.
+    Indexing or iterating yields the same dicts ``chunk_text`` returns; a
+    chunk's text is only joined when that dict is built.
+    """
+
+    __slots__ = (
+        "_characters",
+        "_complete",
+        "_ends",
+        "_extra",
+        "_indices",
+        "_prefixes",
+        "_span_index",
+        "_spans",
+        "_starts",
+        "_tokens",
+        "_types",
+        "source",
+    )
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self._tokens = array("q")
+        self._characters = array("q")
+        self._starts = array("q")
+        self._ends = array("q")
+        # Chunk ``i`` owns spans ``_span_index[i]`` to ``_span_index[i + 1]``.
+        self._span_index = array("q", [0])
+        self._spans = array("q")
+        self._types: List[str] = []
+        self._complete = bytearray()
+        self._prefixes: Dict[int, str] = {}
+        # Chunk numbers once rows have been dropped; row ``i`` is chunk ``i`` until then.
+        self._indices: Optional[array] = None
+        self._extra: Dict[int, Dict[str, object]] = {}
+
+    def append(self, chunk: Chunk) -> None:
+        """Record ``chunk``; its ``text`` is not retained."""
+        body = 0
+        for start, end in chunk.spans:
+            self._spans.append(start)
+            self._spans.append(end)
+            body += end - start
+        if body < len(chunk.text):
+            self._prefixes[len(self._tokens)] = chunk.text[: len(chunk.text) - body]
+        self._span_index.append(len(self._spans) // 2)
+        self._tokens.append(chunk.tokens)
+        self._characters.append(chunk.characters)
+        self._starts.append(chunk.start_offset)
+        self._ends.append(chunk.end_offset)
+        self._types.append(str(chunk.boundaries["type"]))
+        self._complete.append(bool(chunk.boundaries["complete"]))
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def text(self, index: int) -> str:
+        spans = self._spans
+        body = "".join(
+            self.source[spans[i] : spans[i + 1]]
+            for i in range(2 * self._span_index[index], 2 * self._span_index[index + 1], 2)
+        )
+        return self._prefixes.get(index, "") + body
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Dict[str, object], List[Dict[str, object]]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+        record = {
+            "index": index if self._indices is None else self._indices[index],
+            "text": self.text(index),
+            "tokens": self._tokens[index],
+            "characters": self._characters[index],
+            "start_offset": self._starts[index],
+            "end_offset": self._ends[index],
+            "boundaries": {"type": self._types[index], "complete": bool(self._complete[index])},
+        }
+        if index in self._extra:
+            record.update(self._extra[index])
+        return record
+
+    def annotate(self, index: int, **fields: object) -> None:
+        """Add ``fields`` to the dict row ``index`` yields."""
+        self._extra.setdefault(index, {}).update(fields)
+
+    def select(self, rows: Sequence[int]) -> ChunkTable:
+        """A table of just ``rows`` (ascending), keeping their chunk ``index`` values."""
+        table = ChunkTable(self.source)
+        table._indices = array("q")
+        for new, row in enumerate(rows):
+            table._indices.append(row if self._indices is None else self._indices[row])
+            first, last = self._span_index[row], self._span_index[row + 1]
+            table._spans.extend(self._spans[2 * first : 2 * last])
+            table._span_index.append(len(table._spans) // 2)
+            table._tokens.append(self._tokens[row])
+            table._characters.append(self._characters[row])
+            table._starts.append(self._starts[row])
+            table._ends.append(self._ends[row])
+            table._types.append(self._types[row])
+            table._complete.append(self._complete[row])
+            if row in self._prefixes:
+                table._prefixes[new] = self._prefixes[row]
+            if row in self._extra:
+                table._extra[new] = dict(self._extra[row])
+        return table
+
+    def __iter__(self) -> Iterator[Dict[str, object]]:
+        for index in range(len(self)):
+            yield self[index]
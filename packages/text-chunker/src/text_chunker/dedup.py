@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import operator
+import re
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .compact import ChunkTable
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+# Signatures kept for lookups; the oldest are forgotten beyond this many.
+DEFAULT_CAPACITY = 100_000
+DEDUP_MODES = ("drop", "flag")
+
+_SHINGLE = 3
+_WORD = re.compile(r"\w+")
+_MASK = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15
+
+
+def signature(text: str, num_perm: int = DEFAULT_NUM_PERM) -> array:
+    """MinHash signature of ``text`` over lower-cased word 3-grams.
+
+    Uses one-permutation hashing: each shingle hash lands in one of
+    ``num_perm`` bins and keeps the bin minimum, so a chunk costs one hash per
+    shingle rather than one per shingle and permutation. Empty bins borrow
+    the next filled bin's value (rotation densification) so that every
+    position is comparable.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) > _SHINGLE:
+        shingles = {" ".join(words[i : i + _SHINGLE]) for i in range(len(words) - _SHINGLE + 1)}
+    else:
+        shingles = {" ".join(words) if words else text.strip()}
+    empty = _MASK
+    bins = [empty] * num_perm
+    for shingle in shingles:
+        mixed = (zlib.crc32(shingle.encode("utf-8")) * _MIX) & _MASK
+        value, position = divmod(mixed, num_perm)
+        if value < bins[position]:
+            bins[position] = value
+    if empty in bins:
+        filled = [i for i, value in enumerate(bins) if value != empty]
+        step = _MASK // num_perm
+        dense = list(bins)
+        for i, value in enumerate(bins):
+            if value == empty:
+                j = filled[bisect_left(filled, i) % len(filled)]
+                dense[i] = bins[j] + ((j - i) % num_perm) * step
+        bins = dense
+    return array("Q", bins)
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(map(operator.eq, first, second)) / max(len(first), 1)
+
+
+def _bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    # The band/row split whose S-curve midpoint (1/b)^(1/r) sits closest below
+    # the threshold: candidates are cheap to verify, missed pairs are not.
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class DedupIndex:
+    """LSH index of chunk signatures for finding near-duplicates.
+
+    Signatures are split into bands; chunks sharing any band are candidates
+    and count as duplicates when their estimated Jaccard similarity reaches
+    ``threshold``. At most ``capacity`` signatures are kept, oldest first out,
+    so an index shared across a long batch run stays bounded in memory.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        *,
+        num_perm: int = DEFAULT_NUM_PERM,
+        capacity: int = DEFAULT_CAPACITY,
+    ) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("Dedup threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.capacity = max(1, capacity)
+        self.bands, self.rows = _bands(threshold, num_perm)
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self._entries: Dict[int, Tuple[Hashable, array]] = {}
+        self._order: Deque[int] = deque()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, sig: Sequence[int]) -> Iterator[int]:
+        rows = self.rows
+        for band in range(self.bands):
+            yield hash(tuple(sig[band * rows : (band + 1) * rows]))
+
+    def find(self, sig: Sequence[int]) -> Optional[Hashable]:
+        """Key of an indexed near-duplicate of ``sig``, or None."""
+        seen = set()
+        for buckets, band_key in zip(self._buckets, self._keys(sig)):
+            for entry in buckets.get(band_key, ()):
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                key, other = self._entries[entry]
+                if similarity(sig, other) >= self.threshold:
+                    return key
+        return None
+
+    def add(self, sig: Sequence[int], key: Hashable) -> None:
+        entry = self._next_id
+        self._next_id += 1
+        self._entries[entry] = (key, array("Q", sig))
+        self._order.append(entry)
+        for buckets, band_key in zip(self._buckets, self._keys(sig)):
+            buckets.setdefault(band_key, []).append(entry)
+        while len(self._order) > self.capacity:
+            self._evict(self._order.popleft())
+
+    def _evict(self, entry: int) -> None:
+        _, sig = self._entries.pop(entry)
+        for buckets, band_key in zip(self._buckets, self._keys(sig)):
+            bucket = buckets[band_key]
+            bucket.remove(entry)
+            if not bucket:
+                del buckets[band_key]
+
+    def check(self, sig: Sequence[int], key: Hashable) -> Optional[Hashable]:
+        """Return the key ``sig`` duplicates, or index it under ``key`` and return None."""
+        match = self.find(sig)
+        if match is None:
+            self.add(sig, key)
+        return match
+
+
+@dataclass
+class DedupStats:
+    """Chunks found to be near-duplicates and what they would have cost."""
+
+    chunks: int = 0
+    tokens: int = 0
+    characters: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "duplicate_chunks": self.chunks,
+            "duplicate_tokens": self.tokens,
+            "duplicate_characters": self.characters,
+        }
+
+
+def deduplicate(
+    chunks: Sequence[Dict[str, object]],
+    index: DedupIndex,
+    *,
+    mode: str = "drop",
+    source: Optional[str] = None,
+    signatures: Optional[Iterable[Sequence[int]]] = None,
+) -> Tuple[Sequence[Dict[str, object]], DedupStats]:
+    """Drop or flag chunks that near-duplicate earlier ones in ``index``.
+
+    Each chunk is checked against everything indexed so far (earlier chunks of
+    this document and of documents checked before it) and indexed if new.
+    Flagged chunks gain ``"duplicate_of": {"index": i}`` naming the chunk they
+    repeat, plus ``"source"`` when that chunk came from another document.
+    Dropping keeps the remaining chunks' ``index`` values. ``signatures`` may
+    be precomputed, e.g. by the worker that produced ``chunks``.
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode: {mode}")
+    stats = DedupStats()
+    kept: List[int] = []
+    flags: Dict[int, Dict[str, object]] = {}
+    precomputed = iter(signatures) if signatures is not None else None
+    for position, chunk in enumerate(chunks):
+        if precomputed is not None:
+            sig = next(precomputed)
+        else:
+            sig = signature(str(chunk["text"]), index.num_perm)
+        match = index.check(sig, (source, chunk["index"]))
+        if match is None:
+            kept.append(position)
+            continue
+        stats.chunks += 1
+        stats.tokens += int(chunk["tokens"])  # type: ignore[call-overload]
+        stats.characters += int(chunk["characters"])  # type: ignore[call-overload]
+        match_source, match_index = match  # type: ignore[misc]
+        flag: Dict[str, object] = {"index": match_index}
+        if match_source != source:
+            flag["source"] = match_source
+        flags[position] = flag
+    if mode == "flag":
+        for position, flag in flags.items():
+            if isinstance(chunks, ChunkTable):
+                chunks.annotate(position, duplicate_of=flag)
+            else:
+                chunks[position]["duplicate_of"] = flag
+        return chunks, stats
+    if isinstance(chunks, ChunkTable):
+        return chunks.select(kept), stats
+    return [chunks[position] for position in kept], stats
+
+
+def dedup_payload(payload: Dict[str, object], index: DedupIndex, mode: str = "drop") -> None:
+    """Deduplicate ``payload["chunks"]`` in place and record the savings in its metadata."""
+    chunks, stats = deduplicate(payload["chunks"], index, mode=mode)  # type: ignore[arg-type]
+    payload["chunks"] = chunks
+    metadata = payload.get("metadata")
+    if not isinstance(metadata, dict):
+        return
+    if mode == "drop":
+        metadata["total_chunks"] = len(chunks)
+        metadata["total_tokens"] = int(metadata["total_tokens"]) - stats.tokens
+        metadata["total_characters"] = int(metadata["total_characters"]) - stats.characters
+    metadata["dedup"] = {"mode": mode, "threshold": index.threshold, **stats.to_dict()}
+
+
+def dedup_stream(
+    chunks: Iterable[Dict[str, object]],
+    index: DedupIndex,
+    mode: str = "drop",
+    stats: Optional[DedupStats] = None,
+) -> Iterator[Dict[str, object]]:
+    """Deduplicate chunk dicts as they arrive, e.g. from ``chunk_stream``.
+
+    Savings are added to ``stats`` when one is given.
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode: {mode}")
+    stats = stats if stats is not None else DedupStats()
+    for chunk in chunks:
+        sig = signature(str(chunk["text"]), index.num_perm)
+        match = index.check(sig, (None, chunk["index"]))
+        if match is None:
+            yield chunk
+            continue
+        stats.chunks += 1
+        stats.tokens += int(chunk["tokens"])  # type: ignore[call-overload]
+        stats.characters += int(chunk["characters"])  # type: ignore[call-overload]
+        if mode == "flag":
+            yield dict(chunk, duplicate_of={"index": match[1]})  # type: ignore[index]
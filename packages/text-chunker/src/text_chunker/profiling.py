@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+STAGES = ("segmentation", "tokenization", "packing", "overlap", "serialization")
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., object])
+
+
+class StageProfile:
+    """Exclusive wall time per chunking stage.
+
+    Entering a stage pauses the one it is nested in, so each second is counted
+    once: encoding done while packing or adding overlap shows up under
+    ``tokenization``, and ``packing`` is the bookkeeping around it.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.started = time.perf_counter()
+        self._stack: List[str] = []
+        self._since = self.started
+
+    def enter(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._since
+        self._stack.append(name)
+        self._since = now
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        self.seconds[self._stack.pop()] += now - self._since
+        self._since = now
+
+    def merge(self, seconds: Dict[str, float]) -> None:
+        for name, value in seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + value
+
+    def report(self, wall: Optional[float] = None) -> str:
+        wall = wall if wall is not None else time.perf_counter() - self.started
+        staged = sum(self.seconds.values())
+        rows = [*self.seconds.items(), ("other", max(0.0, wall - staged))]
+        total = max(wall, staged, 1e-9)
+        lines = [f"{'stage':<14}{'seconds':>10}{'share':>8}"]
+        lines.extend(f"{name:<14}{value:>10.3f}{value / total:>8.1%}" for name, value in rows)
+        lines.append(f"{'total':<14}{max(wall, staged):>10.3f}")
+        return "\n".join(lines)
+
+
+# The profile being recorded in this process, if any; the CLI and batch
+# workers enable one around a run.
+active: Optional[StageProfile] = None
+
+
+@contextmanager
+def profiled() -> Iterator[StageProfile]:
+    global active
+    previous, active = active, StageProfile()
+    try:
+        yield active
+    finally:
+        active = previous
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    profile = active
+    if profile is None:
+        yield
+        return
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit()
+
+
+def staged(name: str) -> Callable[[F], F]:
+    """Decorator attributing a function's time to stage ``name`` while profiling."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            profile = active
+            if profile is None:
+                return func(*args, **kwargs)
+            profile.enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.exit()
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def timed(iterable: Iterable[T], name: str) -> Iterator[T]:
+    """Iterate ``iterable``, attributing the time spent producing items to ``name``."""
+    profile = active
+    if profile is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        profile.enter(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            profile.exit()
+        yield item
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import re
+import socket
+import socketserver
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .batch import _init_worker
+from .cache import DEFAULT_MAX_BYTES
+from .chunker import chunk_text
+
+DEFAULT_SOCKET = Path(tempfile.gettempdir()) / "text-chunker.sock"
+# Keyword arguments of ``chunk_text`` a request may set. The cache is the
+# server's own (``make_server(cache_dir=...)``), so clients cannot pick paths.
+REQUEST_PARAMS = frozenset(
+    {
+        "max_tokens",
+        "max_chars",
+        "overlap",
+        "strategy",
+        "encoding",
+        "include_metadata",
+        "dedup_threshold",
+        "dedup_mode",
+    }
+)
+# How long a client waits for a server to accept before working in-process.
+_CONNECT_TIMEOUT = 0.5
+_TCP_ADDRESS = re.compile(r"^(?:http://)?(?P<host>[\w.-]+):(?P<port>\d+)/?$")
+
+
+def _run_request(text: str, params: Dict[str, object]) -> bytes:
+    # Serialized in the worker so the server thread only copies bytes out.
+    payload = chunk_text(text, **params)  # type: ignore[arg-type]
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: Union[_UnixServer, _TCPServer]
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self._reply(200, {"status": "ok"})
+
+    def do_POST(self) -> None:
+        if self.path != "/chunk":
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            text = request.pop("text")
+            if not isinstance(text, str):
+                raise ValueError("'text' must be a string")
+            unknown = set(request) - REQUEST_PARAMS
+            if unknown:
+                raise ValueError(f"Unsupported parameters: {', '.join(sorted(unknown))}")
+            params = {**request, **self.server.cache_params}
+            body = self.server.pool.submit(_run_request, text, params).result()
+        except (KeyError, TypeError, ValueError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        except Exception as exc:  # pragma: no cover - worker crash
+            self._reply(500, {"error": str(exc)})
+            return
+        self._send(200, body)
+
+    def _reply(self, status: int, payload: Dict[str, object]) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # Requests are too frequent to log; errors reach the client as JSON.
+        return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    pool: Executor
+    cache_params: Dict[str, object]
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    pool: Executor
+    cache_params: Dict[str, object]
+
+
+def make_server(
+    *,
+    socket_path: Optional[Path] = None,
+    host: str = "127.0.0.1",
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+    encoding: str = "cl100k_base",
+    cache_dir: Optional[Path] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Union[_UnixServer, _TCPServer]:
+    """Bind a chunking server on ``port`` if given, else on a Unix socket.
+
+    Requests are handled on threads and chunked on a process pool whose
+    workers load ``encoding`` up front; other encodings stay loaded once used.
+    With ``cache_dir``, every request reuses that cache.
+    """
+    server: Union[_UnixServer, _TCPServer]
+    if port is not None:
+        server = _TCPServer((host, port), _Handler)
+    else:
+        path = Path(socket_path or DEFAULT_SOCKET)
+        if path.exists():
+            if request_health(str(path)):
+                raise RuntimeError(f"A server is already listening on {path}")
+            path.unlink()
+        server = _UnixServer(str(path), _Handler)
+        os.chmod(path, 0o600)
+    server.cache_params = {
+        "cache_dir": str(Path(cache_dir).resolve()) if cache_dir is not None else None,
+        "cache_max_bytes": cache_max_bytes,
+    }
+    server.pool = ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        initializer=_init_worker,
+        initargs=(encoding,),
+    )
+    # Start the workers now so the first request does not pay for them.
+    server.pool.submit(_init_worker, encoding).result()
+    return server
+
+
+def close_server(server: Union[_UnixServer, _TCPServer]) -> None:
+    server.server_close()
+    server.pool.shutdown(cancel_futures=True)
+    if isinstance(server, _UnixServer):
+        try:
+            os.unlink(server.server_address)  # type: ignore[arg-type]
+        except OSError:
+            pass
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def _connection(address: str) -> http.client.HTTPConnection:
+    match = _TCP_ADDRESS.match(address)
+    if match:
+        return http.client.HTTPConnection(
+            match["host"], int(match["port"]), timeout=_CONNECT_TIMEOUT
+        )
+    return _UnixConnection(address, timeout=_CONNECT_TIMEOUT)
+
+
+def request_health(address: str) -> bool:
+    connection = _connection(address)
+    try:
+        connection.request("GET", "/health")
+        return connection.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+
+def request_chunks(address: str, text: str, **params: object) -> Optional[Dict[str, object]]:
+    """Chunk ``text`` on the server at ``address`` (socket path or ``host:port``).
+
+    Returns ``None`` when no server accepts the connection, so callers can fall
+    back to chunking in-process; errors reported by the server raise ValueError.
+    """
+    connection = _connection(address)
+    try:
+        connection.connect()
+    except OSError:
+        connection.close()
+        return None
+    try:
+        # Only connecting is bounded; chunking a large document may take a while.
+        connection.sock.settimeout(None)
+        body = json.dumps({"text": text, **params}, ensure_ascii=False).encode("utf-8")
+        connection.request(
+            "POST", "/chunk", body=body, headers={"Content-Type": "application/json"}
+        )
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise ValueError(payload.get("error", f"Server returned HTTP {response.status}"))
+    return payload
@@ -1,49 +1,121 @@
 from __future__ import annotations
 
-from typing import List
+import re
+from typing import Iterable, Iterator, List, Union
 
-from .utils import Segment, split_markdown_sections, split_paragraphs, split_sentences
+from .utils import (
+    Segment,
+    iter_markdown_sections,
+    iter_paragraphs,
+    iter_sentences,
+    paragraph_cut,
+    sentence_cut,
+    split_fixed_width,
+    split_fixed_width_stream,
+    split_markdown_sections,
+    split_paragraphs,
+    split_sentences,
+    split_stream,
+    split_words,
+    word_cut,
+)
 
+_HEADING = re.compile(r"(?m)^#{1,6}\s+.*$")
 
-def by_character(text: str, max_chars: int, overlap: int) -> List[Segment]:
-    from .utils import split_fixed_width
 
-    return list(split_fixed_width(text, width=max_chars, overlap=overlap))
+# With ``lazy=True`` the by_* functions return iterators that slice each segment
+# as it is consumed instead of building the whole list up front.
+def by_character(
+    text: str, max_chars: int, overlap: int, lazy: bool = False
+) -> Union[List[Segment], Iterator[Segment]]:
+    segments = iter(split_fixed_width(text, width=max_chars, overlap=overlap))
+    return segments if lazy else list(segments)
 
 
-def by_token(text: str) -> List[Segment]:
+def by_token(text: str, lazy: bool = False) -> Union[List[Segment], Iterator[Segment]]:
     # Token chunking is assembled in chunker.py where token budget is known.
-    return [Segment(text=text, start=0, end=len(text), boundary_type="token")]
+    segments = [Segment(text=text, start=0, end=len(text), boundary_type="token")]
+    return iter(segments) if lazy else segments
 
 
-def by_sentence(text: str) -> List[Segment]:
-    return split_sentences(text)
+def by_sentence(text: str, lazy: bool = False) -> Union[List[Segment], Iterator[Segment]]:
+    return iter_sentences(text) if lazy else split_sentences(text)
 
 
-def by_paragraph(text: str) -> List[Segment]:
-    return split_paragraphs(text)
+def by_paragraph(text: str, lazy: bool = False) -> Union[List[Segment], Iterator[Segment]]:
+    return iter_paragraphs(text) if lazy else split_paragraphs(text)
 
 
-def by_semantic(text: str) -> List[Segment]:
+def by_semantic(text: str, lazy: bool = False) -> Union[List[Segment], Iterator[Segment]]:
+    segments = _semantic_segments(text)
+    return segments if lazy else list(segments)
+
+
+def _semantic_segments(text: str) -> Iterator[Segment]:
     # Semantic mode preserves markdown headings and then paragraph boundaries.
-    sections = split_markdown_sections(text)
-    if not sections:
-        return []
-    if all(s.boundary_type == "paragraph" for s in sections):
-        return sections
-    semantic_segments: List[Segment] = []
+    # Text before the first heading is kept as plain paragraphs, as in streaming.
+    match = _HEADING.search(text)
+    if not match:
+        yield from iter_paragraphs(text)
+        return
+    yield from iter_paragraphs(text[: match.start()])
+    yield from _section_paragraphs(iter_markdown_sections(text))
+
+
+def _section_paragraphs(sections: Iterable[Segment]) -> Iterator[Segment]:
     for section in sections:
-        sub = split_paragraphs(section.text)
-        if not sub:
-            semantic_segments.append(section)
-            continue
-        for item in sub:
-            semantic_segments.append(
-                Segment(
-                    text=item.text,
-                    start=section.start + item.start,
-                    end=section.start + item.end,
-                    boundary_type="semantic",
-                )
+        emitted = False
+        for item in iter_paragraphs(section.text):
+            emitted = True
+            yield Segment(
+                text=item.text,
+                start=section.start + item.start,
+                end=section.start + item.end,
+                boundary_type="semantic",
             )
-    return semantic_segments
+        if not emitted:
+            yield section
+
+
+def _semantic_stream(pieces: Iterable[str]) -> Iterator[Segment]:
+    # Fragments always start at a paragraph boundary, so text before the first
+    # heading of a fragment continues the section left open by the previous one.
+    seen_heading = False
+
+    def split(fragment: str) -> List[Segment]:
+        nonlocal seen_heading
+        match = _HEADING.search(fragment)
+        first = match.start() if match else len(fragment)
+        lead = split_paragraphs(fragment[:first])
+        if seen_heading:
+            lead = [
+                Segment(text=s.text, start=s.start, end=s.end, boundary_type="semantic")
+                for s in lead
+            ]
+        if not match:
+            return lead
+        seen_heading = True
+        tail = [
+            Segment(
+                text=s.text, start=first + s.start, end=first + s.end, boundary_type=s.boundary_type
+            )
+            for s in split_markdown_sections(fragment[first:])
+        ]
+        return lead + list(_section_paragraphs(tail))
+
+    return split_stream(pieces, split, paragraph_cut)
+
+
+def stream_segments(
+    pieces: Iterable[str], strategy: str, max_chars: int, overlap: int
+) -> Iterator[Segment]:
+    """Segment text arriving in pieces, yielding segments as soon as they are final."""
+    if strategy == "character":
+        return split_fixed_width_stream(pieces, width=max_chars, overlap=overlap)
+    if strategy == "token":
+        return split_stream(pieces, split_words, word_cut)
+    if strategy == "paragraph":
+        return split_stream(pieces, split_paragraphs, paragraph_cut)
+    if strategy == "semantic":
+        return _semantic_stream(pieces)
+    return split_stream(pieces, split_sentences, sentence_cut)
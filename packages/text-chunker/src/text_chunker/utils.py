@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import mmap
 import re
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Iterable, List
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Sequence
 
-import tiktoken
+from . import profiling
+from .profiling import staged
 
 
 @dataclass(frozen=True)
@@ -16,23 +23,87 @@ class Segment:
     complete: bool = True
 
 
+# Threads tiktoken may use for batched encodes (its own default).
+DEFAULT_TOKEN_THREADS = 8
+# Pseudo-encoding that estimates counts from text length; tiktoken is never loaded.
+ESTIMATE_ENCODING = "chars"
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
 def get_encoding(name: str):
+    # Imported here: loading tiktoken dominates startup, and neither --help nor
+    # the estimator needs it.
+    import tiktoken
+
     try:
         return tiktoken.get_encoding(name)
     except Exception as exc:  # pragma: no cover - defensive
         raise ValueError(f"Unsupported encoding: {name}") from exc
 
 
+def load_encoding(name: str) -> None:
+    """Load ``name`` ahead of use (e.g. in a worker process); a no-op for estimates."""
+    if name != ESTIMATE_ENCODING:
+        get_encoding(name)
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count guessed from length: ``CHARS_PER_TOKEN`` characters per token."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def map_text(path: Path) -> str:
+    """Read a UTF-8 file through a memory map, decoding straight from the mapping.
+
+    Unlike ``Path.read_text`` no intermediate ``bytes`` copy of the file is made.
+    Newlines are translated the same way as text-mode reads.
+    """
+    with open(path, "rb") as handle:
+        try:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files cannot be mapped, and neither can pipes or special files.
+            return handle.read().decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        with mapping:
+            text = str(mapping, "utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
 def count_tokens(text: str, encoding_name: str) -> int:
     if not text:
         return 0
+    if encoding_name == ESTIMATE_ENCODING:
+        return estimate_tokens(text)
     encoding = get_encoding(encoding_name)
-    return len(encoding.encode(text))
+    # Checked inline: this is called per segment, so a wrapper would show up.
+    if profiling.active is None:
+        return len(encoding.encode(text))
+    with profiling.stage("tokenization"):
+        return len(encoding.encode(text))
 
 
+@staged("tokenization")
+def count_tokens_many(
+    texts: Sequence[str], encoding_name: str, num_threads: int = DEFAULT_TOKEN_THREADS
+) -> List[int]:
+    """Token counts for many texts with one batched call into tiktoken."""
+    if not texts:
+        return []
+    if encoding_name == ESTIMATE_ENCODING:
+        return [estimate_tokens(text) for text in texts]
+    encoding = get_encoding(encoding_name)
+    return [len(tokens) for tokens in encoding.encode_batch(list(texts), num_threads=num_threads)]
+
+
+@staged("tokenization")
 def tail_tokens(text: str, token_count: int, encoding_name: str) -> str:
     if token_count <= 0 or not text:
         return ""
+    if encoding_name == ESTIMATE_ENCODING:
+        return text[-token_count * CHARS_PER_TOKEN :]
     encoding = get_encoding(encoding_name)
     encoded = encoding.encode(text)
     if len(encoded) <= token_count:
@@ -40,61 +111,175 @@ def tail_tokens(text: str, token_count: int, encoding_name: str) -> str:
     return encoding.decode(encoded[-token_count:])
 
 
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_WORD = re.compile(r"\S+\s*")
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|$)", re.M)
+_MARKDOWN_HEADING = re.compile(r"(?m)^#{1,6}\s+.*$")
+
+# bytes.translate deletion table: UTF-8 continuation bytes never start a character.
+_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+_OFFSET_BATCH = 65536
+
+
+# Documents above this size are encoded as paragraph-aligned pieces in parallel.
+_INDEX_PIECE_CHARS = 1 << 20
+# Encodings whose pre-tokenizer always ends a piece at the last newline of a
+# blank line followed by text. The gpt2 pattern of p50k/r50k does not: it groups
+# whitespace at the end of a string differently, so those are encoded whole.
+_PIECEWISE_ENCODINGS = frozenset({"cl100k_base", "o200k_base"})
+
+
+def _index_pieces(text: str, encoding_name: str) -> List[str]:
+    # Cutting where _PARAGRAPH_CUT ends leaves the token stream unchanged.
+    if encoding_name not in _PIECEWISE_ENCODINGS:
+        return [text]
+    pieces: List[str] = []
+    start = 0
+    while len(text) - start > 2 * _INDEX_PIECE_CHARS:
+        match = _PARAGRAPH_CUT.search(text, start + _INDEX_PIECE_CHARS)
+        if match is None:
+            break
+        pieces.append(text[start : match.end()])
+        start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+class TokenIndex:
+    """Token positions of a whole document, encoded once.
+
+    Token start offsets (in characters) are kept in an ``array`` so span counts
+    and "last k tokens" lookups are bisections instead of re-encoding slices.
+    Counts follow the document's own tokenization: a token is attributed to the
+    span its first character falls in, so a span counted here can differ by a
+    token at its edges from encoding the span on its own.
+    """
+
+    @staged("tokenization")
+    def __init__(
+        self, text: str, encoding_name: str, num_threads: int = DEFAULT_TOKEN_THREADS
+    ) -> None:
+        self.text = text
+        self.encoding_name = encoding_name
+        if encoding_name == ESTIMATE_ENCODING:
+            # Estimated tokens are fixed-width runs of characters.
+            self.offsets = array("q", range(0, len(text), CHARS_PER_TOKEN))
+            return
+        encoding = get_encoding(encoding_name)
+        self.offsets = array("q")
+        ascii_only = text.isascii()
+        position = 0
+        pieces = _index_pieces(text, encoding_name)
+        # Encode a thread pool's worth of pieces at a time so only their token
+        # lists, not the whole document's, are alive at once.
+        step = max(1, num_threads)
+        for group_start in range(0, len(pieces), step):
+            group = pieces[group_start : group_start + step]
+            for tokens in encoding.encode_batch(group, num_threads=num_threads):
+                position = self._add_offsets(encoding, tokens, position, ascii_only)
+
+    def _add_offsets(self, encoding, tokens: List[int], position: int, ascii_only: bool) -> int:
+        for batch_start in range(0, len(tokens), _OFFSET_BATCH):
+            pieces = encoding.decode_tokens_bytes(tokens[batch_start : batch_start + _OFFSET_BATCH])
+            if ascii_only:
+                ends = array("q", accumulate(map(len, pieces), initial=position))
+                position = ends.pop()
+                self.offsets.extend(ends)
+                continue
+            for piece in pieces:
+                # A token starting inside a multi-byte character belongs to that character.
+                mid_char = bool(piece) and 0x80 <= piece[0] < 0xC0
+                self.offsets.append(position - 1 if mid_char else position)
+                position += len(piece.translate(None, _CONTINUATION_BYTES))
+        return position
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def position(self, offset: int) -> int:
+        """Number of tokens starting before character ``offset``."""
+        return bisect_left(self.offsets, offset)
+
+    def count(self, start: int, end: int) -> int:
+        """Tokens starting in ``[start, end)``."""
+        if end <= start:
+            return 0
+        return self.position(end) - self.position(start)
+
+    def tail_start(self, end: int, token_count: int, floor: int = 0) -> int:
+        """Character offset where the last ``token_count`` tokens before ``end`` begin."""
+        position = self.position(end)
+        if token_count <= 0 or position == 0:
+            return end
+        return max(floor, self.offsets[max(0, position - token_count)])
+
+
 def split_paragraphs(text: str) -> List[Segment]:
-    if not text:
-        return []
-    segments: List[Segment] = []
+    return list(iter_paragraphs(text))
+
+
+def iter_paragraphs(text: str) -> Iterator[Segment]:
+    """Lazy :func:`split_paragraphs`: segments are sliced as they are consumed."""
     start = 0
-    for match in re.finditer(r"\n\s*\n", text):
+    for match in _PARAGRAPH_BREAK.finditer(text):
         end = match.start()
-        if end > start:
-            segments.append(
-                Segment(text=text[start:end], start=start, end=end, boundary_type="paragraph")
-            )
+        paragraph = text[start:end]
+        if paragraph.strip():
+            yield Segment(text=paragraph, start=start, end=end, boundary_type="paragraph")
         start = match.end()
-    if start < len(text):
-        segments.append(
-            Segment(text=text[start:], start=start, end=len(text), boundary_type="paragraph")
+    paragraph = text[start:]
+    if paragraph.strip():
+        yield Segment(text=paragraph, start=start, end=len(text), boundary_type="paragraph")
+
+
+def split_words(text: str) -> List[Segment]:
+    return list(iter_words(text))
+
+
+def iter_words(text: str) -> Iterator[Segment]:
+    # Word+whitespace spans so spacing is preserved when words are re-joined.
+    for match in _WORD.finditer(text):
+        yield Segment(
+            text=match.group(0), start=match.start(), end=match.end(), boundary_type="token"
         )
-    return [s for s in segments if s.text.strip()]
 
 
 def split_sentences(text: str) -> List[Segment]:
-    if not text:
-        return []
-    pattern = re.compile(r"[^.!?\n]+(?:[.!?]+|$)", re.M)
-    segments: List[Segment] = []
-    for match in pattern.finditer(text):
+    return list(iter_sentences(text))
+
+
+def iter_sentences(text: str) -> Iterator[Segment]:
+    for match in _SENTENCE.finditer(text):
         content = match.group(0)
         if content.strip():
-            segments.append(
-                Segment(
-                    text=content,
-                    start=match.start(),
-                    end=match.end(),
-                    boundary_type="sentence",
-                )
+            yield Segment(
+                text=content,
+                start=match.start(),
+                end=match.end(),
+                boundary_type="sentence",
             )
-    return segments
 
 
 def split_markdown_sections(text: str) -> List[Segment]:
-    if not text:
-        return []
-    heading_pattern = re.compile(r"(?m)^#{1,6}\s+.*$")
-    matches = list(heading_pattern.finditer(text))
-    if not matches:
-        return split_paragraphs(text)
-    segments: List[Segment] = []
-    for idx, match in enumerate(matches):
-        start = match.start()
-        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(text)
+    return list(iter_markdown_sections(text))
+
+
+def iter_markdown_sections(text: str) -> Iterator[Segment]:
+    """Sections from each heading to the next; paragraphs if there are no headings."""
+    matches = _MARKDOWN_HEADING.finditer(text)
+    current = next(matches, None)
+    if current is None:
+        yield from iter_paragraphs(text)
+        return
+    while current is not None:
+        following = next(matches, None)
+        start = current.start()
+        end = following.start() if following is not None else len(text)
         section = text[start:end]
         if section.strip():
-            segments.append(
-                Segment(text=section, start=start, end=end, boundary_type="markdown_section")
-            )
-    return segments
+            yield Segment(text=section, start=start, end=end, boundary_type="markdown_section")
+        current = following
 
 
 def split_fixed_width(text: str, width: int, overlap: int = 0) -> Iterable[Segment]:
@@ -108,3 +293,92 @@ def split_fixed_width(text: str, width: int, overlap: int = 0) -> Iterable[Segme
         yield Segment(text=text[start:end], start=start, end=end, boundary_type="character")
         if end == len(text):
             break
+
+
+# Safe cut points for streaming: splitting ``buffer[:cut]`` and ``buffer[cut:]``
+# separately yields the same segments as splitting the joined text, no matter
+# what text is appended to the buffer later.
+_SENTENCE_CUT = re.compile(r"\n|[.!?](?=[^.!?])")
+_PARAGRAPH_CUT = re.compile(r"\n\s*\n(?=[^\S\n]*\S)")
+_WORD_CUT = re.compile(r"\s(?=\S)")
+
+
+def _last_cut(pattern: re.Pattern[str], buffer: str) -> int:
+    cut = 0
+    for match in pattern.finditer(buffer):
+        cut = match.end()
+    return cut
+
+
+def sentence_cut(buffer: str) -> int:
+    return _last_cut(_SENTENCE_CUT, buffer)
+
+
+def paragraph_cut(buffer: str) -> int:
+    return _last_cut(_PARAGRAPH_CUT, buffer)
+
+
+def word_cut(buffer: str) -> int:
+    return _last_cut(_WORD_CUT, buffer)
+
+
+def split_stream(
+    pieces: Iterable[str],
+    split: Callable[[str], Iterable[Segment]],
+    safe_cut: Callable[[str], int],
+) -> Iterator[Segment]:
+    """Apply ``split`` to text arriving in pieces, yielding segments as they settle.
+
+    Text is held only until ``safe_cut`` finds a point after which no later input
+    can change the segmentation; offsets are relative to the whole stream.
+    """
+    buffer = ""
+    base = 0
+    for piece in pieces:
+        if not piece:
+            continue
+        buffer += piece
+        cut = safe_cut(buffer)
+        if cut <= 0:
+            continue
+        for seg in split(buffer[:cut]):
+            yield _shift(seg, base)
+        buffer = buffer[cut:]
+        base += cut
+    if buffer:
+        for seg in split(buffer):
+            yield _shift(seg, base)
+
+
+def split_fixed_width_stream(
+    pieces: Iterable[str], width: int, overlap: int = 0
+) -> Iterator[Segment]:
+    """Streaming counterpart of :func:`split_fixed_width`."""
+    if width <= 0:
+        raise ValueError("width must be > 0")
+    step = max(1, width - max(0, overlap))
+    buffer = ""
+    base = 0
+    for piece in pieces:
+        buffer += piece
+        # A window is final once text beyond it has arrived.
+        while len(buffer) > width:
+            yield Segment(
+                text=buffer[:width], start=base, end=base + width, boundary_type="character"
+            )
+            buffer = buffer[step:]
+            base += step
+    for seg in split_fixed_width(buffer, width=width, overlap=overlap):
+        yield _shift(seg, base)
+
+
+def _shift(seg: Segment, offset: int) -> Segment:
+    if not offset:
+        return seg
+    return Segment(
+        text=seg.text,
+        start=seg.start + offset,
+        end=seg.end + offset,
+        boundary_type=seg.boundary_type,
+        complete=seg.complete,
+    )
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from text_chunker.batch import chunk_files, expand_paths, output_path
+
+
+def test_chunk_files_preserves_input_order(tmp_path: Path) -> None:
+    paths = []
+    for idx in range(6):
+        path = tmp_path / f"doc{idx}.txt"
+        path.write_text(f"Document {idx}. " * (20 - idx * 3), encoding="utf-8")
+        paths.append(path)
+    (tmp_path / "manifest.txt").write_text(f"# inputs\n{paths[5]}\n", encoding="utf-8")
+    ordered = expand_paths([str(tmp_path / "doc[0-4].txt")], tmp_path / "manifest.txt")
+    assert ordered == paths
+
+    results = list(chunk_files(ordered, workers=2, max_tokens=20))
+    assert [r.path for r in results] == paths
+    assert all(r.total_tokens > 0 and r.chunks for r in results)
+
+
+def test_output_path_mirrors_source_layout(tmp_path: Path) -> None:
+    assert output_path(tmp_path, Path("/data/a/doc.txt")) == tmp_path / "data/a/doc.txt.jsonl"
+
+
+def test_unmatched_globs_are_dropped_and_failures_reported(tmp_path: Path) -> None:
+    good = tmp_path / "good.txt"
+    good.write_text("Some text. " * 20, encoding="utf-8")
+    missing = tmp_path / "missing.txt"
+    assert expand_paths([str(tmp_path / "*.md")]) == []
+    paths = expand_paths([str(tmp_path / "*.md"), str(missing), str(good)])
+    assert paths == [missing, good]
+
+    results = list(chunk_files(paths, workers=1, max_tokens=20))
+    assert results[0].error and not results[0].chunks
+    assert results[1].error is None and results[1].chunks
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from text_chunker.bench import CORPORA, run_benchmarks, synthetic_text
+from text_chunker.cli import main
+from text_chunker.profiling import STAGES
+
+
+def test_synthetic_corpora_are_reproducible() -> None:
+    for corpus in CORPORA:
+        text = synthetic_text(corpus, 5000, seed=3)
+        assert len(text) == 5000
+        assert text == synthetic_text(corpus, 5000, seed=3)
+    assert "\n" not in synthetic_text("single-line", 5000)
+
+    results = list(
+        run_benchmarks(corpora=["prose"], sizes=[2000], strategies=["sentence"], repeat=1)
+    )
+    assert [r.overlap for r in results] == [0, 64]
+    assert all(r.chunks > 0 and r.seconds > 0 and r.peak_bytes > 0 for r in results)
+
+
+def test_profile_reports_every_stage(tmp_path: Path) -> None:
+    source = tmp_path / "doc.txt"
+    source.write_text(synthetic_text("markdown", 3000), encoding="utf-8")
+    result = CliRunner().invoke(
+        main, [str(source), "--max-tokens", "50", "--overlap", "5", "--profile"]
+    )
+    assert result.exit_code == 0, result.output
+    for name in STAGES:
+        assert f"\n{name} " in result.output
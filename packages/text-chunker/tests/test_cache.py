@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from text_chunker import chunker
+from text_chunker.cache import ChunkCache
+from text_chunker.chunker import chunk_text
+
+
+def test_cached_document_skips_tokenization(tmp_path: Path, monkeypatch) -> None:
+    text = "Cached sentence one. Cached sentence two."
+    first = chunk_text(text, max_tokens=5, cache_dir=tmp_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("tokenized a cached document")
+
+    monkeypatch.setattr(chunker, "TokenIndex", fail)
+    assert chunk_text(text, max_tokens=5, cache_dir=tmp_path) == first
+    assert "metadata" not in chunk_text(
+        text, max_tokens=5, cache_dir=tmp_path, include_metadata=False
+    )
+    with pytest.raises(AssertionError):
+        chunk_text(text, max_tokens=6, cache_dir=tmp_path)
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ChunkCache(tmp_path, max_bytes=2500)
+    payload = {"chunks": [{"text": "x" * 1000}]}
+    for idx, name in enumerate(["a", "b"]):
+        cache.put(ChunkCache.key(name, {}), payload)
+        path = next(tmp_path.rglob(f"{ChunkCache.key(name, {})}.json"))
+        os.utime(path, (idx, idx))
+    assert cache.get(ChunkCache.key("a", {})) is not None
+    cache.put(ChunkCache.key("c", {}), payload)
+    assert cache.get(ChunkCache.key("b", {})) is None
+    assert cache.get(ChunkCache.key("a", {})) is not None
+
+
+def test_cache_size_counts_overwrites_and_other_writers(tmp_path: Path, monkeypatch) -> None:
+    payload = {"chunks": [{"text": "x" * 1000}]}
+    cache = ChunkCache(tmp_path, max_bytes=3500)
+    for _ in range(3):
+        cache.put(ChunkCache.key("same", {}), payload)
+    on_disk = sum(p.stat().st_size for p in tmp_path.rglob("*.json"))
+    assert cache._size == on_disk
+
+    # A second instance stands in for another --workers process on the same directory.
+    monkeypatch.setattr("text_chunker.cache._RESCAN_SECONDS", 0.0)
+    other = ChunkCache(tmp_path, max_bytes=3500)
+    other.put(ChunkCache.key("a", {}), payload)
+    other.put(ChunkCache.key("b", {}), payload)
+    cache.put(ChunkCache.key("c", {}), payload)
+    assert sum(p.stat().st_size for p in tmp_path.rglob("*.json")) <= 3500
@@ -1,4 +1,38 @@
-from text_chunker.chunker import chunk_text
+import re
+
+import pytest
+
+from text_chunker import strategies
+from text_chunker.chunker import chunk_stream, chunk_text
+from text_chunker.utils import Segment, count_tokens, tail_tokens
+
+SAMPLE = (
+    "# Intro\n\nThe quick brown fox jumps over the lazy dog. It's 2024! Is it? Yes...\n\n"
+    "## Details\n\nLorem ipsum dolor sit amet, consectetur adipiscing elit.\n"
+    "Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.\n\n"
+) * 12
+
+
+def _naive_offsets(text: str, strategy: str, max_tokens: int) -> list:
+    # Reference packing: re-encode the whole candidate text for every segment.
+    if strategy == "token":
+        segments = [
+            Segment(text=m.group(0), start=m.start(), end=m.end(), boundary_type="token")
+            for m in re.finditer(r"\S+\s*", text)
+        ]
+    else:
+        segments = getattr(strategies, f"by_{strategy}")(text)
+    offsets, current = [], []
+    for seg in segments:
+        candidate = current + [seg]
+        if count_tokens("".join(s.text for s in candidate), "cl100k_base") > max_tokens and current:
+            offsets.append((current[0].start, current[-1].end))
+            current = [seg]
+        else:
+            current = candidate
+    if current:
+        offsets.append((current[0].start, current[-1].end))
+    return offsets
 
 
 def test_chunk_text_basic() -> None:
@@ -11,3 +45,78 @@ def test_empty_input() -> None:
     payload = chunk_text("", max_tokens=100)
     assert payload["chunks"] == []
     assert payload["metadata"]["total_chunks"] == 0
+
+
+@pytest.mark.parametrize("strategy", ["token", "sentence", "paragraph", "semantic"])
+def test_packing_matches_full_reencode(strategy: str) -> None:
+    payload = chunk_text(SAMPLE, max_tokens=120, strategy=strategy)
+    offsets = [(c["start_offset"], c["end_offset"]) for c in payload["chunks"]]
+    assert offsets == _naive_offsets(SAMPLE, strategy, 120)
+    for chunk in payload["chunks"]:
+        assert chunk["tokens"] == count_tokens(chunk["text"], "cl100k_base")
+
+
+@pytest.mark.parametrize("strategy", ["character", "token", "sentence"])
+def test_overlapped_chunks_count_tokens_exactly(strategy: str) -> None:
+    # Long letter runs are single pre-tokenizer pieces, so merges span the joins.
+    text = " ".join("thequickbrownfox" * (i % 7 + 1) for i in range(60))
+    chunks = chunk_text(text, max_tokens=20, overlap=6, strategy=strategy, max_chars=90)["chunks"]
+    assert all(c["tokens"] == count_tokens(c["text"], "cl100k_base") for c in chunks)
+
+
+@pytest.mark.parametrize("strategy", ["token", "sentence"])
+def test_overlap_matches_stream_and_previous_chunk_tail(strategy: str) -> None:
+    text = " ".join("thequickbrownfox" * (i % 7 + 1) + "." for i in range(60))
+    plain = chunk_text(text, max_tokens=20, strategy=strategy)["chunks"]
+    overlapped = chunk_text(text, max_tokens=20, overlap=6, strategy=strategy)["chunks"]
+    pieces = (text[i : i + 37] for i in range(0, len(text), 37))
+    assert list(chunk_stream(pieces, max_tokens=20, overlap=6, strategy=strategy)) == overlapped
+    # Each prefix is the last tokens of the whole previous chunk, overlap included.
+    previous = ""
+    for before, after in zip(plain, overlapped):
+        previous = tail_tokens(previous, 6, "cl100k_base") + before["text"]
+        assert after["text"] == previous
+
+
+@pytest.mark.parametrize("strategy", ["character", "token", "sentence", "paragraph", "semantic"])
+@pytest.mark.parametrize("preamble", ["", "Text before any heading.\n\nA second paragraph.\n\n"])
+def test_chunk_stream_matches_chunk_text(strategy: str, preamble: str) -> None:
+    text = preamble + SAMPLE
+    pieces = (text[i : i + 37] for i in range(0, len(text), 37))
+    streamed = list(chunk_stream(pieces, max_tokens=60, overlap=5, strategy=strategy))
+    expected = chunk_text(text, max_tokens=60, overlap=5, strategy=strategy)["chunks"]
+    assert streamed == expected
+    assert expected[0]["text"].startswith(text[:4])
+
+
+@pytest.mark.parametrize("strategy", ["character", "token", "sentence", "semantic"])
+def test_compact_result_matches_dicts(strategy: str, tmp_path) -> None:
+    import json
+
+    from click.testing import CliRunner
+
+    from text_chunker.cli import main
+
+    params = dict(max_tokens=40, overlap=5, strategy=strategy, max_chars=300)
+    expected = chunk_text(SAMPLE, **params)
+    compact = chunk_text(SAMPLE, compact=True, **params)
+    assert list(compact["chunks"]) == expected["chunks"]
+    assert compact["chunks"][-1] == expected["chunks"][-1]
+
+    source = tmp_path / "doc.md"
+    source.write_text(SAMPLE, encoding="utf-8")
+    args = [str(source), "--max-tokens", "40", "--overlap", "5", "--strategy", strategy]
+    result = CliRunner().invoke(main, args + ["--max-chars", "300"])
+    assert result.exit_code == 0, result.output
+    assert result.output == json.dumps(expected, ensure_ascii=False, indent=2) + "\n"
+
+
+def test_run_on_line_is_cut_into_full_chunks() -> None:
+    line = ",".join(f'{{"id":{i},"name":"item{i}","tags":["a","bb"]}}' for i in range(400))
+    payload = chunk_text(line, max_tokens=50, strategy="sentence")
+    chunks = payload["chunks"]
+    assert "".join(c["text"] for c in chunks) == line
+    assert all(c["tokens"] == count_tokens(c["text"], "cl100k_base") <= 50 for c in chunks)
+    assert sum(c["tokens"] for c in chunks[:-1]) >= 0.9 * 50 * (len(chunks) - 1)
+    pieces = (line[i : i + 101] for i in range(0, len(line), 101))
+    assert list(chunk_stream(pieces, max_tokens=50, strategy="sentence")) == chunks
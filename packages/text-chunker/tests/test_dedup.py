@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from text_chunker.batch import chunk_files, output_path
+from text_chunker.chunker import chunk_text
+from text_chunker.dedup import DedupIndex, signature, similarity
+from text_chunker.utils import count_tokens
+
+PARAGRAPHS = [
+    "Retrieval quality depends on how documents are split into chunks before embedding.",
+    "The packer closes a chunk once adding the next segment would exceed the token budget.",
+    "Overlap repeats the tail of the previous chunk so context survives the boundary.",
+]
+BOILERPLATE = "This page is licensed under the Creative Commons Attribution 4.0 license."
+# One paragraph per chunk.
+BUDGET = max(count_tokens(p, "cl100k_base") for p in [*PARAGRAPHS, BOILERPLATE]) + 2
+
+
+def test_near_duplicates_are_dropped_or_flagged() -> None:
+    tweaked = BOILERPLATE.replace("This page", "This Page").replace("license.", "license!")
+    assert similarity(signature(BOILERPLATE), signature(tweaked)) >= 0.8
+    assert similarity(signature(PARAGRAPHS[0]), signature(PARAGRAPHS[1])) < 0.3
+    text = "\n\n".join([PARAGRAPHS[0], BOILERPLATE, PARAGRAPHS[1], tweaked, PARAGRAPHS[2]])
+    params = dict(max_tokens=BUDGET, strategy="paragraph")
+
+    plain = chunk_text(text, **params)
+    dropped = chunk_text(text, dedup_threshold=0.8, compact=True, **params)
+    assert [c["index"] for c in dropped["chunks"]] == [0, 1, 2, 4]
+    assert dropped["chunks"][3] == plain["chunks"][4]
+    stats = dropped["metadata"]["dedup"]
+    assert stats["duplicate_chunks"] == 1
+    assert stats["duplicate_tokens"] == plain["chunks"][3]["tokens"]
+    assert dropped["metadata"]["total_tokens"] == (
+        plain["metadata"]["total_tokens"] - stats["duplicate_tokens"]
+    )
+
+    flagged = chunk_text(text, dedup_threshold=0.8, dedup_mode="flag", **params)
+    assert len(flagged["chunks"]) == 5
+    assert flagged["chunks"][3]["duplicate_of"] == {"index": 1}
+    assert flagged["metadata"]["total_chunks"] == 5
+
+
+def test_batch_dedup_spans_documents_with_bounded_index(tmp_path: Path) -> None:
+    paths = []
+    for i, paragraph in enumerate(PARAGRAPHS):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(f"{paragraph}\n\n{BOILERPLATE}", encoding="utf-8")
+        paths.append(path)
+    params = dict(max_tokens=BUDGET, strategy="paragraph", dedup_threshold=0.8)
+    results = list(chunk_files(paths, workers=2, **params))
+    assert [len(r.chunks) for r in results] == [2, 1, 1]
+    assert [r.dedup.chunks for r in results] == [0, 1, 1]
+
+    out = tmp_path / "out"
+    list(chunk_files(paths, workers=2, output_dir=out, dedup_mode="flag", **params))
+    lines = output_path(out, paths[2]).read_text(encoding="utf-8").splitlines()
+    assert f'"duplicate_of": {{"index": 1, "source": "{paths[0]}"}}' in lines[1]
+
+    index = DedupIndex(0.8, capacity=2)
+    for i, paragraph in enumerate(PARAGRAPHS):
+        index.check(signature(paragraph), i)
+    assert len(index) == 2
+    assert index.find(signature(PARAGRAPHS[0])) is None
+    assert index.find(signature(PARAGRAPHS[2])) == 2
@@ -0,0 +1,60 @@
+import json
+import threading
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from text_chunker.chunker import chunk_text
+from text_chunker.cli import main
+from text_chunker.server import _connection, close_server, make_server, request_chunks
+
+TEXT = "Resident servers keep encodings warm. Each request is chunked on a worker. " * 30
+
+
+def test_server_matches_in_process_chunking(tmp_path: Path) -> None:
+    socket_path = tmp_path / "chunker.sock"
+    server = make_server(socket_path=socket_path, workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        payload = request_chunks(str(socket_path), TEXT, max_tokens=40, overlap=4)
+        assert payload == chunk_text(TEXT, max_tokens=40, overlap=4)
+
+        source = tmp_path / "doc.txt"
+        source.write_text(TEXT, encoding="utf-8")
+        args = [str(source), "--max-tokens", "40", "--format", "jsonl"]
+        remote = CliRunner().invoke(main, args + ["--server", str(socket_path)])
+        local = CliRunner().invoke(main, args)
+        assert remote.exit_code == 0, remote.output
+        assert remote.output == local.output
+    finally:
+        server.shutdown()
+        close_server(server)
+    assert not socket_path.exists()
+
+
+def test_client_falls_back_without_server(tmp_path: Path) -> None:
+    assert request_chunks(str(tmp_path / "missing.sock"), TEXT) is None
+    source = tmp_path / "doc.txt"
+    source.write_text(TEXT, encoding="utf-8")
+    result = CliRunner().invoke(main, [str(source), "--server", "127.0.0.1:9"])
+    assert result.exit_code == 0, result.output
+    assert result.output == CliRunner().invoke(main, [str(source)]).output
+
+
+def test_server_rejects_bad_bodies_and_client_paths(tmp_path: Path) -> None:
+    socket_path = tmp_path / "chunker.sock"
+    server = make_server(socket_path=socket_path, workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        for body in (["text"], "text", {"text": TEXT, "cache_dir": str(tmp_path / "c")}):
+            connection = _connection(str(socket_path))
+            connection.request("POST", "/chunk", body=json.dumps(body))
+            response = connection.getresponse()
+            assert response.status == 400, response.read()
+            connection.close()
+        assert not (tmp_path / "c").exists()
+    finally:
+        server.shutdown()
+        close_server(server)
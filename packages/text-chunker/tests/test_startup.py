@@ -0,0 +1,75 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import text_chunker
+from text_chunker.chunker import chunk_text
+
+# Seconds `text-chunker --help` may spend importing and running the CLI, measured
+# inside a fresh interpreter; generous next to the ~50ms it takes locally.
+HELP_BUDGET_SECONDS = 0.25
+# Modules that only the work itself needs; loading them at startup is a regression.
+DEFERRED_MODULES = ("tiktoken", "text_chunker.chunker", "concurrent.futures", "http.client")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from text_chunker.cli import main
+try:
+    main(["--help"])
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - started
+loaded = [name for name in %r if name in sys.modules]
+from text_chunker.chunker import chunk_text
+chunk_text("Estimated counts need no tokenizer. " * 40, max_tokens=20, encoding="chars")
+print(json.dumps({"seconds": elapsed, "loaded": loaded, "tiktoken": "tiktoken" in sys.modules}))
+"""
+
+
+def test_help_stays_within_import_budget() -> None:
+    src = str(Path(text_chunker.__file__).parents[1])
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE % (DEFERRED_MODULES,)],
+        capture_output=True,
+        text=True,
+        env={"PYTHONPATH": src},
+        check=True,
+    )
+    probe = json.loads(result.stdout.splitlines()[-1])
+    assert probe["loaded"] == []
+    assert not probe["tiktoken"]
+    assert probe["seconds"] < HELP_BUDGET_SECONDS
+
+
+def test_character_estimate_packs_by_length() -> None:
+    text = "Estimates trade accuracy for latency." + " Estimates trade accuracy for latency." * 49
+    params = dict(max_tokens=30, encoding="chars")
+    for strategy in ("sentence", "paragraph", "token"):
+        chunks = chunk_text(text, strategy=strategy, **params)["chunks"]
+        assert "".join(c["text"] for c in chunks) == text
+        assert all(c["tokens"] == -(-c["characters"] // 4) <= 30 for c in chunks)
+        assert chunks[0]["tokens"] >= 25
+
+    overlapped = chunk_text(text, strategy="token", overlap=3, **params)["chunks"]
+    first, second = overlapped[:2]
+    assert second["text"] == first["text"][-12:] + chunks[1]["text"]
+    assert second["tokens"] == -(-second["characters"] // 4)
+
+
+def test_help_lists_commands_and_chunk_takes_command_named_files(tmp_path: Path) -> None:
+    from click.testing import CliRunner
+
+    from text_chunker.cli import main
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["--help"])
+    assert result.exit_code == 0
+    assert all(name in result.output for name in ("chunk", "serve", "bench"))
+
+    with runner.isolated_filesystem(temp_dir=tmp_path) as cwd:
+        Path(cwd, "serve").write_text("A file named like a command.", encoding="utf-8")
+        result = runner.invoke(main, ["chunk", "serve", "--format", "jsonl"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["text"] == "A file named like a command."
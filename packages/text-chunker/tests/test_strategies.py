@@ -1,4 +1,9 @@
-from text_chunker.strategies import by_paragraph, by_sentence
+import types
+from pathlib import Path
+
+from text_chunker import strategies
+from text_chunker.chunker import chunk_file, chunk_text
+from text_chunker.strategies import by_paragraph, by_sentence, stream_segments
 
 
 def test_sentence_strategy() -> None:
@@ -9,3 +14,26 @@ def test_sentence_strategy() -> None:
 def test_paragraph_strategy() -> None:
     segments = by_paragraph("Para1\n\nPara2")
     assert len(segments) == 2
+
+
+def test_stream_segments_across_buffer_boundaries() -> None:
+    text = "One. Two!\n\nThree?\n\n\nFour"
+    for strategy, batch in (("sentence", by_sentence), ("paragraph", by_paragraph)):
+        pieces = [text[i : i + 3] for i in range(0, len(text), 3)]
+        assert list(stream_segments(pieces, strategy, 1000, 0)) == batch(text)
+
+
+def test_lazy_strategies_and_mapped_files(tmp_path: Path) -> None:
+    text = "Intro line.\n\n# One\n\nFirst. Second!\n\n## Two\n\n\n  \nThird?\n"
+    for name in ("sentence", "paragraph", "semantic"):
+        by = getattr(strategies, f"by_{name}")
+        lazy = by(text, lazy=True)
+        assert isinstance(lazy, types.GeneratorType)
+        assert list(lazy) == by(text)
+
+    source = tmp_path / "doc.md"
+    source.write_bytes(text.replace("\n", "\r\n").encode("utf-8"))
+    mapped = chunk_file(source, max_tokens=8, overlap=2)
+    assert list(mapped["chunks"]) == chunk_text(text, max_tokens=8, overlap=2)["chunks"]
+    (tmp_path / "empty.txt").write_bytes(b"")
+    assert chunk_file(tmp_path / "empty.txt")["chunks"] == []
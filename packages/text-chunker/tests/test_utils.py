@@ -0,0 +1,28 @@
+from text_chunker import utils
+from text_chunker.utils import TokenIndex, count_tokens, count_tokens_many
+
+
+def test_token_index_counts_and_tails() -> None:
+    text = (
+        "Héllo wörld. Tokens are counted once.\n\nAnother ✓ paragraph with plain words at the end."
+    )
+    index = TokenIndex(text, "cl100k_base")
+    assert len(index) == count_tokens(text, "cl100k_base")
+    assert index.count(0, len(text)) == len(index)
+    assert index.count(5, 5) == 0
+    start = index.tail_start(len(text), 3)
+    assert index.count(start, len(text)) == 3
+    assert index.tail_start(len(text), 10_000) == 0
+
+
+def test_batched_counts_match_single_encodes(monkeypatch) -> None:
+    texts = ["", "Hello world.", "Héllo wörld ✓", "Paragraph one.\n\n  Paragraph two."]
+    assert count_tokens_many(texts, "cl100k_base", num_threads=2) == [
+        count_tokens(text, "cl100k_base") for text in texts
+    ]
+    text = "Short paragraph ✓ here.\n\n\n Another one follows.\n\n" * 40
+    whole = TokenIndex(text, "cl100k_base")
+    monkeypatch.setattr(utils, "_INDEX_PIECE_CHARS", 64)
+    assert len(utils._index_pieces(text, "cl100k_base")) > 1
+    assert utils._index_pieces(text, "r50k_base") == [text]
+    assert TokenIndex(text, "cl100k_base", num_threads=2).offsets == whole.offsets
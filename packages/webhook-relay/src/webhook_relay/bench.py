@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from itertools import product
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .forwarding import DeliverySettings
+from .server import create_app
+
+MODES = ("inprocess", "uvicorn")
+STORES = ("memory", "file")
+SIGNATURES = ("none", "github", "shopify", "stripe", "generic")
+# ``inline`` waits for the target before acknowledging; ``queued`` is --queue-forwarding.
+FORWARDS = ("off", "inline", "queued")
+SECRET = "bench-secret"
+WEBHOOK_PATH = "/bench/hook"
+# Seconds to wait for the relay to store (and deliver) what it acknowledged.
+DRAIN_TIMEOUT = 60.0
+# Bumped when result records change shape, so old baselines are not misread.
+RESULTS_VERSION = 1
+
+
+def synthetic_body(size: int, seed: int = 0) -> bytes:
+    """Deterministic JSON-like webhook body of exactly ``size`` bytes.
+
+    Order line items with random ids, so it compresses about as well as real
+    webhook JSON.
+    """
+    rng = random.Random(f"body:{seed}")
+    parts = ['{"event":"order.paid","items":[']
+    length = len(parts[0])
+    while length < size:
+        part = (
+            f'{{"id":{rng.randrange(10**6)},"sku":"{rng.getrandbits(32):08x}",'
+            f'"qty":{rng.randint(1, 9)},"status":"{rng.choice(("paid", "pending", "refunded"))}"}},'
+        )
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size].encode()
+
+
+def signed_headers(provider: str, body: bytes, secret: str = SECRET) -> Dict[str, str]:
+    """Headers carrying a valid ``provider`` signature of ``body``."""
+    headers = {"content-type": "application/json"}
+    digest = hmac.new(secret.encode(), body, hashlib.sha256)
+    if provider == "github":
+        headers["x-hub-signature-256"] = "sha256=" + digest.hexdigest()
+    elif provider == "shopify":
+        headers["x-shopify-hmac-sha256"] = base64.b64encode(digest.digest()).decode()
+    elif provider == "stripe":
+        timestamp = str(int(time.time()))
+        payload = f"{timestamp}.{body.decode('utf-8', errors='ignore')}".encode()
+        signature = hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+        headers["stripe-signature"] = f"t={timestamp},v1={signature}"
+    elif provider == "generic":
+        headers["x-signature-256"] = digest.hexdigest()
+    return headers
+
+
+@dataclass
+class BenchResult:
+    mode: str
+    store: str
+    body_size: int
+    signature: str
+    forward: str
+    subscribers: int
+    requests: int
+    concurrency: int
+    errors: int
+    seconds: float
+    p50_ms: float
+    p99_ms: float
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / max(self.seconds, 1e-9)
+
+    @property
+    def case(self) -> str:
+        """Identifies the scenario, for matching against a baseline."""
+        return (
+            f"{self.mode}/{self.store}/body={self.body_size}/sig={self.signature}"
+            f"/forward={self.forward}/ws={self.subscribers}"
+        )
+
+    def record(self) -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            "case": self.case,
+            "requests_per_second": round(self.requests_per_second, 1),
+        }
+
+
+@dataclass
+class Comparison:
+    case: str
+    baseline_rps: float
+    rps: float
+    baseline_p99_ms: float
+    p99_ms: float
+    regressed: bool
+
+
+def results_document(results: Sequence[BenchResult], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """The JSON saved by ``bench --output`` and read back by ``--compare``."""
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": settings,
+        "results": [result.record() for result in results],
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], results: Sequence[BenchResult], tolerance: float = 0.1
+) -> List[Comparison]:
+    """Match ``results`` to the cases in a saved ``baseline`` document.
+
+    A case regressed when its throughput fell, or its p99 latency rose, by more
+    than ``tolerance`` (a fraction). Cases missing from the baseline are skipped.
+    """
+    if baseline.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Baseline is not a version {RESULTS_VERSION} results file")
+    previous = {record["case"]: record for record in baseline["results"]}
+    comparisons = []
+    for result in results:
+        before = previous.get(result.case)
+        if before is None:
+            continue
+        regressed = result.requests_per_second < before["requests_per_second"] * (
+            1 - tolerance
+        ) or result.p99_ms > before["p99_ms"] * (1 + tolerance)
+        comparisons.append(
+            Comparison(
+                case=result.case,
+                baseline_rps=before["requests_per_second"],
+                rps=round(result.requests_per_second, 1),
+                baseline_p99_ms=before["p99_ms"],
+                p99_ms=result.p99_ms,
+                regressed=regressed,
+            )
+        )
+    return comparisons
+
+
+def run_benchmarks(
+    *,
+    modes: Sequence[str] = ("inprocess",),
+    stores: Sequence[str] = ("file",),
+    body_sizes: Sequence[int] = (256, 16384),
+    signatures: Sequence[str] = ("none", "github"),
+    forwards: Sequence[str] = FORWARDS,
+    subscribers: Sequence[int] = (0, 100),
+    requests: int = 2000,
+    concurrency: int = 32,
+    warmup: int = 200,
+    capacity: int = 1000,
+    stub_delay: float = 0.0,
+    seed: int = 0,
+) -> Iterator[BenchResult]:
+    """Load a fresh relay for every mode x store x body size x signature x forward x subscribers.
+
+    Each case sends ``warmup`` unmeasured requests, then ``requests`` more from
+    ``concurrency`` clients. ``seconds`` runs until the relay has stored (and,
+    when queued, forwarded) every measured request, so it is sustained rather
+    than acknowledged throughput. Latencies are to the relay's acknowledgement.
+    Forwarding goes to a stub HTTP server in its own process that answers 200
+    after ``stub_delay`` seconds.
+    """
+    stub: Optional[multiprocessing.process.BaseProcess] = None
+    stub_url: Optional[str] = None
+    if any(forward != "off" for forward in forwards):
+        port = _free_port()
+        stub = _start(_serve_stub, port, stub_delay)
+        stub_url = f"http://127.0.0.1:{port}"
+    try:
+        for mode, store, size, signature, forward, clients in product(
+            modes, stores, body_sizes, signatures, forwards, subscribers
+        ):
+            body = synthetic_body(size, seed)
+            headers = signed_headers(signature, body)
+            with tempfile.TemporaryDirectory(prefix="webhook-relay-bench-") as tmp:
+                config: Dict[str, Any] = {
+                    "forward_url": stub_url if forward != "off" else None,
+                    "storage_path": Path(tmp) / "relay.db" if store == "file" else None,
+                    "signature_provider": None if signature == "none" else signature,
+                    "secret": SECRET,
+                    "capacity": capacity,
+                    "delivery_settings": DeliverySettings() if forward == "queued" else None,
+                }
+                load = _Load(body, headers, requests, concurrency, warmup)
+                if mode == "inprocess":
+                    measured = asyncio.run(_run_inprocess(config, clients, load))
+                else:
+                    measured = _run_uvicorn(config, clients, load)
+            latencies, errors, seconds = measured
+            yield BenchResult(
+                mode=mode,
+                store=store,
+                body_size=size,
+                signature=signature,
+                forward=forward,
+                subscribers=clients,
+                requests=requests,
+                concurrency=concurrency,
+                errors=errors,
+                seconds=round(seconds, 4),
+                p50_ms=_percentile_ms(latencies, 0.5),
+                p99_ms=_percentile_ms(latencies, 0.99),
+            )
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.join()
+
+
+@dataclass
+class _Load:
+    body: bytes
+    headers: Dict[str, str]
+    requests: int
+    concurrency: int
+    warmup: int
+
+
+class _NullSocket:
+    """Stands in for a UI WebSocket client that keeps up with every event."""
+
+    async def send_text(self, message: str) -> None:
+        pass
+
+
+async def _run_inprocess(
+    config: Dict[str, Any], subscribers: int, load: _Load
+) -> Tuple[List[float], int, float]:
+    app = create_app(**config)
+    async with app.router.lifespan_context(app):
+        for _ in range(subscribers):
+            app.state.hub.subscribe(_NullSocket())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://relay") as client:
+            return await _measure(client, load)
+
+
+def _run_uvicorn(
+    config: Dict[str, Any], subscribers: int, load: _Load
+) -> Tuple[List[float], int, float]:
+    port = _free_port()
+    relay = _start(_serve_relay, port, config)
+    try:
+        return asyncio.run(_drive_server(port, subscribers, load))
+    finally:
+        relay.terminate()
+        relay.join()
+
+
+async def _drive_server(port: int, subscribers: int, load: _Load) -> Tuple[List[float], int, float]:
+    sockets: list = []
+    readers: List[asyncio.Task] = []
+    if subscribers:
+        try:
+            import websockets
+        except ImportError as exc:
+            raise RuntimeError(
+                "WebSocket subscribers in uvicorn mode need the websockets package"
+            ) from exc
+        for _ in range(subscribers):
+            connection = await websockets.connect(f"ws://127.0.0.1:{port}/_relay/ws")
+            sockets.append(connection)
+            readers.append(asyncio.create_task(_discard(connection)))
+    limits = httpx.Limits(max_connections=load.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30.0
+        ) as client:
+            return await _measure(client, load)
+    finally:
+        for task in readers:
+            task.cancel()
+        for connection in sockets:
+            await connection.close()
+
+
+async def _discard(connection: Any) -> None:
+    async for _ in connection:
+        pass
+
+
+async def _measure(client: httpx.AsyncClient, load: _Load) -> Tuple[List[float], int, float]:
+    await _send(client, load, load.warmup)
+    await _drain(client)
+    started = time.perf_counter()
+    latencies, errors = await _send(client, load, load.requests)
+    await _drain(client)
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _send(client: httpx.AsyncClient, load: _Load, count: int) -> Tuple[List[float], int]:
+    latencies: List[float] = []
+    errors = 0
+    sent = 0
+
+    async def worker() -> None:
+        nonlocal errors, sent
+        while sent < count:
+            sent += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(WEBHOOK_PATH, content=load.body, headers=load.headers)
+                ok = response.status_code == 200 and response.json()["signature_valid"] is not False
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(load.concurrency, count)))))
+    return latencies, errors
+
+
+async def _drain(client: httpx.AsyncClient) -> None:
+    # Wait until the writer and delivery queues are empty and no send is in flight.
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while True:
+        stats = (await client.get("/_relay/metrics", params={"format": "json"})).json()
+        queues = stats["queues"]
+        forwarding = (stats["forward"] or {}).get("in_flight", 0)
+        if not queues["write"] and not queues["delivery"] and not forwarding:
+            return
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"The relay still had queued work after {DRAIN_TIMEOUT:.0f}s")
+        await asyncio.sleep(0.005)
+
+
+def _percentile_ms(latencies: List[float], fraction: float) -> float:
+    if not latencies:
+        return 0.0
+    ordered = sorted(latencies)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start(
+    target: Callable[..., None], port: int, *args: Any
+) -> multiprocessing.process.BaseProcess:
+    # Spawned, not forked, so the child starts without the parent's threads or loop.
+    process = multiprocessing.get_context("spawn").Process(
+        target=target, args=(port, *args), daemon=True
+    )
+    process.start()
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            if not process.is_alive() or time.monotonic() > deadline:
+                process.terminate()
+                raise RuntimeError(f"{target.__name__} did not start listening on port {port}")
+            time.sleep(0.05)
+
+
+def _serve_relay(port: int, config: Dict[str, Any]) -> None:
+    import uvicorn
+
+    uvicorn.run(create_app(**config), host="127.0.0.1", port=port, log_level="warning")
+
+
+def _serve_stub(port: int, delay: float) -> None:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Minimal HTTP/1.1 keep-alive target: read a request, answer 200.
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(b"HTTP/1.1 200 OK\r\ncontent-length: 2\r\n\r\nok")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
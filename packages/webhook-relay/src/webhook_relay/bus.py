@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Bytes buffered for a bus peer before its events are dropped. UI events are
+# only a cue to refresh, so a lagging peer loses some instead of stalling others.
+MAX_PEER_BUFFER = 1024 * 1024
+# Longest event line, newline included. Longer lines are skipped, not relayed.
+MAX_EVENT_LINE = 1024 * 1024
+# Seconds between attempts to reach a lost broker, doubling up to the maximum.
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 10.0
+
+
+async def _lines(reader: asyncio.StreamReader) -> AsyncIterator[bytes]:
+    """Lines from ``reader`` until EOF, skipping those over its limit."""
+    oversized = False
+    while True:
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError:
+            return
+        except asyncio.LimitOverrunError as exc:
+            # Discard what is buffered; the line's remainder ends at the next newline.
+            await reader.readexactly(exc.consumed)
+            oversized = True
+            continue
+        if oversized:
+            oversized = False
+            logger.warning("Skipped an event line over %d bytes", MAX_EVENT_LINE)
+            continue
+        yield line
+
+
+class EventBroker:
+    """Relays event lines between the worker processes of one relay.
+
+    Runs in the parent process on a Unix socket, in a thread with its own event
+    loop. Each line a worker writes is passed on to every other worker.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        self.path.unlink(missing_ok=True)
+        self._thread = threading.Thread(target=self._serve, name="relay-bus", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.path.unlink(missing_ok=True)
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_unix_server(self._handle, path=str(self.path), limit=MAX_EVENT_LINE)
+        )
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _shutdown(self) -> None:
+        # Closing the peers tells their workers to reconnect.
+        assert self._server is not None
+        self._server.close()
+        for peer in self._peers:
+            peer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._handlers.add(task)
+        self._peers.add(writer)
+        try:
+            async for line in _lines(reader):
+                for peer in self._peers:
+                    if peer is writer:
+                        continue
+                    if peer.transport.get_write_buffer_size() < MAX_PEER_BUFFER:
+                        peer.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            self._peers.discard(writer)
+            self._handlers.discard(task)
+            writer.close()
+
+
+class EventBus:
+    """A worker's connection to the ``EventBroker``.
+
+    ``publish`` sends one serialized event (no newlines) to the other workers
+    without waiting; events they publish are passed to ``on_event``. Events
+    published while the broker is unreachable are dropped, and the bus keeps
+    reconnecting until ``close``.
+    """
+
+    def __init__(self, path: Path, on_event: Callable[[str], None]) -> None:
+        self.path = path
+        self.on_event = on_event
+        self.dropped = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        reader = await self._open()
+        self._task = asyncio.create_task(self._receive(reader))
+
+    def publish(self, message: str) -> None:
+        if self._writer is None or self._writer.is_closing():
+            return
+        if (
+            len(message) >= MAX_EVENT_LINE
+            or self._writer.transport.get_write_buffer_size() >= MAX_PEER_BUFFER
+        ):
+            self.dropped += 1
+            return
+        self._writer.write(message.encode() + b"\n")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._writer is not None:
+            self._writer.close()
+
+    async def _open(self) -> asyncio.StreamReader:
+        reader, self._writer = await asyncio.open_unix_connection(
+            str(self.path), limit=MAX_EVENT_LINE
+        )
+        return reader
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            try:
+                async for line in _lines(reader):
+                    self.on_event(line.decode().rstrip("\n"))
+            except ConnectionError:
+                pass
+            if self._writer is not None:
+                self._writer.close()
+            logger.warning("Lost the event bus; reconnecting")
+            delay = RECONNECT_DELAY
+            while True:
+                await asyncio.sleep(delay)
+                try:
+                    reader = await self._open()
+                except OSError:
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                    continue
+                logger.info("Reconnected to the event bus")
+                break
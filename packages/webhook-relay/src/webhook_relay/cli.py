@@ -1,14 +1,59 @@
 from __future__ import annotations
 
+import json
+import os
+import tempfile
+import uuid
+from dataclasses import asdict
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import click
+import httpx
 import uvicorn
 
-from .server import create_app
+from .bench import (
+    FORWARDS,
+    MODES,
+    SIGNATURES,
+    STORES,
+    compare,
+    results_document,
+    run_benchmarks,
+)
+from .bus import EventBroker
+from .forwarding import DeliverySettings, ForwardSettings
+from .replay import ORDERS
+from .server import CONFIG_ENV, create_app
+from .storage import (
+    DEFAULT_BATCH_DELAY,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_COMPRESS_THRESHOLD,
+    DEFAULT_SPILL_THRESHOLD,
+)
 
 
-@click.command()
+class _DefaultGroup(click.Group):
+    """Runs the ``serve`` command unless the first argument names another one.
+
+    ``--help`` still goes to the group, so it lists every command.
+    """
+
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = ["serve", *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultGroup)
+def main() -> None:
+    """Receive, inspect, and replay webhooks locally.
+
+    Without a command, options go to `serve`.
+    """
+
+
+@main.command("serve")
 @click.option("--port", default=8080, show_default=True, type=int)
 @click.option("--forward", "forward_url", default=None)
 @click.option("--storage", type=click.Path(path_type=Path), default=None)
@@ -16,7 +61,90 @@ from .server import create_app
 @click.option("--validate-signature", "signature_provider", default=None)
 @click.option("--secret", default=None)
 @click.option("--capacity", default=1000, show_default=True, type=int)
-def main(
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Server processes sharing the --storage database.",
+)
+@click.option(
+    "--write-batch-size",
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    type=int,
+    help="Captured requests committed together by the background writer.",
+)
+@click.option(
+    "--write-batch-ms",
+    default=DEFAULT_BATCH_DELAY * 1000,
+    show_default=True,
+    type=float,
+    help="Longest a captured request waits for its batch to fill before commit.",
+)
+@click.option(
+    "--compress-over",
+    default=DEFAULT_COMPRESS_THRESHOLD,
+    show_default=True,
+    type=int,
+    help="Bodies larger than this many bytes are stored compressed.",
+)
+@click.option(
+    "--spill-over",
+    default=DEFAULT_SPILL_THRESHOLD,
+    show_default=True,
+    type=int,
+    help="With --storage, bodies larger than this many bytes are kept in files.",
+)
+@click.option(
+    "--forward-timeout",
+    default=ForwardSettings.timeout,
+    show_default=True,
+    type=float,
+    help="Seconds before a forwarded request times out.",
+)
+@click.option(
+    "--forward-max-connections",
+    default=ForwardSettings.max_connections,
+    show_default=True,
+    type=int,
+    help="Concurrent connections to the --forward target.",
+)
+@click.option(
+    "--forward-keepalive",
+    default=ForwardSettings.max_keepalive,
+    show_default=True,
+    type=int,
+    help="Idle connections kept open to the --forward target.",
+)
+@click.option("--http2", is_flag=True, help="Forward over HTTP/2 (needs webhook-relay[http2]).")
+@click.option(
+    "--queue-forwarding",
+    is_flag=True,
+    help="Acknowledge webhooks at once and forward them from a durable background queue.",
+)
+@click.option(
+    "--forward-workers",
+    default=DeliverySettings.workers,
+    show_default=True,
+    type=int,
+    help="Concurrent deliveries with --queue-forwarding.",
+)
+@click.option(
+    "--forward-attempts",
+    default=DeliverySettings.max_attempts,
+    show_default=True,
+    type=int,
+    help="Sends per request before a queued delivery gives up.",
+)
+@click.option(
+    "--forward-backoff",
+    default=DeliverySettings.backoff,
+    show_default=True,
+    type=float,
+    help="Seconds before the first retry; doubles on each further retry.",
+)
+def serve(
     port: int,
     forward_url: str | None,
     storage: Path | None,
@@ -24,21 +152,343 @@ def main(
     signature_provider: str | None,
     secret: str | None,
     capacity: int,
+    workers: int,
+    write_batch_size: int,
+    write_batch_ms: float,
+    compress_over: int,
+    spill_over: int,
+    forward_timeout: float,
+    forward_max_connections: int,
+    forward_keepalive: int,
+    http2: bool,
+    queue_forwarding: bool,
+    forward_workers: int,
+    forward_attempts: int,
+    forward_backoff: float,
 ) -> None:
-    """Run a local webhook receiver with request inspection endpoints."""
+    """Run a local webhook receiver with request inspection endpoints.
+
+    `webhook-relay replay` re-sends stored requests in bulk through a running relay.
+    """
     # A single FastAPI app serves receiver + UI.
     effective_port = ui_port if ui_port != 8080 and port == 8080 else port
+    delivery_settings = None
+    if queue_forwarding:
+        delivery_settings = DeliverySettings(
+            workers=forward_workers, max_attempts=forward_attempts, backoff=forward_backoff
+        )
+    config = dict(
+        forward_url=forward_url,
+        storage_path=storage,
+        signature_provider=signature_provider,
+        secret=secret,
+        capacity=capacity,
+        write_batch_size=write_batch_size,
+        write_batch_delay=write_batch_ms / 1000,
+        compress_threshold=compress_over,
+        spill_threshold=spill_over,
+        forward_settings=ForwardSettings(
+            timeout=forward_timeout,
+            max_connections=forward_max_connections,
+            max_keepalive=forward_keepalive,
+            http2=http2,
+        ),
+        delivery_settings=delivery_settings,
+    )
     try:
-        app = create_app(
-            forward_url=forward_url,
-            storage_path=storage,
-            signature_provider=signature_provider,
-            secret=secret,
-            capacity=capacity,
+        if workers == 1:
+            uvicorn.run(create_app(**config), host="127.0.0.1", port=effective_port)
+        else:
+            _serve_workers(config, workers, effective_port)
+    except click.ClickException:
+        raise
+    except Exception as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
+def _serve_workers(config: Dict[str, Any], workers: int, port: int) -> None:
+    # Each worker builds its own app from the config in the environment; this
+    # process supervises them and relays UI events between them.
+    if config["storage_path"] is None:
+        raise click.ClickException(
+            "--workers needs --storage: in-memory stores are not shared between processes."
         )
-        uvicorn.run(app, host="127.0.0.1", port=effective_port)
+    run_id = uuid.uuid4().hex
+    broker = EventBroker(Path(tempfile.gettempdir()) / f"webhook-relay-{run_id[:12]}.sock")
+    config = {
+        **config,
+        "storage_path": str(config["storage_path"]),
+        "forward_settings": asdict(config["forward_settings"]),
+        "delivery_settings": (
+            asdict(config["delivery_settings"]) if config["delivery_settings"] else None
+        ),
+        "run_id": run_id,
+        "event_bus": str(broker.path),
+    }
+    os.environ[CONFIG_ENV] = json.dumps(config)
+    broker.start()
+    try:
+        uvicorn.run(
+            "webhook_relay.server:app_from_env",
+            factory=True,
+            workers=workers,
+            host="127.0.0.1",
+            port=port,
+        )
+    finally:
+        broker.stop()
+
+
+def _echo_progress(progress: Dict[str, Any]) -> None:
+    total = "?" if progress["total"] is None else progress["total"]
+    click.echo(
+        f"\r{progress['state']}: {progress['sent']}/{total} sent, "
+        f"{progress['failed']} failed, {progress['rate']}/s",
+        nl=False,
+        err=True,
+    )
+
+
+def _follow(client: httpx.Client, job_id: str) -> Dict[str, Any]:
+    progress: Dict[str, Any] = {}
+    try:
+        with client.stream("GET", f"/_relay/replays/{job_id}/events") as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    progress = json.loads(line)
+                    _echo_progress(progress)
+    except KeyboardInterrupt:
+        click.echo(
+            f"\nReplay {job_id} keeps running; stop it with --pause {job_id} or --cancel {job_id}.",
+            err=True,
+        )
+        raise SystemExit(130)
+    click.echo(err=True)
+    return progress
+
+
+@main.command("replay")
+@click.option(
+    "--relay",
+    "relay_url",
+    default="http://127.0.0.1:8080",
+    show_default=True,
+    help="Running relay whose stored requests are replayed.",
+)
+@click.option("--method", default=None, help="Only requests with this HTTP method.")
+@click.option("--path-prefix", default=None, help="Only requests whose path starts with this.")
+@click.option(
+    "--status", "forwarded_status", type=int, default=None, help="Only this forwarded status."
+)
+@click.option("--since", default=None, help="Only requests captured at or after this ISO time.")
+@click.option("--until", default=None, help="Only requests captured before this ISO time.")
+@click.option("--target", default=None, help="Send here instead of the relay's --forward URL.")
+@click.option("--concurrency", default=8, show_default=True, type=int, help="Parallel sends.")
+@click.option("--rate", type=float, default=None, help="Requests per second [default: no limit].")
+@click.option(
+    "--order",
+    type=click.Choice(ORDERS),
+    default="none",
+    show_default=True,
+    help="global: one at a time in capture order; path: in order per path.",
+)
+@click.option("--pause", "pause_id", metavar="JOB", default=None, help="Pause a running replay.")
+@click.option("--resume", "resume_id", metavar="JOB", default=None, help="Resume and follow it.")
+@click.option("--cancel", "cancel_id", metavar="JOB", default=None, help="Cancel a replay.")
+def replay(
+    relay_url: str,
+    method: Optional[str],
+    path_prefix: Optional[str],
+    forwarded_status: Optional[int],
+    since: Optional[str],
+    until: Optional[str],
+    target: Optional[str],
+    concurrency: int,
+    rate: Optional[float],
+    order: str,
+    pause_id: Optional[str],
+    resume_id: Optional[str],
+    cancel_id: Optional[str],
+) -> None:
+    """Replay stored requests in bulk through a running relay, following its progress.
+
+    Prints the final progress as JSON; per-request results are kept by the relay
+    at /_relay/replays/JOB/results.
+    """
+    with httpx.Client(base_url=relay_url, timeout=None) as client:
+        try:
+            if pause_id or cancel_id:
+                action, job_id = ("pause", pause_id) if pause_id else ("cancel", cancel_id)
+                response = client.post(f"/_relay/replays/{job_id}/{action}")
+                response.raise_for_status()
+                click.echo(json.dumps(response.json(), indent=2))
+                return
+            if resume_id:
+                client.post(f"/_relay/replays/{resume_id}/resume").raise_for_status()
+                job_id = resume_id
+            else:
+                params = {
+                    "method": method,
+                    "path_prefix": path_prefix,
+                    "forwarded_status": forwarded_status,
+                    "since": since,
+                    "until": until,
+                    "target": target,
+                    "concurrency": concurrency,
+                    "rate": rate,
+                    "order": order,
+                }
+                response = client.post(
+                    "/_relay/replays",
+                    params={key: value for key, value in params.items() if value is not None},
+                )
+                response.raise_for_status()
+                job_id = response.json()["id"]
+                click.echo(f"Replay {job_id} started", err=True)
+            progress = _follow(client, job_id)
+        except httpx.HTTPStatusError as exc:
+            raise click.ClickException(f"{exc.response.status_code}: {exc.response.text}") from exc
+        except httpx.HTTPError as exc:
+            raise click.ClickException(f"Cannot reach {relay_url}: {exc}") from exc
+    click.echo(json.dumps(progress, indent=2))
+    if progress.get("state") == "failed":
+        raise click.ClickException(str(progress.get("error")))
+
+
+@main.command("bench")
+@click.option(
+    "--mode",
+    "modes",
+    multiple=True,
+    type=click.Choice(MODES),
+    help="Drive the app in-process or through a local uvicorn (repeatable) [default: inprocess].",
+)
+@click.option(
+    "--store",
+    "stores",
+    multiple=True,
+    type=click.Choice(STORES),
+    help="In-memory or file storage (repeatable) [default: file].",
+)
+@click.option(
+    "--body-size", "body_sizes", multiple=True, type=int, help="[default: 256 and 16384 bytes]"
+)
+@click.option(
+    "--signature",
+    "signatures",
+    multiple=True,
+    type=click.Choice(SIGNATURES),
+    help="Signature provider to validate (repeatable) [default: none and github].",
+)
+@click.option(
+    "--forward",
+    "forwards",
+    multiple=True,
+    type=click.Choice(FORWARDS),
+    help="Forwarding to a local stub (repeatable) [default: all].",
+)
+@click.option(
+    "--subscribers",
+    "subscriber_counts",
+    multiple=True,
+    type=int,
+    help="WebSocket UI clients (repeatable) [default: 0 and 100].",
+)
+@click.option("--requests", default=2000, show_default=True, type=int, help="Measured per case.")
+@click.option("--concurrency", default=32, show_default=True, type=int, help="Parallel senders.")
+@click.option("--warmup", default=200, show_default=True, type=int, help="Unmeasured per case.")
+@click.option("--capacity", default=1000, show_default=True, type=int)
+@click.option(
+    "--stub-delay", default=0.0, show_default=True, type=float, help="Stub target delay in ms."
+)
+@click.option("--seed", default=0, show_default=True, type=int)
+@click.option("--format", "output_format", type=click.Choice(["table", "jsonl"]), default="table")
+@click.option(
+    "--output", type=click.Path(path_type=Path), default=None, help="Save results as JSON."
+)
+@click.option(
+    "--compare",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Fail if a case regressed against results saved with --output.",
+)
+@click.option(
+    "--tolerance",
+    default=0.1,
+    show_default=True,
+    type=float,
+    help="Allowed drop in req/s or rise in p99, as a fraction.",
+)
+def bench(
+    modes: Tuple[str, ...],
+    stores: Tuple[str, ...],
+    body_sizes: Tuple[int, ...],
+    signatures: Tuple[str, ...],
+    forwards: Tuple[str, ...],
+    subscriber_counts: Tuple[int, ...],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    capacity: int,
+    stub_delay: float,
+    seed: int,
+    output_format: str,
+    output: Optional[Path],
+    baseline_path: Optional[Path],
+    tolerance: float,
+) -> None:
+    """Measure ingest throughput and latency under reproducible synthetic load."""
+    options: Dict[str, Any] = {
+        "modes": modes,
+        "stores": stores,
+        "body_sizes": body_sizes,
+        "signatures": signatures,
+        "forwards": forwards,
+        "subscribers": subscriber_counts,
+    }
+    grid = {key: value for key, value in options.items() if value}
+    settings = dict(
+        requests=requests,
+        concurrency=concurrency,
+        warmup=warmup,
+        capacity=capacity,
+        stub_delay=stub_delay / 1000,
+        seed=seed,
+    )
+    baseline = json.loads(baseline_path.read_text()) if baseline_path else None
+    results = []
+    try:
+        if output_format == "table":
+            click.echo(f"{'case':<62}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for result in run_benchmarks(**grid, **settings):
+            results.append(result)
+            if output_format == "jsonl":
+                click.echo(json.dumps(result.record()))
+                continue
+            click.echo(
+                f"{result.case:<62}{result.requests_per_second:>9.0f}"
+                f"{result.p50_ms:>9.2f}{result.p99_ms:>9.2f}{result.errors:>8}"
+            )
+        comparisons = compare(baseline, results, tolerance) if baseline else []
     except Exception as exc:
         raise click.ClickException(str(exc)) from exc
+    if output is not None:
+        document = results_document(results, {**settings, "tolerance": tolerance})
+        output.write_text(json.dumps(document, indent=2) + "\n")
+    regressed = [item for item in comparisons if item.regressed]
+    for item in comparisons:
+        click.echo(
+            f"{'REGRESSED' if item.regressed else 'ok':<10}{item.case}: "
+            f"{item.baseline_rps:.0f} -> {item.rps:.0f} req/s, "
+            f"p99 {item.baseline_p99_ms:.2f} -> {item.p99_ms:.2f} ms",
+            err=True,
+        )
+    if regressed:
+        raise click.ClickException(
+            f"{len(regressed)} of {len(comparisons)} cases regressed by more than {tolerance:.0%}"
+        )
 
 
 if __name__ == "__main__":
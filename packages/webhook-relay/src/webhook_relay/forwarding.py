@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, Mapping, Optional, Set
+
+import httpx
+
+from .metrics import Histogram
+from .storage import RelayStorage, StoredRequest
+
+logger = logging.getLogger(__name__)
+# Delivery latencies kept for the percentiles in ``DeliveryQueue.stats``.
+LATENCY_WINDOW = 1024
+
+
+@dataclass
+class ForwardSettings:
+    """Connection pool and timeout settings for the forwarding client."""
+
+    timeout: float = 10.0
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry: float = 5.0
+    http2: bool = False
+
+
+@dataclass
+class DeliverySettings:
+    """Worker count and retry schedule for queued forwarding."""
+
+    workers: int = 4
+    max_attempts: int = 5
+    backoff: float = 0.5
+    max_backoff: float = 60.0
+
+
+class Forwarder:
+    """One pooled HTTP client for forwarding and replaying captured requests.
+
+    Connections to the target are kept alive between requests, so only the
+    first request (or the first after ``keepalive_expiry`` idle seconds) pays
+    for TCP and TLS setup. The app opens one at startup and closes it on
+    shutdown.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        settings: ForwardSettings | None = None,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.settings = settings or ForwardSettings()
+        limits = httpx.Limits(
+            max_connections=self.settings.max_connections,
+            max_keepalive_connections=self.settings.max_keepalive,
+            keepalive_expiry=self.settings.keepalive_expiry,
+        )
+        try:
+            self.client = httpx.AsyncClient(
+                http2=self.settings.http2,
+                limits=limits,
+                timeout=self.settings.timeout,
+                transport=transport,
+            )
+        except ImportError as exc:
+            raise RuntimeError(
+                "HTTP/2 forwarding needs the h2 package: pip install 'webhook-relay[http2]'"
+            ) from exc
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        # Responses by status class ("2xx", ...) and time to response headers.
+        self.responses: Dict[str, int] = {}
+        self.latency = Histogram()
+
+    async def send(
+        self,
+        method: str,
+        path: str,
+        *,
+        headers: Mapping[str, str],
+        params: Mapping[str, str],
+        content: bytes,
+    ) -> httpx.Response:
+        """Send a request to ``path`` under the target URL; transport errors propagate."""
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, self.base_url + path, headers=headers, params=params, content=content
+            )
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.requests += 1
+            self.latency.observe(time.perf_counter() - started)
+        status_class = f"{response.status_code // 100}xx"
+        self.responses[status_class] = self.responses.get(status_class, 0) + 1
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        # Counters the relay keeps itself; httpx has no public API for its pool.
+        return {
+            "target": self.base_url,
+            "settings": asdict(self.settings),
+            "requests": self.requests,
+            "errors": self.errors,
+            "responses": dict(self.responses),
+            "in_flight": self.in_flight,
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def _retryable(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def _percentile(values: list, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 2)
+
+
+@dataclass
+class _Delivery:
+    request_id: str
+    attempts: int
+    item: Optional[StoredRequest] = None
+
+
+class DeliveryQueue:
+    """Forwards captured requests in the background with retries.
+
+    ``submit`` returns at once; ``settings.workers`` tasks send queued requests
+    through the ``Forwarder``. Transport errors, 429 and 5xx responses are
+    retried with exponential backoff and jitter, up to ``max_attempts`` sends.
+    Any other response, or the last attempt, finishes the delivery and stores
+    its status as the request's ``forwarded_status``.
+
+    The backlog lives in the storage ``deliveries`` table. ``start`` reloads it,
+    so requests still undelivered at shutdown are sent after a restart.
+    """
+
+    def __init__(
+        self,
+        forwarder: Forwarder,
+        storage: RelayStorage,
+        settings: DeliverySettings | None = None,
+    ) -> None:
+        self.forwarder = forwarder
+        self.storage = storage
+        self.settings = settings or DeliverySettings()
+        self._queue: asyncio.Queue[_Delivery] = asyncio.Queue()
+        self._timers: Set[asyncio.TimerHandle] = set()
+        self._tasks: list[asyncio.Task] = []
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.in_flight = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def start(self) -> None:
+        backlog = await asyncio.to_thread(self.storage.claim_deliveries)
+        now = time.time()
+        for pending in backlog:
+            self._schedule(
+                _Delivery(pending.request_id, pending.attempts), pending.next_attempt - now
+            )
+        if backlog:
+            logger.info("Resuming delivery of %d queued requests", len(backlog))
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(max(1, self.settings.workers))
+        ]
+
+    def submit(self, item: StoredRequest) -> None:
+        """Queue a request stored with ``deliver=True`` for forwarding."""
+        self._queue.put_nowait(_Delivery(item.id, 0, item))
+
+    @property
+    def depth(self) -> int:
+        """Requests waiting for a send, including those backing off."""
+        return self._queue.qsize() + len(self._timers)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self._latencies)
+        return {
+            "enabled": True,
+            "settings": asdict(self.settings),
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "latency_ms": {
+                "p50": _percentile(latencies, 0.5),
+                "p99": _percentile(latencies, 0.99),
+            },
+        }
+
+    async def aclose(self) -> None:
+        # Unfinished deliveries stay in the backlog for the next start.
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _schedule(self, delivery: _Delivery, delay: float) -> None:
+        if delay <= 0:
+            self._queue.put_nowait(delivery)
+            return
+
+        def fire() -> None:
+            self._timers.discard(timer)
+            self._queue.put_nowait(delivery)
+
+        timer = asyncio.get_running_loop().call_later(delay, fire)
+        self._timers.add(timer)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.settings.max_backoff, self.settings.backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _work(self) -> None:
+        while True:
+            delivery = await self._queue.get()
+            self.in_flight += 1
+            try:
+                await self._deliver(delivery)
+            except Exception:
+                logger.exception("Delivery of request %s failed", delivery.request_id)
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    async def _deliver(self, delivery: _Delivery) -> None:
+        item = delivery.item or await asyncio.to_thread(self.storage.get, delivery.request_id)
+        if item is None:
+            # Pruned or deleted while waiting.
+            await asyncio.to_thread(self.storage.finish_delivery, delivery.request_id, None)
+            return
+        if item.body is None and item.body_size:
+            # Its spilled body file is gone; an empty body would be a different request.
+            await asyncio.to_thread(self.storage.finish_delivery, item.id, None)
+            self.failed += 1
+            logger.warning("Giving up on request %s: its body file is missing", item.id)
+            return
+        attempts = delivery.attempts + 1
+        status: Optional[int] = None
+        try:
+            response = await self.forwarder.send(
+                item.method,
+                item.path,
+                headers=item.headers,
+                params=item.query_params,
+                content=item.body or b"",
+            )
+            status = response.status_code
+            error = f"HTTP {status}"
+        except httpx.HTTPError as exc:
+            error = f"{type(exc).__name__}: {exc}"
+
+        answered = status is not None and not _retryable(status)
+        if answered or attempts >= self.settings.max_attempts:
+            await asyncio.to_thread(self.storage.finish_delivery, item.id, status)
+            if answered:
+                self.delivered += 1
+                captured = datetime.fromisoformat(item.timestamp).timestamp()
+                self._latencies.append((time.time() - captured) * 1000)
+            else:
+                self.failed += 1
+                logger.warning(
+                    "Giving up on request %s after %d attempts: %s", item.id, attempts, error
+                )
+            return
+
+        delay = self._backoff(attempts)
+        await asyncio.to_thread(
+            self.storage.retry_delivery,
+            item.id,
+            attempts=attempts,
+            next_attempt=time.time() + delay,
+            error=error,
+        )
+        self.retried += 1
+        self._schedule(_Delivery(item.id, attempts, item), delay)
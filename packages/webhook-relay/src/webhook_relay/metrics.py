@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Upper bounds, in seconds, from 25µs to 10s in roughly 1-2.5-5 steps.
+LATENCY_BUCKETS = (
+    0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+Labels = Mapping[str, str]
+
+
+class Histogram:
+    """Counts observations into fixed buckets, Prometheus style.
+
+    ``observe`` is a bisect and three increments, cheap enough for every
+    request. Each histogram should be observed from one thread only; readers
+    on other threads may see a sample mid-update, which is fine for metrics.
+    """
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        # One count per bucket plus the overflow (+Inf) bucket; not cumulative.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile (``None`` if empty
+        or past the last bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.sum / self.count) if self.count else None,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p99_ms": ms(self.quantile(0.99)),
+        }
+
+
+def _labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels.items()]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Exposition:
+    """Builds a Prometheus text-format (0.0.4) page one metric family at a time."""
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+
+    def gauge(self, name: str, help: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self._family(name, help, "gauge", samples)
+
+    def counter(self, name: str, help: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self._family(name, help, "counter", samples)
+
+    def histogram(self, name: str, help: str, samples: Iterable[Tuple[Labels, Histogram]]) -> None:
+        self._lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+        for labels, histogram in samples:
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                le = _labels(labels, f'le="{bound}"')
+                self._lines.append(f"{name}_bucket{le} {cumulative}")
+            le = _labels(labels, 'le="+Inf"')
+            self._lines.append(f"{name}_bucket{le} {histogram.count}")
+            self._lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+            self._lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+    def _family(
+        self, name: str, help: str, kind: str, samples: Iterable[Tuple[Labels, float]]
+    ) -> None:
+        self._lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for labels, value in samples:
+            self._lines.append(f"{name}{_labels(labels)} {value}")
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from .forwarding import Forwarder
+from .storage import RelayStorage, ReplayResult, RequestFilter, StoredRequest
+
+logger = logging.getLogger(__name__)
+
+# ``none`` sends in any order, ``global`` one at a time in capture order, and
+# ``path`` in capture order per path, with different paths in parallel.
+ORDERS = ("none", "global", "path")
+# Requests read from storage per page, and results committed together.
+REPLAY_PAGE_SIZE = 500
+RESULT_BATCH_SIZE = 200
+
+
+@dataclass
+class ReplaySettings:
+    """How a bulk replay sends: parallel sends, requests per second, ordering."""
+
+    concurrency: int = 8
+    rate: Optional[float] = None
+    order: str = "none"
+
+    def __post_init__(self) -> None:
+        if self.order not in ORDERS:
+            raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if self.rate is not None and self.rate <= 0:
+            raise ValueError("rate must be positive")
+
+
+class ReplayJob:
+    """Replays every stored request matching ``filters``, oldest first.
+
+    Requests are paged from storage while they are sent, so memory stays flat
+    however many match. Sends are paced to ``settings.rate`` and spread over
+    ``settings.concurrency`` workers; each worker owns a queue, and with
+    ``order="path"`` a path always maps to the same one. Every result is
+    recorded in storage under the job id. ``pause`` stops new sends until
+    ``resume``; sends already in flight finish.
+    """
+
+    def __init__(
+        self,
+        storage: RelayStorage,
+        forwarder: Forwarder,
+        filters: RequestFilter,
+        settings: ReplaySettings,
+        *,
+        owns_forwarder: bool = False,
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.storage = storage
+        self.forwarder = forwarder
+        self.filters = filters
+        self.settings = settings
+        self.state = "pending"
+        self.total: Optional[int] = None
+        self.sent = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._owns_forwarder = owns_forwarder
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._results: List[ReplayResult] = []
+        self._next_send = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "cancelled", "failed")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def pause(self) -> None:
+        if self.state == "running":
+            self.state = "paused"
+            self._resumed.clear()
+
+    def resume(self) -> None:
+        if self.state == "paused":
+            self.state = "running"
+            self._resumed.set()
+
+    async def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def progress(self) -> Dict[str, Any]:
+        now = self.finished_at or time.time()
+        elapsed = now - self.started_at if self.started_at else 0.0
+        return {
+            "id": self.id,
+            "state": self.state,
+            "target": self.forwarder.base_url,
+            "filters": asdict(self.filters),
+            "settings": asdict(self.settings),
+            "total": self.total,
+            "sent": self.sent,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "elapsed_seconds": round(elapsed, 3),
+            "rate": round(self.sent / elapsed, 1) if elapsed else 0.0,
+            "error": self.error,
+        }
+
+    async def _run(self) -> None:
+        self.state = "running"
+        self.started_at = time.time()
+        order = self.settings.order
+        workers = 1 if order == "global" else self.settings.concurrency
+        if order == "none":
+            shared: asyncio.Queue[Optional[StoredRequest]] = asyncio.Queue(maxsize=2 * workers)
+            inboxes = [shared] * workers
+        else:
+            inboxes = [asyncio.Queue(maxsize=2) for _ in range(workers)]
+        tasks = [asyncio.create_task(self._work(inbox)) for inbox in inboxes]
+        try:
+            self.total = await asyncio.to_thread(self.storage.count, self.filters)
+            async for item in self._requests():
+                await self._resumed.wait()
+                await self._pace()
+                route = zlib.crc32(item.path.encode()) % workers if order == "path" else 0
+                await inboxes[route].put(item)
+            for inbox in inboxes:
+                await inbox.put(None)
+            await asyncio.gather(*tasks)
+            self.state = "done"
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+        except Exception as exc:
+            logger.exception("Replay %s failed", self.id)
+            self.state = "failed"
+            self.error = str(exc)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._resumed.set()
+            await self._flush()
+            if self._owns_forwarder:
+                await self.forwarder.aclose()
+            self.finished_at = time.time()
+
+    async def _requests(self) -> AsyncIterator[StoredRequest]:
+        cursor: Optional[str] = None
+        while True:
+            items, cursor = await asyncio.to_thread(
+                self.storage.page,
+                filters=self.filters,
+                limit=REPLAY_PAGE_SIZE,
+                cursor=cursor,
+                include_body=True,
+                oldest_first=True,
+                load_bodies=True,
+            )
+            for item in items:
+                yield item
+            if cursor is None:
+                return
+
+    async def _pace(self) -> None:
+        if self.settings.rate is None:
+            return
+        now = time.monotonic()
+        # Time spent paused or waiting on workers is not made up with a burst.
+        self._next_send = max(self._next_send, now)
+        delay = self._next_send - now
+        self._next_send += 1 / self.settings.rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await self._resumed.wait()
+            self.in_flight += 1
+            try:
+                result = await self._send(item)
+            finally:
+                self.in_flight -= 1
+            self.sent += 1
+            if result.status is not None and result.status < 400:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            self._results.append(result)
+            if len(self._results) >= RESULT_BATCH_SIZE:
+                await self._flush()
+
+    async def _send(self, item: StoredRequest) -> ReplayResult:
+        started = time.perf_counter()
+        status: Optional[int] = None
+        error: Optional[str] = None
+        try:
+            if item.body is None and item.body_size:
+                error = "Request body file is missing"
+            else:
+                response = await self.forwarder.send(
+                    item.method,
+                    item.path,
+                    headers=item.headers,
+                    params=item.query_params,
+                    content=item.body or b"",
+                )
+                status = response.status_code
+        except httpx.HTTPError as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        return ReplayResult(
+            request_id=item.id,
+            status=status,
+            error=error,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+            replayed_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    async def _flush(self) -> None:
+        results, self._results = self._results, []
+        if results:
+            await asyncio.to_thread(self.storage.record_replays, self.id, results)
@@ -1,38 +1,260 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 import json
+import os
+import queue
+import time
+from contextlib import asynccontextmanager
 from dataclasses import asdict
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Set
+from typing import AsyncIterator, Dict, List, Optional
 
 import httpx
-from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+from .bus import EventBus
+from .forwarding import DeliveryQueue, DeliverySettings, Forwarder, ForwardSettings
+from .metrics import Exposition, Histogram
+from .replay import ORDERS, ReplayJob, ReplaySettings
 from .signatures import validate_signature
-from .storage import RelayStorage
+from .storage import (
+    DEFAULT_BATCH_DELAY,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_COMPRESS_THRESHOLD,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_SPILL_THRESHOLD,
+    MAX_PAGE_SIZE,
+    RelayStorage,
+    RequestFilter,
+    StoredRequest,
+    search_terms,
+)
 from .ui import static_dir
 
+# Worker processes import the app by name, so ``app_from_env`` reads the
+# ``create_app`` keyword arguments from this variable as JSON.
+CONFIG_ENV = "WEBHOOK_RELAY_CONFIG"
+# Events queued per WebSocket client before the oldest are dropped.
+CLIENT_QUEUE_SIZE = 64
+# Timed steps of capturing a request, in order; ``forward`` only runs when
+# requests are forwarded inline rather than through the delivery queue.
+STAGES = ("body_read", "signature", "forward", "store", "broadcast")
+
+
+class _Subscriber:
+    def __init__(self, websocket: WebSocket, maxsize: int) -> None:
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
 
 class ConnectionHub:
-    def __init__(self) -> None:
-        self._connections: Set[WebSocket] = set()
+    """Fans events out to WebSocket clients without waiting on any of them.
+
+    ``broadcast`` serializes an event once and queues it for every client; each
+    client has its own sender task and a queue of ``queue_size`` events. A
+    client that falls behind loses its oldest events rather than delaying the
+    others. The UI treats events only as a cue to fetch new requests, so a
+    dropped event costs it nothing.
+    """
+
+    def __init__(self, queue_size: int = CLIENT_QUEUE_SIZE) -> None:
+        self.queue_size = max(1, queue_size)
+        self._subscribers: Dict[WebSocket, _Subscriber] = {}
+        self.dropped = 0
+        # With --workers, events also go to the other workers' hubs.
+        self.bus: Optional[EventBus] = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def queued(self) -> int:
+        """Events waiting in client queues."""
+        return sum(subscriber.queue.qsize() for subscriber in self._subscribers.values())
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
-        self._connections.add(websocket)
+        self.subscribe(websocket)
+
+    def subscribe(self, websocket: WebSocket) -> None:
+        subscriber = _Subscriber(websocket, self.queue_size)
+        subscriber.task = asyncio.create_task(self._send(subscriber))
+        self._subscribers[websocket] = subscriber
 
     def disconnect(self, websocket: WebSocket) -> None:
-        self._connections.discard(websocket)
+        subscriber = self._subscribers.pop(websocket, None)
+        if subscriber is not None and subscriber.task is not None:
+            subscriber.task.cancel()
+
+    def broadcast(self, payload: dict) -> None:
+        message = json.dumps(payload)
+        self.fan_out(message)
+        if self.bus is not None:
+            self.bus.publish(message)
+
+    def fan_out(self, message: str) -> None:
+        """Queue a serialized event for this process's clients."""
+        for subscriber in self._subscribers.values():
+            if subscriber.queue.full():
+                subscriber.queue.get_nowait()
+                subscriber.dropped += 1
+                self.dropped += 1
+            subscriber.queue.put_nowait(message)
 
-    async def broadcast(self, payload: dict) -> None:
-        for conn in list(self._connections):
+    async def close(self) -> None:
+        tasks = [s.task for s in self._subscribers.values() if s.task is not None]
+        self._subscribers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _send(self, subscriber: _Subscriber) -> None:
+        while True:
+            message = await subscriber.queue.get()
             try:
-                await conn.send_text(json.dumps(payload))
+                await subscriber.websocket.send_text(message)
             except Exception:
-                self.disconnect(conn)
+                self._subscribers.pop(subscriber.websocket, None)
+                return
+
+
+def _utc_timestamp(value: datetime | None) -> str | None:
+    # Stored timestamps are UTC isoformat strings; naive query values mean UTC.
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _request_json(item: StoredRequest) -> dict:
+    # JSON has no bytes: bodies that are not UTF-8 are sent base64-encoded.
+    data = asdict(item)
+    data["body_base64"] = False
+    if item.body is not None:
+        try:
+            data["body"] = item.body.decode("utf-8")
+        except UnicodeDecodeError:
+            data["body"] = base64.b64encode(item.body).decode("ascii")
+            data["body_base64"] = True
+    return data
+
+
+def _error_rate(forwarder: Forwarder) -> Optional[float]:
+    # Transport errors and 5xx responses, as a share of all forwarded requests.
+    if not forwarder.requests:
+        return None
+    failures = forwarder.errors + forwarder.responses.get("5xx", 0)
+    return round(failures / forwarder.requests, 4)
+
+
+def _metrics_json(
+    stages: Dict[str, Histogram],
+    storage: RelayStorage,
+    db: dict,
+    forwarder: Optional[Forwarder],
+    deliveries: Optional[DeliveryQueue],
+    hub: ConnectionHub,
+) -> dict:
+    forward = None
+    if forwarder is not None:
+        forward = {
+            "requests": forwarder.requests,
+            "errors": forwarder.errors,
+            "responses": dict(forwarder.responses),
+            "error_rate": _error_rate(forwarder),
+            "in_flight": forwarder.in_flight,
+            "latency": forwarder.latency.summary(),
+        }
+    return {
+        "stages": {name: histogram.summary() for name, histogram in stages.items()},
+        "commit": storage.commit_latency.summary(),
+        "storage": {"rows": db["rows"], "db_bytes": db["db_bytes"]},
+        "queues": {
+            "write": db["queued"],
+            "delivery": deliveries.depth if deliveries is not None else None,
+            "websocket": hub.queued,
+        },
+        "forward": forward,
+        "websocket": {"clients": len(hub), "dropped": hub.dropped},
+    }
+
+
+def _metrics_text(
+    stages: Dict[str, Histogram],
+    storage: RelayStorage,
+    db: dict,
+    forwarder: Optional[Forwarder],
+    deliveries: Optional[DeliveryQueue],
+    hub: ConnectionHub,
+) -> str:
+    page = Exposition()
+    page.histogram(
+        "webhook_relay_stage_seconds",
+        "Time spent in each stage of capturing a request.",
+        [({"stage": name}, histogram) for name, histogram in stages.items()],
+    )
+    page.histogram(
+        "webhook_relay_commit_seconds",
+        "Time per storage write transaction.",
+        [({}, storage.commit_latency)],
+    )
+    page.gauge("webhook_relay_stored_requests", "Requests in storage.", [({}, db["rows"])])
+    page.gauge(
+        "webhook_relay_database_bytes", "Size of the database and its WAL.", [({}, db["db_bytes"])]
+    )
+    page.gauge(
+        "webhook_relay_queue_depth",
+        "Items waiting in each queue.",
+        [({"queue": "write"}, db["queued"]), ({"queue": "websocket"}, hub.queued)]
+        + ([({"queue": "delivery"}, deliveries.depth)] if deliveries is not None else []),
+    )
+    page.gauge("webhook_relay_websocket_clients", "Connected UI clients.", [({}, len(hub))])
+    page.counter(
+        "webhook_relay_websocket_dropped_total",
+        "Events dropped for slow UI clients.",
+        [({}, hub.dropped)],
+    )
+    if forwarder is not None:
+        page.histogram(
+            "webhook_relay_forward_seconds",
+            "Time from sending a request to the target until its response headers.",
+            [({}, forwarder.latency)],
+        )
+        page.counter(
+            "webhook_relay_forward_requests_total",
+            "Requests sent to the target.",
+            [({}, forwarder.requests)],
+        )
+        page.counter(
+            "webhook_relay_forward_errors_total",
+            "Sends that failed without a response.",
+            [({}, forwarder.errors)],
+        )
+        page.counter(
+            "webhook_relay_forward_responses_total",
+            "Target responses by status class.",
+            [({"class": status}, count) for status, count in sorted(forwarder.responses.items())],
+        )
+    if deliveries is not None:
+        page.counter(
+            "webhook_relay_deliveries_total",
+            "Queued deliveries by outcome.",
+            [
+                ({"outcome": "delivered"}, deliveries.delivered),
+                ({"outcome": "failed"}, deliveries.failed),
+                ({"outcome": "retried"}, deliveries.retried),
+            ],
+        )
+    return page.text()
 
 
 def _websocket_supported() -> bool:
@@ -58,8 +280,91 @@ def create_app(
     secret: str | None,
     capacity: int,
     websocket_enabled: bool | None = None,
+    write_batch_size: int = DEFAULT_BATCH_SIZE,
+    write_batch_delay: float = DEFAULT_BATCH_DELAY,
+    compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+    spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+    forward_settings: ForwardSettings | None = None,
+    delivery_settings: DeliverySettings | None = None,
+    run_id: str | None = None,
+    event_bus: Path | None = None,
 ) -> FastAPI:
-    app = FastAPI(title="webhook-relay")
+    """Build the relay app.
+
+    With ``delivery_settings``, captured requests are acknowledged before they
+    are forwarded and a ``DeliveryQueue`` sends them in the background;
+    otherwise each request waits for the ``forward_url`` response.
+
+    Worker processes sharing one ``storage_path`` pass the same ``run_id`` and
+    the socket of an ``EventBroker`` as ``event_bus``, so every worker's UI
+    clients hear about requests captured by the others.
+    """
+    storage = RelayStorage(
+        storage_path=storage_path,
+        capacity=capacity,
+        batch_size=write_batch_size,
+        batch_delay=write_batch_delay,
+        compress_threshold=compress_threshold,
+        spill_threshold=spill_threshold,
+        run_id=run_id,
+    )
+    forwarder = Forwarder(forward_url, forward_settings) if forward_url else None
+    deliveries = (
+        DeliveryQueue(forwarder, storage, delivery_settings)
+        if forwarder is not None and delivery_settings is not None
+        else None
+    )
+    hub = ConnectionHub()
+    replays: Dict[str, ReplayJob] = {}
+    stages = {stage: Histogram() for stage in STAGES}
+
+    def committed(items: List[StoredRequest]) -> None:
+        # Delivery starts, and UI clients hear of a request, once its row exists,
+        # so a client fetching the request it was told about finds it.
+        for item in items:
+            if deliveries is not None:
+                deliveries.submit(item)
+            started = time.perf_counter()
+            hub.broadcast(
+                {
+                    "type": "new_request",
+                    "request": {
+                        "id": item.id,
+                        "method": item.method,
+                        "path": item.path,
+                        "timestamp": item.timestamp,
+                    },
+                }
+            )
+            stages["broadcast"].observe(time.perf_counter() - started)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        loop = asyncio.get_running_loop()
+        # Called on the storage writer thread after each committed batch.
+        storage.on_commit = lambda items: loop.call_soon_threadsafe(committed, items)
+        if event_bus is not None:
+            hub.bus = EventBus(event_bus, hub.fan_out)
+            await hub.bus.connect()
+        if deliveries is not None:
+            await deliveries.start()
+        yield
+        for job in replays.values():
+            await job.cancel()
+        await hub.close()
+        if hub.bus is not None:
+            await hub.bus.close()
+        if deliveries is not None:
+            await deliveries.aclose()
+        if forwarder is not None:
+            await forwarder.aclose()
+        # Commit whatever the writer still has queued before exiting.
+        await asyncio.to_thread(storage.close)
+
+    app = FastAPI(title="webhook-relay", lifespan=lifespan)
+    # For tools driving the app in-process, such as ``webhook-relay bench``.
+    app.state.hub = hub
+    app.state.storage = storage
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -67,8 +372,6 @@ def create_app(
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    storage = RelayStorage(storage_path=storage_path, capacity=capacity)
-    hub = ConnectionHub()
     ws_enabled = _websocket_supported() if websocket_enabled is None else websocket_enabled
 
     static = static_dir()
@@ -93,38 +396,209 @@ def create_app(
     async def capabilities():
         return {"websocket": ws_enabled}
 
+    @app.get("/_relay/pool")
+    async def pool_stats():
+        if forwarder is None:
+            return {"target": None}
+        return forwarder.stats()
+
+    @app.get("/_relay/deliveries")
+    async def delivery_stats():
+        if deliveries is None:
+            return {"enabled": False}
+        return deliveries.stats()
+
+    @app.get("/_relay/metrics")
+    async def metrics(format: str = Query("prometheus", pattern="^(prometheus|json)$")):
+        db = await asyncio.to_thread(storage.stats)
+        if format == "json":
+            return _metrics_json(stages, storage, db, forwarder, deliveries, hub)
+        return Response(
+            _metrics_text(stages, storage, db, forwarder, deliveries, hub),
+            media_type=Exposition.content_type,
+        )
+
+    # Storage calls block on SQLite, so these handlers are plain functions that
+    # FastAPI runs in its threadpool rather than on the event loop.
     @app.get("/_relay/requests")
-    async def list_requests():
-        return [asdict(item) for item in storage.list()]
+    def list_requests(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        method: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        forwarded_status: Optional[int] = None,
+        signature_valid: Optional[bool] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        include_body: bool = False,
+        paged: bool = False,
+    ):
+        filters = RequestFilter(
+            method=method,
+            path_prefix=path_prefix,
+            forwarded_status=forwarded_status,
+            signature_valid=signature_valid,
+            since=_utc_timestamp(since),
+            until=_utc_timestamp(until),
+        )
+        try:
+            items, next_cursor = storage.page(
+                filters=filters, limit=limit, cursor=cursor, include_body=include_body
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        rendered = [
+            _request_json(item) if isinstance(item, StoredRequest) else asdict(item)
+            for item in items
+        ]
+        # A plain array unless asked for the cursor, which existing clients don't expect.
+        if paged:
+            return {"items": rendered, "next_cursor": next_cursor}
+        return rendered
+
+    @app.get("/_relay/search")
+    def search_requests(
+        q: str = Query(..., min_length=1),
+        raw: bool = False,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        offset: int = Query(0, ge=0),
+    ):
+        query = q if raw else search_terms(q)
+        try:
+            items, next_offset = storage.search(query, limit=limit, offset=offset)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except RuntimeError as exc:
+            raise HTTPException(status_code=501, detail=str(exc)) from exc
+        return {"items": [asdict(item) for item in items], "next_offset": next_offset}
 
     @app.get("/_relay/requests/{request_id}")
-    async def get_request(request_id: str):
+    def get_request(request_id: str):
         item = storage.get(request_id)
         if not item:
             raise HTTPException(status_code=404, detail="Request not found")
-        return asdict(item)
+        return _request_json(item)
 
     @app.delete("/_relay/requests/{request_id}")
-    async def delete_request(request_id: str):
+    def delete_request(request_id: str):
         if not storage.delete(request_id):
             raise HTTPException(status_code=404, detail="Request not found")
         return {"deleted": True, "id": request_id}
 
+    def _replay_job(job_id: str) -> ReplayJob:
+        job = replays.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Replay not found")
+        return job
+
+    @app.post("/_relay/replays", status_code=202)
+    async def start_replay(
+        method: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        forwarded_status: Optional[int] = None,
+        signature_valid: Optional[bool] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        target: Optional[str] = None,
+        concurrency: int = Query(8, ge=1, le=1000),
+        rate: Optional[float] = Query(None, gt=0),
+        order: str = Query("none", pattern=f"^({'|'.join(ORDERS)})$"),
+    ):
+        filters = RequestFilter(
+            method=method,
+            path_prefix=path_prefix,
+            forwarded_status=forwarded_status,
+            signature_valid=signature_valid,
+            since=_utc_timestamp(since),
+            until=_utc_timestamp(until),
+        )
+        settings = ReplaySettings(concurrency=concurrency, rate=rate, order=order)
+        if target:
+            job = ReplayJob(
+                storage, Forwarder(target, forward_settings), filters, settings, owns_forwarder=True
+            )
+        elif forwarder is not None:
+            job = ReplayJob(storage, forwarder, filters, settings)
+        else:
+            raise HTTPException(
+                status_code=400, detail="No --forward URL configured and no target given."
+            )
+        replays[job.id] = job
+        job.start()
+        return job.progress()
+
+    @app.get("/_relay/replays")
+    async def list_replays():
+        return {"items": [job.progress() for job in replays.values()]}
+
+    @app.get("/_relay/replays/{job_id}")
+    async def replay_progress(job_id: str):
+        return _replay_job(job_id).progress()
+
+    @app.get("/_relay/replays/{job_id}/events")
+    async def replay_events(job_id: str, interval: float = Query(0.5, gt=0, le=60)):
+        job = _replay_job(job_id)
+
+        async def stream() -> AsyncIterator[str]:
+            # One JSON progress line per interval, the last once the job ends.
+            while True:
+                finished = job.finished
+                yield json.dumps(job.progress()) + "\n"
+                if finished:
+                    return
+                await asyncio.sleep(interval)
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.get("/_relay/replays/{job_id}/results")
+    def replay_results(
+        job_id: str,
+        failed_only: bool = False,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        offset: int = Query(0, ge=0),
+    ):
+        results = storage.replay_results(
+            job_id, failed_only=failed_only, limit=limit, offset=offset
+        )
+        return {"items": [asdict(result) for result in results]}
+
+    @app.post("/_relay/replays/{job_id}/pause")
+    async def pause_replay(job_id: str):
+        job = _replay_job(job_id)
+        job.pause()
+        return job.progress()
+
+    @app.post("/_relay/replays/{job_id}/resume")
+    async def resume_replay(job_id: str):
+        job = _replay_job(job_id)
+        job.resume()
+        return job.progress()
+
+    @app.post("/_relay/replays/{job_id}/cancel")
+    async def cancel_replay(job_id: str):
+        job = _replay_job(job_id)
+        await job.cancel()
+        return job.progress()
+
     @app.post("/_relay/replay/{request_id}")
     async def replay_request(request_id: str):
-        item = storage.get(request_id)
+        item = await asyncio.to_thread(storage.get, request_id)
         if not item:
             raise HTTPException(status_code=404, detail="Request not found")
-        if not forward_url:
+        if forwarder is None:
             return {"replayed": False, "reason": "No --forward URL configured."}
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.request(
-                method=item.method,
-                url=forward_url.rstrip("/") + item.path,
-                content=item.body.encode("utf-8"),
+        if item.body is None and item.body_size:
+            raise HTTPException(status_code=410, detail="Request body file is missing")
+        try:
+            response = await forwarder.send(
+                item.method,
+                item.path,
                 headers=item.headers,
                 params=item.query_params,
+                content=item.body or b"",
             )
+        except httpx.HTTPError as exc:
+            return {"replayed": False, "reason": f"{type(exc).__name__}: {exc}"}
         return {"replayed": True, "status_code": response.status_code}
 
     @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
@@ -132,44 +606,65 @@ def create_app(
         if path.startswith("_relay/"):
             raise HTTPException(status_code=404, detail="Not found")
 
+        started = time.perf_counter()
         body = await request.body()
+        read = time.perf_counter()
         signature_valid = validate_signature(signature_provider, secret, request.headers, body)
+        checked = time.perf_counter()
+        stages["body_read"].observe(read - started)
+        stages["signature"].observe(checked - read)
         forwarded_status: Optional[int] = None
 
-        if forward_url:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.request(
-                    method=request.method,
-                    url=forward_url.rstrip("/") + "/" + path,
-                    headers=dict(request.headers),
-                    params=dict(request.query_params),
-                    content=body,
-                )
-                forwarded_status = resp.status_code
-
-        saved = storage.insert(
-            method=request.method,
-            path="/" + path,
-            headers=dict(request.headers),
-            body=body.decode("utf-8", errors="replace"),
-            query_params=dict(request.query_params),
-            forwarded_status=forwarded_status,
-            signature_valid=signature_valid,
-        )
-        await hub.broadcast(
-            {
-                "type": "new_request",
-                "request": {
-                    "id": saved.id,
-                    "method": saved.method,
-                    "path": saved.path,
-                    "timestamp": saved.timestamp,
-                },
-            }
-        )
+        if forwarder is not None and deliveries is None:
+            resp = await forwarder.send(
+                request.method,
+                "/" + path,
+                headers=dict(request.headers),
+                params=dict(request.query_params),
+                content=body,
+            )
+            forwarded_status = resp.status_code
+            forwarded = time.perf_counter()
+            stages["forward"].observe(forwarded - checked)
+            checked = forwarded
+
+        # Acknowledged once queued; the storage writer commits in batches.
+        try:
+            saved = storage.enqueue(
+                method=request.method,
+                path="/" + path,
+                headers=dict(request.headers),
+                body=body,
+                query_params=dict(request.query_params),
+                forwarded_status=forwarded_status,
+                signature_valid=signature_valid,
+                deliver=deliveries is not None,
+            )
+        except queue.Full:
+            # The sender retries later instead of the relay buffering without limit.
+            raise HTTPException(
+                status_code=503, detail="Storage is falling behind", headers={"Retry-After": "1"}
+            ) from None
+        stages["store"].observe(time.perf_counter() - checked)
         return JSONResponse(
             status_code=200,
             content={"received": True, "id": saved.id, "signature_valid": signature_valid},
         )
 
     return app
+
+
+def app_from_env() -> FastAPI:
+    """Build the app from the JSON ``create_app`` arguments in ``CONFIG_ENV``.
+
+    ``webhook-relay --workers N`` runs this as a uvicorn factory in each worker.
+    """
+    config = json.loads(os.environ[CONFIG_ENV])
+    for key in ("storage_path", "event_bus"):
+        if config.get(key) is not None:
+            config[key] = Path(config[key])
+    if config.get("forward_settings") is not None:
+        config["forward_settings"] = ForwardSettings(**config["forward_settings"])
+    if config.get("delivery_settings") is not None:
+        config["delivery_settings"] = DeliverySettings(**config["delivery_settings"])
+    return create_app(**config)
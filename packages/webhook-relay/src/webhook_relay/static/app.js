@@ -1,34 +1,167 @@
+const viewport = document.getElementById("viewport");
+const spacer = document.getElementById("spacer");
 const rows = document.getElementById("rows");
 const details = document.getElementById("details");
+const filters = document.getElementById("filters");
 const refresh = document.getElementById("refresh");
+const delivery = document.getElementById("delivery");
+const metrics = document.getElementById("metrics");
+
+// Rows have a fixed height so only the ones in view need to exist in the DOM.
+const ROW_HEIGHT = 32;
+const OVERSCAN = 10;
+const PAGE_SIZE = 200;
+const HEAD_SIZE = 50;
+
+let items = [];
+let known = new Set();
+let nextCursor = null;
+let exhausted = false;
+let loading = false;
+let headRefresh = null;
+let headPending = false;
 let pollTimer = null;
 
-async function fetchRequests() {
-  const response = await fetch("/_relay/requests");
-  const data = await response.json();
-  rows.innerHTML = "";
-  data.forEach((item) => {
-    const tr = document.createElement("tr");
-    tr.innerHTML = `<td>${item.id}</td><td>${item.method}</td><td>${item.path}</td><td>${item.timestamp}</td>`;
-    tr.addEventListener("click", () => {
-      details.textContent = JSON.stringify(item, null, 2);
-    });
-    rows.appendChild(tr);
+function filterParams() {
+  const params = new URLSearchParams();
+  const form = new FormData(filters);
+  for (const [key, value] of form.entries()) {
+    if (value === "") continue;
+    if (key === "since" || key === "until") {
+      params.set(key, new Date(value).toISOString());
+    } else {
+      params.set(key, value);
+    }
+  }
+  return params;
+}
+
+async function fetchPage(limit, cursor) {
+  const params = filterParams();
+  params.set("limit", limit);
+  params.set("paged", "true");
+  if (cursor) params.set("cursor", cursor);
+  const response = await fetch(`/_relay/requests?${params}`);
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  return response.json();
+}
+
+async function loadMore() {
+  if (loading || exhausted) return;
+  loading = true;
+  try {
+    const page = await fetchPage(PAGE_SIZE, nextCursor);
+    const fresh = page.items.filter((item) => !known.has(item.id));
+    fresh.forEach((item) => known.add(item.id));
+    items = items.concat(fresh);
+    nextCursor = page.next_cursor;
+    exhausted = nextCursor === null;
+  } catch {
+    exhausted = true;
+  } finally {
+    loading = false;
+  }
+  render();
+}
+
+function reload() {
+  items = [];
+  known = new Set();
+  nextCursor = null;
+  exhausted = false;
+  viewport.scrollTop = 0;
+  render();
+  loadMore();
+}
+
+// Pull requests newer than the newest one shown, keeping the view in place.
+async function refreshHead() {
+  if (headRefresh) {
+    headPending = true;
+    return;
+  }
+  headRefresh = (async () => {
+    try {
+      const page = await fetchPage(HEAD_SIZE, null);
+      const stop = page.items.findIndex((item) => known.has(item.id));
+      if (stop === -1 && items.length > 0) {
+        reload();
+        return;
+      }
+      const fresh = stop === -1 ? page.items : page.items.slice(0, stop);
+      if (fresh.length === 0) return;
+      fresh.forEach((item) => known.add(item.id));
+      items = fresh.concat(items);
+      if (items.length === fresh.length) {
+        nextCursor = page.next_cursor;
+        exhausted = nextCursor === null;
+      }
+      if (viewport.scrollTop > 0) viewport.scrollTop += fresh.length * ROW_HEIGHT;
+      render();
+    } catch {
+      // The next event or poll tries again.
+    }
+  })();
+  await headRefresh;
+  headRefresh = null;
+  if (headPending) {
+    headPending = false;
+    refreshHead();
+  }
+}
+
+function renderRow(item) {
+  const row = document.createElement("div");
+  row.className = "grid item";
+  const status = item.forwarded_status === null ? "" : item.forwarded_status;
+  [item.id, item.method, item.path, item.timestamp, status].forEach((value) => {
+    const cell = document.createElement("span");
+    cell.textContent = value;
+    row.appendChild(cell);
   });
+  row.addEventListener("click", () => showDetails(item.id));
+  return row;
+}
+
+async function showDetails(id) {
+  const response = await fetch(`/_relay/requests/${id}`);
+  if (!response.ok) {
+    details.textContent = `Request ${id} is no longer stored.`;
+    return;
+  }
+  details.textContent = JSON.stringify(await response.json(), null, 2);
+}
+
+function render() {
+  spacer.style.height = `${items.length * ROW_HEIGHT}px`;
+  const top = viewport.scrollTop;
+  const first = Math.max(0, Math.floor(top / ROW_HEIGHT) - OVERSCAN);
+  const last = Math.min(
+    items.length,
+    Math.ceil((top + viewport.clientHeight) / ROW_HEIGHT) + OVERSCAN
+  );
+  rows.style.transform = `translateY(${first * ROW_HEIGHT}px)`;
+  rows.replaceChildren(...items.slice(first, last).map(renderRow));
+  if (!exhausted && last >= items.length - OVERSCAN) loadMore();
 }
 
-refresh.addEventListener("click", fetchRequests);
-fetchRequests();
+viewport.addEventListener("scroll", () => window.requestAnimationFrame(render));
+filters.addEventListener("submit", (event) => {
+  event.preventDefault();
+  reload();
+});
+refresh.addEventListener("click", reload);
+reload();
 
 function startPolling() {
   if (pollTimer !== null) return;
-  pollTimer = window.setInterval(fetchRequests, 2000);
+  pollTimer = window.setInterval(refreshHead, 2000);
 }
 
 function connectWebSocket() {
   const protocol = location.protocol === "https:" ? "wss" : "ws";
   const ws = new WebSocket(`${protocol}://${location.host}/_relay/ws`);
-  ws.addEventListener("message", fetchRequests);
+  ws.addEventListener("message", refreshHead);
   ws.addEventListener("error", startPolling);
   ws.addEventListener("close", startPolling);
 }
@@ -52,3 +185,60 @@ async function initRealtime() {
 }
 
 initRealtime();
+
+function formatMs(value) {
+  return value === null ? "-" : `${value} ms`;
+}
+
+async function updateDelivery() {
+  try {
+    const response = await fetch("/_relay/deliveries");
+    if (!response.ok) return;
+    const stats = await response.json();
+    if (!stats.enabled) return;
+    delivery.hidden = false;
+    delivery.textContent =
+      `Forward queue: ${stats.depth} waiting, ${stats.in_flight} sending, ` +
+      `${stats.delivered} delivered, ${stats.failed} failed. ` +
+      `Latency p50 ${formatMs(stats.latency_ms.p50)}, p99 ${formatMs(stats.latency_ms.p99)}`;
+    window.setTimeout(updateDelivery, 2000);
+  } catch {
+    // The relay is unreachable; the next page load tries again.
+  }
+}
+
+function formatBytes(value) {
+  const units = ["B", "KB", "MB", "GB"];
+  let index = 0;
+  while (value >= 1024 && index < units.length - 1) {
+    value /= 1024;
+    index += 1;
+  }
+  return `${value.toFixed(index ? 1 : 0)} ${units[index]}`;
+}
+
+async function updateMetrics() {
+  try {
+    const response = await fetch("/_relay/metrics?format=json");
+    if (!response.ok) return;
+    const stats = await response.json();
+    const stages = Object.entries(stats.stages)
+      .filter(([, stage]) => stage.count)
+      .map(([name, stage]) => `${name} ${formatMs(stage.p99_ms)}`);
+    let text =
+      `${stats.storage.rows} stored (${formatBytes(stats.storage.db_bytes)}), ` +
+      `${stats.queues.write} waiting to be written.`;
+    if (stages.length) text += ` Capture p99: ${stages.join(", ")}.`;
+    if (stats.forward && stats.forward.error_rate !== null) {
+      text += ` Forward errors ${(stats.forward.error_rate * 100).toFixed(1)}%.`;
+    }
+    metrics.hidden = false;
+    metrics.textContent = text;
+    window.setTimeout(updateMetrics, 5000);
+  } catch {
+    // The relay is unreachable; the next page load tries again.
+  }
+}
+
+updateDelivery();
+updateMetrics();
@@ -1,48 +1,374 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import hashlib
 import json
+import logging
+import os
+import queue
 import sqlite3
+import threading
+import time
 import uuid
+import zlib
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Union, overload
+
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Group commit: the background writer commits once per batch of this many
+# queued requests, or once the oldest queued request is this many seconds old.
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_BATCH_DELAY = 0.005
+# The writer queue holds this many batches; once it is full, enqueue raises ``queue.Full``.
+QUEUE_BATCHES = 64
+# Seconds before the writer retries a batch that failed to commit, doubling up to the maximum.
+WRITE_RETRY_DELAY = 0.1
+MAX_WRITE_RETRY_DELAY = 5.0
+# Read-only connections serving list/get while the writer commits.
+DEFAULT_READERS = 4
+# Seconds to wait for another process's write transaction on the same database.
+BUSY_TIMEOUT = 30.0
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Bodies larger than this many bytes are zlib-compressed when that saves space,
+# and bodies larger than the spill threshold are moved out to files.
+DEFAULT_COMPRESS_THRESHOLD = 1024
+DEFAULT_SPILL_THRESHOLD = 1024 * 1024
+# Fastest zlib level: webhook JSON shrinks nearly as much as at the default.
+COMPRESS_LEVEL = 1
+
+# How the ``body`` column holds a request body.
+IDENTITY = "identity"
+ZLIB = "zlib"
+FILE = "file"
+
+_COLUMNS = (
+    "id, timestamp, method, path, headers, body, query_params, forwarded_status, "
+    "signature_valid, body_encoding, body_size"
+)
+_SUMMARY_COLUMNS = "id, timestamp, method, path, forwarded_status, signature_valid, body_size"
+_INSERT = (
+    f"INSERT INTO requests ({_COLUMNS}, search_body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Full-text search covers the path, these headers plus every ``x-`` header, and
+# the first SEARCH_BODY_LIMIT bytes of the body. The index is contentless, so
+# removing a request re-derives its document; changing these orphans entries.
+# Spilled bodies keep their indexed prefix in ``search_body``, since the file
+# may be gone by the time the request is removed.
+SEARCH_HEADERS = ("content-type", "user-agent")
+SEARCH_BODY_LIMIT = 64 * 1024
+_SEARCH_INSERT = """
+INSERT INTO requests_fts (rowid, path, headers, body)
+VALUES ((SELECT rowid FROM requests WHERE id = ?), ?, ?, ?)
+"""
+_SEARCH_DELETE = """
+INSERT INTO requests_fts (requests_fts, rowid, path, headers, body) VALUES ('delete', ?, ?, ?, ?)
+"""
+# What removing a request needs: its search document and spilled body.
+_DOOMED_COLUMNS = "rowid, id, path, headers, body, body_encoding, search_body"
+_INSERT_DELIVERY = """
+INSERT OR IGNORE INTO deliveries (request_id, attempts, next_attempt, owner) VALUES (?, 0, ?, ?)
+"""
 
 
 @dataclass
 class StoredRequest:
+    """A captured request.
+
+    ``body`` holds the exact bytes received. It is ``None`` when the body was
+    spilled to a file and the request came from ``list`` or from ``page``
+    without ``load_bodies``; ``get`` always loads it. A body whose file has gone
+    missing is also ``None``, with a nonzero ``body_size``.
+    """
+
     id: str
     timestamp: str
     method: str
     path: str
     headers: Dict[str, Any]
-    body: str
+    body: Optional[bytes]
     query_params: Dict[str, Any]
     forwarded_status: Optional[int]
     signature_valid: Optional[bool]
+    body_size: int
+
+
+@dataclass
+class PendingDelivery:
+    """A captured request still waiting to be forwarded.
+
+    ``next_attempt`` is a Unix timestamp, so the schedule survives restarts.
+    """
+
+    request_id: str
+    attempts: int
+    next_attempt: float
+    last_error: Optional[str] = None
+
+
+@dataclass
+class ReplayResult:
+    """The outcome of replaying one request in a bulk replay.
+
+    ``status`` is the target's response code, or ``None`` with ``error`` set when
+    no response came back.
+    """
+
+    request_id: str
+    status: Optional[int]
+    error: Optional[str]
+    elapsed_ms: float
+    replayed_at: str
+
+
+@dataclass
+class RequestSummary:
+    """A stored request without its headers, query parameters and body."""
+
+    id: str
+    timestamp: str
+    method: str
+    path: str
+    forwarded_status: Optional[int]
+    signature_valid: Optional[bool]
+    body_size: int
+
+
+@dataclass
+class RequestFilter:
+    """Conditions on stored requests; ``None`` fields match everything.
+
+    ``since`` and ``until`` are ISO-8601 UTC timestamps as stored, inclusive and
+    exclusive respectively.
+    """
+
+    method: Optional[str] = None
+    path_prefix: Optional[str] = None
+    forwarded_status: Optional[int] = None
+    signature_valid: Optional[bool] = None
+    since: Optional[str] = None
+    until: Optional[str] = None
+
+    def where(self) -> tuple[List[str], List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if self.method is not None:
+            clauses.append("method = ?")
+            params.append(self.method.upper())
+        if self.path_prefix:
+            clauses.append("substr(path, 1, ?) = ?")
+            params.extend([len(self.path_prefix), self.path_prefix])
+        if self.forwarded_status is not None:
+            clauses.append("forwarded_status = ?")
+            params.append(self.forwarded_status)
+        if self.signature_valid is not None:
+            clauses.append("signature_valid = ?")
+            params.append(int(self.signature_valid))
+        if self.since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(self.since)
+        if self.until is not None:
+            clauses.append("timestamp < ?")
+            params.append(self.until)
+        return clauses, params
+
+
+def search_terms(text: str) -> str:
+    """An FTS5 query matching rows that contain every whitespace-separated term.
+
+    Each term is quoted, so ``ord-1234`` or ``user@example.com`` match as
+    written instead of being read as query syntax.
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+def _search_document(path: str, headers: Dict[str, Any], body: bytes) -> tuple[str, str, str]:
+    indexed = "\n".join(
+        f"{name}: {value}"
+        for name, value in headers.items()
+        if name in SEARCH_HEADERS or name.startswith("x-")
+    )
+    return path, indexed, body[:SEARCH_BODY_LIMIT].decode("utf-8", errors="replace")
+
+
+def _encode_cursor(timestamp: str, rowid: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp}|{rowid}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, rowid = raw.rsplit("|", 1)
+        return timestamp, int(rowid)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
 
 
 class RelayStorage:
-    def __init__(self, storage_path: Path | None, capacity: int) -> None:
+    """SQLite store of captured requests, newest ``capacity`` kept.
+
+    ``insert`` writes and commits before returning. ``enqueue`` hands the row
+    to a background writer thread that commits queued rows in groups, so a
+    burst of requests costs one commit (and one fsync) per batch instead of
+    one per request. A batch that fails to commit is retried until it succeeds,
+    and ``on_commit``, if set, is called from the writer thread with each batch
+    once it is committed. The queue is bounded, so a writer that falls behind
+    makes ``enqueue`` fail instead of buffering without limit. Reads wait for
+    the requests queued before them, but not for those queued while they wait,
+    so a burst delays a read by at most one queue's worth of commits. ``get``
+    and the delivery methods wait only for the request they name.
+
+    Requests enqueued with ``deliver=True`` also get a row in ``deliveries``,
+    committed in the same batch, which stays until ``finish_delivery``. That
+    table is the durable backlog of the queued forwarder.
+
+    Bodies are stored as raw bytes, compressed past ``compress_threshold``.
+    With a file database, bodies past ``spill_threshold`` go to content-addressed
+    files in a ``<database>-bodies`` directory next to it and are only read by
+    ``get``.
+
+    Where SQLite has FTS5, ``search`` runs over a full-text index of each
+    request's path, selected headers and body, updated in the same transaction
+    as the rows it covers.
+
+    File databases use WAL journaling and a pool of ``readers`` read-only
+    connections, so reads run alongside commits instead of queueing behind
+    them. All methods block; async callers should run them in a thread.
+
+    Several processes may open the same file. Writes take SQLite's write lock
+    up front (``BEGIN IMMEDIATE``), and the row count used for pruning is kept
+    in the database, so concurrent writers prune exactly the overflow between
+    them. Processes started together share a ``run_id``; see ``claim_deliveries``.
+    """
+
+    def __init__(
+        self,
+        storage_path: Path | None,
+        capacity: int,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_delay: float = DEFAULT_BATCH_DELAY,
+        readers: int = DEFAULT_READERS,
+        compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+        spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+        run_id: Optional[str] = None,
+    ) -> None:
         db_path = str(storage_path) if storage_path else ":memory:"
+        self.run_id = run_id or uuid.uuid4().hex
+        # Owner of the deliveries this process queues.
+        self.owner = f"{self.run_id}/{uuid.uuid4().hex[:12]}"
         self.capacity = capacity
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS requests (
-              id TEXT PRIMARY KEY,
-              timestamp TEXT NOT NULL,
-              method TEXT NOT NULL,
-              path TEXT NOT NULL,
-              headers TEXT NOT NULL,
-              body TEXT NOT NULL,
-              query_params TEXT NOT NULL,
-              forwarded_status INTEGER,
-              signature_valid INTEGER
-            )
-            """
+        self.compress_threshold = compress_threshold
+        self.spill_threshold = spill_threshold
+        self.body_dir: Optional[Path] = (
+            Path(storage_path).with_name(Path(storage_path).name + "-bodies")
+            if storage_path
+            else None
+        )
+        self.batch_size = max(1, batch_size)
+        self.batch_delay = max(0.0, batch_delay)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=BUSY_TIMEOUT)
+        # The connection is shared with the writer thread.
+        self._lock = threading.Lock()
+        self._pending: queue.Queue[Optional[tuple[int, StoredRequest, bool]]] = queue.Queue(
+            maxsize=self.batch_size * QUEUE_BATCHES
         )
-        self.conn.commit()
+        self._writer: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+        self.on_commit: Optional[Callable[[List[StoredRequest]], None]] = None
+        # Queued requests are numbered in queue order. The writer publishes the
+        # last number it committed, so a caller waits only for what came before it.
+        self._enqueue_lock = threading.Lock()
+        self._enqueued = 0
+        self._committed = 0
+        self._commit_done = threading.Condition()
+        self._uncommitted: Dict[str, int] = {}
+        # Time per write transaction, observed by whichever thread commits.
+        self.commit_latency = Histogram()
+        self.db_path = Path(storage_path) if storage_path else None
+        if storage_path:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last commits on power loss, never corruption.
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        # One transaction, so processes opening a new file together create it once.
+        with self._transaction():
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS requests (
+                  id TEXT PRIMARY KEY,
+                  timestamp TEXT NOT NULL,
+                  method TEXT NOT NULL,
+                  path TEXT NOT NULL,
+                  headers TEXT NOT NULL,
+                  body BLOB NOT NULL,
+                  query_params TEXT NOT NULL,
+                  forwarded_status INTEGER,
+                  signature_valid INTEGER,
+                  body_encoding TEXT NOT NULL DEFAULT 'identity',
+                  body_size INTEGER NOT NULL DEFAULT 0,
+                  search_body BLOB
+                )
+                """
+            )
+            self._migrate()
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS replay_results (
+                  job_id TEXT NOT NULL,
+                  request_id TEXT NOT NULL,
+                  status INTEGER,
+                  error TEXT,
+                  elapsed_ms REAL NOT NULL,
+                  replayed_at TEXT NOT NULL,
+                  PRIMARY KEY (job_id, request_id)
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS requests_timestamp ON requests (timestamp)"
+            )
+            # Finds the other requests sharing a spilled body before its file is removed.
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS requests_spilled ON requests (body) "
+                "WHERE body_encoding = 'file'"
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS deliveries (
+                  request_id TEXT PRIMARY KEY,
+                  attempts INTEGER NOT NULL,
+                  next_attempt REAL NOT NULL,
+                  last_error TEXT,
+                  owner TEXT
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS relay_meta "
+                "(key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            # Rows stored, so pruning only runs (and only deletes) when over capacity.
+            self.conn.execute(
+                "INSERT OR IGNORE INTO relay_meta VALUES ('count', (SELECT COUNT(*) FROM requests))"
+            )
+            self.searchable = self._create_search_index()
+        # An in-memory database exists only on ``conn``, so reads share it then.
+        self._reader_count = max(0, readers) if storage_path else 0
+        self._readers: queue.Queue[sqlite3.Connection] = queue.Queue()
+        if self._reader_count:
+            uri = Path(storage_path).resolve().as_uri() + "?mode=ro"
+            for _ in range(self._reader_count):
+                self._readers.put(sqlite3.connect(uri, uri=True, check_same_thread=False))
+        self._writer = threading.Thread(target=self._write_loop, name="relay-writer", daemon=True)
+        self._writer.start()
 
     def insert(
         self,
@@ -50,35 +376,200 @@ class RelayStorage:
         method: str,
         path: str,
         headers: Dict[str, Any],
-        body: str,
+        body: bytes,
         query_params: Dict[str, Any],
         forwarded_status: Optional[int],
         signature_valid: Optional[bool],
     ) -> StoredRequest:
-        request_id = uuid.uuid4().hex
-        now = datetime.now(timezone.utc).isoformat()
-        self.conn.execute(
-            """
-            INSERT INTO requests (id, timestamp, method, path, headers, body, query_params, forwarded_status, signature_valid)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                request_id,
-                now,
-                method,
-                path,
-                json.dumps(headers),
-                body,
-                json.dumps(query_params),
-                forwarded_status,
-                int(signature_valid) if signature_valid is not None else None,
-            ),
+        item = self._new_request(
+            method=method,
+            path=path,
+            headers=headers,
+            body=body,
+            query_params=query_params,
+            forwarded_status=forwarded_status,
+            signature_valid=signature_valid,
         )
-        self.conn.commit()
-        self._prune()
+        self._write_batch([(item, False)])
+        return item
+
+    def enqueue(
+        self,
+        *,
+        method: str,
+        path: str,
+        headers: Dict[str, Any],
+        body: bytes,
+        query_params: Dict[str, Any],
+        forwarded_status: Optional[int],
+        signature_valid: Optional[bool],
+        deliver: bool = False,
+    ) -> StoredRequest:
+        """Queue a request for the background writer and return it without waiting for disk.
+
+        With ``deliver``, the request is also added to the delivery backlog.
+        Raises ``queue.Full`` at once when the queue has no room, so async callers
+        never block on it.
+        """
+        item = self._new_request(
+            method=method,
+            path=path,
+            headers=headers,
+            body=body,
+            query_params=query_params,
+            forwarded_status=forwarded_status,
+            signature_valid=signature_valid,
+        )
+        with self._enqueue_lock:
+            self._pending.put_nowait((self._enqueued + 1, item, deliver))
+            self._enqueued += 1
+            self._uncommitted[item.id] = self._enqueued
+        return item
+
+    def flush(self) -> None:
+        """Block until every request queued before the call is committed."""
+        self._wait_for(self._enqueued)
+
+    def _wait_for(self, sequence: int) -> None:
+        with self._commit_done:
+            self._commit_done.wait_for(lambda: self._committed >= sequence)
+
+    def _wait_for_request(self, request_id: str) -> None:
+        # Only a request this process queued can be waiting for the writer.
+        sequence = self._uncommitted.get(request_id)
+        if sequence is not None:
+            self._wait_for(sequence)
+
+    def close(self) -> None:
+        """Commit queued requests, stop the writer and close the database."""
+        if self._writer is not None:
+            self._closing.set()
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+        for _ in range(self._reader_count):
+            self._readers.get().close()
+        self._reader_count = 0
+        self.conn.close()
+
+    @property
+    def queued(self) -> int:
+        """Requests enqueued but not yet committed."""
+        return self._pending.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Committed rows and database size, without waiting for the writer."""
+        queued = self.queued
+        with self._reading(flush=False) as conn:
+            rows = conn.execute("SELECT value FROM relay_meta WHERE key = 'count'").fetchone()[0]
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        db_bytes = pages * page_size
+        if self.db_path is not None:
+            wal = self.db_path.with_name(self.db_path.name + "-wal")
+            db_bytes += wal.stat().st_size if wal.exists() else 0
+        return {"rows": rows, "db_bytes": db_bytes, "queued": queued}
+
+    def _migrate(self) -> None:
+        # Databases from before binary bodies store them as UTF-8 TEXT.
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(requests)")}
+        if "body_encoding" not in columns:
+            self.conn.execute(
+                "ALTER TABLE requests ADD COLUMN body_encoding TEXT NOT NULL DEFAULT 'identity'"
+            )
+            self.conn.execute(
+                "ALTER TABLE requests ADD COLUMN body_size INTEGER NOT NULL DEFAULT 0"
+            )
+            self.conn.execute("UPDATE requests SET body_size = length(CAST(body AS BLOB))")
+        # Spilled bodies from before their search text was kept beside them.
+        if "search_body" not in columns:
+            self.conn.execute("ALTER TABLE requests ADD COLUMN search_body BLOB")
+            rows = self.conn.execute(
+                "SELECT rowid, body FROM requests WHERE body_encoding = ?", (FILE,)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE requests SET search_body = ? WHERE rowid = ?",
+                [
+                    (zlib.compress(prefix, COMPRESS_LEVEL), rowid)
+                    for rowid, value in rows
+                    if (prefix := self._body_prefix(value, FILE, SEARCH_BODY_LIMIT))
+                ],
+            )
+        # Delivery backlogs from before deliveries had owners.
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(deliveries)")}
+        if columns and "owner" not in columns:
+            self.conn.execute("ALTER TABLE deliveries ADD COLUMN owner TEXT")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock at BEGIN, so another process cannot
+        # write between this transaction's reads and its writes.
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
+    def _create_search_index(self) -> bool:
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'requests_fts'"
+        ).fetchone()
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts "
+                "USING fts5(path, headers, body, content='')"
+            )
+        except sqlite3.OperationalError:
+            logger.warning("SQLite was built without FTS5; search is disabled")
+            return False
+        if not exists:
+            # Index requests stored before search existed.
+            rows = self.conn.execute(f"SELECT {_DOOMED_COLUMNS} FROM requests")
+            self.conn.executemany(
+                "INSERT INTO requests_fts (rowid, path, headers, body) VALUES (?, ?, ?, ?)",
+                ((row[0], *self._stored_document(row)) for row in rows),
+            )
+        return True
+
+    def _stored_document(self, row: tuple[Any, ...]) -> tuple[str, str, str]:
+        # The search document of a _DOOMED_COLUMNS row, as it was indexed.
+        if row[6] is not None:
+            body = zlib.decompress(row[6])
+        else:
+            body = self._body_prefix(row[4], row[5], SEARCH_BODY_LIMIT)
+        return _search_document(row[2], json.loads(row[3]), body)
+
+    @contextmanager
+    def _reading(self, *, flush: bool = True) -> Iterator[sqlite3.Connection]:
+        if flush:
+            self.flush()
+        if not self._reader_count:
+            with self._lock:
+                yield self.conn
+            return
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _new_request(
+        self,
+        *,
+        method: str,
+        path: str,
+        headers: Dict[str, Any],
+        body: bytes,
+        query_params: Dict[str, Any],
+        forwarded_status: Optional[int],
+        signature_valid: Optional[bool],
+    ) -> StoredRequest:
         return StoredRequest(
-            id=request_id,
-            timestamp=now,
+            id=uuid.uuid4().hex,
+            timestamp=datetime.now(timezone.utc).isoformat(),
             method=method,
             path=path,
             headers=headers,
@@ -86,59 +577,468 @@ class RelayStorage:
             query_params=query_params,
             forwarded_status=forwarded_status,
             signature_valid=signature_valid,
+            body_size=len(body),
         )
 
-    def _prune(self) -> None:
-        self.conn.execute(
-            """
-            DELETE FROM requests
-            WHERE id IN (
-              SELECT id FROM requests
-              ORDER BY timestamp DESC
-              LIMIT -1 OFFSET ?
-            )
-            """,
-            (self.capacity,),
+    def _write_loop(self) -> None:
+        while True:
+            entry = self._pending.get()
+            if entry is None:
+                return
+            batch = [entry]
+            stopping = False
+            deadline = time.monotonic() + self.batch_delay
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            if self._commit(batch) and self.on_commit is not None:
+                try:
+                    self.on_commit([item for _, item, _ in batch])
+                except Exception:
+                    logger.exception("Commit listener failed")
+            if stopping:
+                return
+
+    def _commit(self, batch: List[tuple[int, StoredRequest, bool]]) -> bool:
+        # These requests were already acknowledged, so a failed batch is retried
+        # rather than dropped; meanwhile the queue fills and enqueue refuses more.
+        delay = WRITE_RETRY_DELAY
+        while True:
+            try:
+                self._write_batch([(item, deliver) for _, item, deliver in batch])
+                break
+            except Exception:
+                if self._closing.is_set():
+                    logger.exception("Lost %d captured requests at shutdown", len(batch))
+                    return False
+                logger.exception(
+                    "Failed to store %d captured requests; retrying in %.1fs", len(batch), delay
+                )
+            # Woken early by close, which then gets one last attempt.
+            self._closing.wait(delay)
+            delay = min(delay * 2, MAX_WRITE_RETRY_DELAY)
+        with self._commit_done:
+            self._committed = batch[-1][0]
+            for _, item, _ in batch:
+                self._uncommitted.pop(item.id, None)
+            self._commit_done.notify_all()
+        return True
+
+    def _write_batch(self, batch: List[tuple[StoredRequest, bool]]) -> None:
+        now = time.time()
+        # Compression and spill files happen before taking the lock.
+        rows = [self._model_to_row(item) for item, _ in batch]
+        documents = [
+            (item.id, *_search_document(item.path, item.headers, item.body or b""))
+            for item, _ in batch
+        ]
+        started = time.perf_counter()
+        with self._transaction() as conn:
+            self._restore_spilled(batch, rows)
+            conn.executemany(_INSERT, rows)
+            if self.searchable:
+                conn.executemany(_SEARCH_INSERT, documents)
+            conn.executemany(
+                _INSERT_DELIVERY,
+                [(item.id, now, self.owner) for item, deliver in batch if deliver],
+            )
+            conn.execute(
+                "UPDATE relay_meta SET value = value + ? WHERE key = 'count'", (len(batch),)
+            )
+            doomed = self._prune()
+        self.commit_latency.observe(time.perf_counter() - started)
+        self._remove_bodies(doomed)
+
+    def _restore_spilled(
+        self, batch: List[tuple[StoredRequest, bool]], rows: List[tuple[Any, ...]]
+    ) -> None:
+        # Another process may have removed a shared body file between _spill
+        # and this transaction; with the write lock held it cannot happen again.
+        for (item, _), row in zip(batch, rows):
+            if row[9] == FILE and not self._body_path(row[5]).exists():
+                self._spill(item.body or b"")
+
+    def _model_to_row(self, item: StoredRequest) -> tuple[Any, ...]:
+        body, encoding = self._encode_body(item.body or b"")
+        return (
+            item.id,
+            item.timestamp,
+            item.method,
+            item.path,
+            json.dumps(item.headers),
+            body,
+            json.dumps(item.query_params),
+            item.forwarded_status,
+            int(item.signature_valid) if item.signature_valid is not None else None,
+            encoding,
+            item.body_size,
+            # What the search index holds, for when the spilled file is gone.
+            zlib.compress((item.body or b"")[:SEARCH_BODY_LIMIT], COMPRESS_LEVEL)
+            if encoding == FILE
+            else None,
         )
-        self.conn.commit()
 
-    def list(self) -> List[StoredRequest]:
+    def _encode_body(self, body: bytes) -> tuple[bytes | str, str]:
+        if self.body_dir is not None and len(body) > self.spill_threshold:
+            return self._spill(body), FILE
+        if len(body) > self.compress_threshold:
+            packed = zlib.compress(body, COMPRESS_LEVEL)
+            if len(packed) < len(body):
+                return packed, ZLIB
+        return body, IDENTITY
+
+    def _decode_body(self, value: Any, encoding: str, *, load: bool = True) -> Optional[bytes]:
+        if encoding == FILE:
+            if not load:
+                return None
+            try:
+                return zlib.decompress(self._body_path(value).read_bytes())
+            except FileNotFoundError:
+                logger.warning("Spilled body %s is missing", value)
+                return None
+        if isinstance(value, str):
+            # Stored as TEXT before bodies became bytes.
+            value = value.encode("utf-8")
+        if encoding == ZLIB:
+            return zlib.decompress(value)
+        return value
+
+    def _body_prefix(self, value: Any, encoding: str, limit: int) -> bytes:
+        # Up to ``limit`` bytes of a stored body, decompressing no further.
+        if encoding == FILE:
+            try:
+                value = self._body_path(value).read_bytes()
+            except FileNotFoundError:
+                return b""
+            return zlib.decompressobj().decompress(value, limit)
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if encoding == ZLIB:
+            return zlib.decompressobj().decompress(value, limit)
+        return value[:limit]
+
+    def _body_path(self, digest: str) -> Path:
+        assert self.body_dir is not None
+        return self.body_dir / digest[:2] / digest
+
+    def _spill(self, body: bytes) -> str:
+        # Named by content, so identical bodies share one file.
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._body_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(f"{digest}.{uuid.uuid4().hex}.tmp")
+            partial.write_bytes(zlib.compress(body, COMPRESS_LEVEL))
+            os.replace(partial, path)
+        return digest
+
+    def _remove_bodies(self, digests: List[str]) -> None:
+        # Called once the transaction that deleted the rows has committed, so a
+        # rollback never leaves rows pointing at removed files. Its own write
+        # transaction keeps other processes from storing the same body meanwhile;
+        # a crash in between only leaves an unused file behind.
+        if not digests:
+            return
+        with self._transaction() as conn:
+            for digest in set(digests):
+                shared = conn.execute(
+                    "SELECT 1 FROM requests WHERE body_encoding = 'file' AND body = ? LIMIT 1",
+                    (digest,),
+                ).fetchone()
+                if shared is None:
+                    self._body_path(digest).unlink(missing_ok=True)
+
+    def _prune(self) -> List[str]:
+        # Delete just the overflow, oldest first, walking the timestamp index:
+        # the cost follows the batch size, not the capacity.
+        count = self.conn.execute("SELECT value FROM relay_meta WHERE key = 'count'").fetchone()[0]
+        excess = count - self.capacity
+        if excess <= 0:
+            return []
         rows = self.conn.execute(
-            """
-            SELECT id, timestamp, method, path, headers, body, query_params, forwarded_status, signature_valid
-            FROM requests
-            ORDER BY timestamp DESC
-            """
+            f"SELECT {_DOOMED_COLUMNS} FROM requests ORDER BY timestamp LIMIT ?", (excess,)
         ).fetchall()
-        return [self._row_to_model(row) for row in rows]
+        return self._delete_rows(rows)
+
+    def _delete_rows(self, rows: List[tuple[Any, ...]]) -> List[str]:
+        """Delete _DOOMED_COLUMNS ``rows`` with their search entries and pending
+        deliveries. Returns their spilled body digests for ``_remove_bodies``."""
+        # Undelivered requests that leave the store can no longer be sent.
+        self.conn.executemany(
+            "DELETE FROM deliveries WHERE request_id = ?", [(row[1],) for row in rows]
+        )
+        if self.searchable:
+            self.conn.executemany(
+                _SEARCH_DELETE, [(row[0], *self._stored_document(row)) for row in rows]
+            )
+        self.conn.executemany("DELETE FROM requests WHERE rowid = ?", [(row[0],) for row in rows])
+        self.conn.execute(
+            "UPDATE relay_meta SET value = value - ? WHERE key = 'count'", (len(rows),)
+        )
+        return [row[4] for row in rows if row[5] == FILE]
+
+    def list(self) -> List[StoredRequest]:
+        """Every stored request, newest first; spilled bodies are left unloaded."""
+        with self._reading() as conn:
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM requests ORDER BY timestamp DESC"
+            ).fetchall()
+        return [self._row_to_model(row, load_body=False) for row in rows]
+
+    @overload
+    def page(
+        self,
+        *,
+        filters: Optional[RequestFilter] = ...,
+        limit: int = ...,
+        cursor: Optional[str] = ...,
+        include_body: Literal[False] = ...,
+        oldest_first: bool = ...,
+        load_bodies: bool = ...,
+    ) -> tuple[List[RequestSummary], Optional[str]]: ...
+
+    @overload
+    def page(
+        self,
+        *,
+        filters: Optional[RequestFilter] = ...,
+        limit: int = ...,
+        cursor: Optional[str] = ...,
+        include_body: Literal[True],
+        oldest_first: bool = ...,
+        load_bodies: bool = ...,
+    ) -> tuple[List[StoredRequest], Optional[str]]: ...
+
+    @overload
+    def page(
+        self,
+        *,
+        filters: Optional[RequestFilter] = ...,
+        limit: int = ...,
+        cursor: Optional[str] = ...,
+        include_body: bool,
+        oldest_first: bool = ...,
+        load_bodies: bool = ...,
+    ) -> tuple[List[Union[StoredRequest, RequestSummary]], Optional[str]]: ...
+
+    def page(
+        self,
+        *,
+        filters: Optional[RequestFilter] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        include_body: bool = False,
+        oldest_first: bool = False,
+        load_bodies: bool = False,
+    ) -> tuple[Any, Optional[str]]:
+        """Newest-first (or ``oldest_first``) requests matching ``filters``, after ``cursor``.
+
+        Keyset pagination on ``(timestamp, rowid)`` walks the timestamp index, so
+        every page costs the same however deep it is. Returns the page and the
+        cursor of the next one (``None`` on the last page). Only summaries are
+        read unless ``include_body`` is set. Spilled bodies are read from their
+        files only with ``load_bodies``, which costs a file read per large body.
+        """
+        clauses, params = (filters or RequestFilter()).where()
+        if cursor:
+            timestamp, rowid = _decode_cursor(cursor)
+            # A row-value comparison, unlike the equivalent OR, seeks the index.
+            clauses.append(f"(timestamp, rowid) {'>' if oldest_first else '<'} (?, ?)")
+            params.extend([timestamp, rowid])
+        columns = _COLUMNS if include_body else _SUMMARY_COLUMNS
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        direction = "ASC" if oldest_first else "DESC"
+        with self._reading() as conn:
+            rows = conn.execute(
+                f"SELECT rowid, {columns} FROM requests {where} "
+                f"ORDER BY timestamp {direction}, rowid {direction} LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1][2], rows[-1][0])
+        if include_body:
+            return [self._row_to_model(row[1:], load_body=load_bodies) for row in rows], next_cursor
+        return [self._row_to_summary(row[1:]) for row in rows], next_cursor
+
+    def count(self, filters: Optional[RequestFilter] = None) -> int:
+        clauses, params = (filters or RequestFilter()).where()
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._reading() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM requests {where}", params).fetchone()[0]
+
+    def search(
+        self, query: str, *, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0
+    ) -> tuple[List[RequestSummary], Optional[int]]:
+        """Requests matching the FTS5 ``query``, best match (BM25) first.
+
+        Returns the page and the offset of the next one (``None`` on the last
+        page). Raises ``ValueError`` for a malformed query and ``RuntimeError``
+        when SQLite lacks FTS5; ``search_terms`` builds a query from plain text.
+        """
+        if not self.searchable:
+            raise RuntimeError("Search needs an SQLite build with FTS5")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        columns = ", ".join(f"r.{name}" for name in _SUMMARY_COLUMNS.split(", "))
+        with self._reading() as conn:
+            try:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM requests_fts "
+                    "JOIN requests AS r ON r.rowid = requests_fts.rowid "
+                    "WHERE requests_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+                    (query, limit + 1, max(0, offset)),
+                ).fetchall()
+            except sqlite3.OperationalError as exc:
+                raise ValueError(f"Invalid search query: {exc}") from exc
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = max(0, offset) + limit
+        return [self._row_to_summary(row) for row in rows], next_offset
 
     def get(self, request_id: str) -> Optional[StoredRequest]:
-        row = self.conn.execute(
-            """
-            SELECT id, timestamp, method, path, headers, body, query_params, forwarded_status, signature_valid
-            FROM requests
-            WHERE id = ?
-            """,
-            (request_id,),
-        ).fetchone()
+        self._wait_for_request(request_id)
+        with self._reading(flush=False) as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM requests WHERE id = ?", (request_id,)
+            ).fetchone()
         if not row:
             return None
         return self._row_to_model(row)
 
     def delete(self, request_id: str) -> bool:
-        cur = self.conn.execute("DELETE FROM requests WHERE id = ?", (request_id,))
-        self.conn.commit()
-        return cur.rowcount > 0
+        self._wait_for_request(request_id)
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT {_DOOMED_COLUMNS} FROM requests WHERE id = ?", (request_id,)
+            ).fetchall()
+            doomed = self._delete_rows(rows)
+        self._remove_bodies(doomed)
+        return bool(rows)
+
+    def record_replays(self, job_id: str, results: List[ReplayResult]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO replay_results
+                  (job_id, request_id, status, error, elapsed_ms, replayed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (job_id, r.request_id, r.status, r.error, r.elapsed_ms, r.replayed_at)
+                    for r in results
+                ],
+            )
+
+    def replay_results(
+        self,
+        job_id: str,
+        *,
+        failed_only: bool = False,
+        limit: int = DEFAULT_PAGE_SIZE,
+        offset: int = 0,
+    ) -> List[ReplayResult]:
+        """Recorded results of a bulk replay, in the order they finished."""
+        failed = " AND (status IS NULL OR status >= 400)" if failed_only else ""
+        with self._reading() as conn:
+            rows = conn.execute(
+                "SELECT request_id, status, error, elapsed_ms, replayed_at FROM replay_results "
+                f"WHERE job_id = ?{failed} ORDER BY rowid LIMIT ? OFFSET ?",
+                (job_id, max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset)),
+            ).fetchall()
+        return [ReplayResult(*row) for row in rows]
+
+    def pending_deliveries(self) -> List[PendingDelivery]:
+        """The whole delivery backlog, whoever owns it, soonest attempt first."""
+        with self._reading() as conn:
+            rows = conn.execute(
+                """
+                SELECT request_id, attempts, next_attempt, last_error
+                FROM deliveries
+                ORDER BY next_attempt
+                """
+            ).fetchall()
+        return [PendingDelivery(*row) for row in rows]
+
+    def claim_deliveries(self) -> List[PendingDelivery]:
+        """Take over deliveries left by earlier runs; return all this process owns.
+
+        Deliveries owned by processes of the same ``run_id`` (sibling workers)
+        are theirs to send, so each pending request is sent by one process.
+        """
+        self.flush()
+        prefix = self.run_id + "/"
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE deliveries SET owner = ? WHERE owner IS NULL OR substr(owner, 1, ?) != ?",
+                (self.owner, len(prefix), prefix),
+            )
+            rows = conn.execute(
+                """
+                SELECT request_id, attempts, next_attempt, last_error
+                FROM deliveries
+                WHERE owner = ?
+                ORDER BY next_attempt
+                """,
+                (self.owner,),
+            ).fetchall()
+        return [PendingDelivery(*row) for row in rows]
+
+    def retry_delivery(
+        self, request_id: str, *, attempts: int, next_attempt: float, error: str
+    ) -> None:
+        """Record a failed attempt and when to try again."""
+        self._wait_for_request(request_id)
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE deliveries SET attempts = ?, next_attempt = ?, last_error = ?
+                WHERE request_id = ?
+                """,
+                (attempts, next_attempt, error, request_id),
+            )
+
+    def finish_delivery(self, request_id: str, forwarded_status: Optional[int]) -> None:
+        """Drop a request from the backlog, storing the target's final status if any."""
+        # The request row may still be queued for the writer.
+        self._wait_for_request(request_id)
+        with self._transaction() as conn:
+            if forwarded_status is not None:
+                conn.execute(
+                    "UPDATE requests SET forwarded_status = ? WHERE id = ?",
+                    (forwarded_status, request_id),
+                )
+            conn.execute("DELETE FROM deliveries WHERE request_id = ?", (request_id,))
+
+    def _row_to_summary(self, row: tuple[Any, ...]) -> RequestSummary:
+        return RequestSummary(
+            id=row[0],
+            timestamp=row[1],
+            method=row[2],
+            path=row[3],
+            forwarded_status=row[4],
+            signature_valid=None if row[5] is None else bool(row[5]),
+            body_size=row[6],
+        )
 
-    def _row_to_model(self, row: tuple[Any, ...]) -> StoredRequest:
+    def _row_to_model(self, row: tuple[Any, ...], *, load_body: bool = True) -> StoredRequest:
         return StoredRequest(
             id=row[0],
             timestamp=row[1],
             method=row[2],
             path=row[3],
             headers=json.loads(row[4]),
-            body=row[5],
+            body=self._decode_body(row[5], row[9], load=load_body),
             query_params=json.loads(row[6]),
             forwarded_status=row[7],
             signature_valid=(None if row[8] is None else bool(row[8])),
+            body_size=row[10],
         )
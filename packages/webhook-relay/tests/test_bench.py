@@ -0,0 +1,42 @@
+from dataclasses import replace
+
+from webhook_relay.bench import (
+    SIGNATURES,
+    compare,
+    results_document,
+    run_benchmarks,
+    signed_headers,
+    synthetic_body,
+)
+from webhook_relay.signatures import validate_signature
+
+
+def test_synthetic_load_is_reproducible_and_signed() -> None:
+    body = synthetic_body(5000, seed=3)
+    assert len(body) == 5000 and body == synthetic_body(5000, seed=3)
+    for provider in SIGNATURES[1:]:
+        assert validate_signature(provider, "bench-secret", signed_headers(provider, body), body)
+
+
+def test_benchmark_cases_run_and_compare_against_a_baseline() -> None:
+    results = list(
+        run_benchmarks(
+            body_sizes=[512],
+            signatures=["github"],
+            forwards=["inline", "queued"],
+            subscribers=[3],
+            requests=40,
+            warmup=5,
+            concurrency=4,
+        )
+    )
+    assert [r.case for r in results] == [
+        "inprocess/file/body=512/sig=github/forward=inline/ws=3",
+        "inprocess/file/body=512/sig=github/forward=queued/ws=3",
+    ]
+    assert all(r.errors == 0 and r.requests_per_second > 0 and r.p99_ms > 0 for r in results)
+
+    baseline = results_document(results, {})
+    assert [c.regressed for c in compare(baseline, results)] == [False, False]
+    slower = [replace(results[0], seconds=results[0].seconds * 2)]
+    assert [c.regressed for c in compare(baseline, slower)] == [True]
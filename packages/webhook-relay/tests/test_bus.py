@@ -0,0 +1,83 @@
+import asyncio
+
+from webhook_relay import bus as bus_module
+from webhook_relay.bus import MAX_EVENT_LINE, EventBroker, EventBus
+
+
+async def _joined(broker: EventBroker, peers: int) -> None:
+    # connect() returns before the broker's loop has registered the peer.
+    for _ in range(100):
+        if len(broker._peers) == peers:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_broker_relays_events_to_other_workers(tmp_path) -> None:
+    broker = EventBroker(tmp_path / "bus.sock")
+    broker.start()
+
+    async def run() -> tuple[list, list, list]:
+        received: tuple[list, list, list] = ([], [], [])
+        buses = [EventBus(broker.path, received[i].append) for i in range(3)]
+        for bus in buses:
+            await bus.connect()
+        await _joined(broker, 3)
+        buses[0].publish('{"n": 1}')
+        buses[1].publish('{"n": 2}')
+        for _ in range(100):
+            if sum(map(len, received)) == 4:
+                break
+            await asyncio.sleep(0.01)
+        for bus in buses:
+            await bus.close()
+        return received
+
+    try:
+        first, second, third = asyncio.run(run())
+    finally:
+        broker.stop()
+    assert first == ['{"n": 2}']
+    assert second == ['{"n": 1}']
+    assert sorted(third) == ['{"n": 1}', '{"n": 2}']
+    assert not broker.path.exists()
+
+
+def test_bus_skips_oversized_lines_and_reconnects(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(bus_module, "RECONNECT_DELAY", 0.01)
+    brokers = [EventBroker(tmp_path / "bus.sock")]
+    brokers[0].start()
+
+    async def run() -> list:
+        received: list = []
+        sender = EventBus(brokers[0].path, lambda line: None)
+        listener = EventBus(brokers[0].path, received.append)
+        await sender.connect()
+        await listener.connect()
+        await _joined(brokers[0], 2)
+        # Written raw, since publish refuses lines this long.
+        sender._writer.write(b"x" * (2 * MAX_EVENT_LINE) + b"\n")
+        await sender._writer.drain()
+        sender.publish("after")
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+
+        brokers[0].stop()
+        brokers.append(EventBroker(brokers[0].path))
+        brokers[1].start()
+        await _joined(brokers[1], 2)
+        sender.publish("reconnected")
+        for _ in range(100):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await sender.close()
+        await listener.close()
+        return received
+
+    try:
+        received = asyncio.run(run())
+    finally:
+        brokers[-1].stop()
+    assert received == ["after", "reconnected"]
@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+from webhook_relay.forwarding import DeliveryQueue, DeliverySettings, Forwarder, ForwardSettings
+from webhook_relay.storage import RelayStorage, StoredRequest
+
+
+def test_forwarder_reuses_one_client_and_counts_requests() -> None:
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, str(request.url), request.content))
+        return httpx.Response(202 if request.url.path == "/base/ok" else 500)
+
+    async def run() -> dict:
+        forwarder = Forwarder(
+            "http://target.test/base/",
+            ForwardSettings(max_connections=4),
+            transport=httpx.MockTransport(handler),
+        )
+        client = forwarder.client
+        statuses = []
+        for path in ("/ok", "/fail"):
+            response = await forwarder.send(
+                "POST", path, headers={}, params={"a": "1"}, content=b"x"
+            )
+            statuses.append(response.status_code)
+        assert forwarder.client is client
+        assert statuses == [202, 500]
+        stats = forwarder.stats()
+        await forwarder.aclose()
+        return stats
+
+    stats = asyncio.run(run())
+    assert seen[0] == ("POST", "http://target.test/base/ok?a=1", b"x")
+    assert stats["requests"] == 2 and stats["errors"] == 0 and stats["in_flight"] == 0
+    assert stats["responses"] == {"2xx": 1, "5xx": 1}
+    assert stats["settings"]["max_connections"] == 4
+
+
+def test_delivery_queue_retries_and_resumes_backlog(tmp_path) -> None:
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url.path)
+        # The first send of each request fails.
+        return httpx.Response(503 if attempts.count(request.url.path) == 1 else 201)
+
+    def capture(storage: RelayStorage, path: str) -> StoredRequest:
+        return storage.enqueue(
+            method="POST",
+            path=path,
+            headers={},
+            body=b"{}",
+            query_params={},
+            forwarded_status=None,
+            signature_valid=None,
+            deliver=True,
+        )
+
+    async def drain(storage: RelayStorage) -> tuple[str, dict]:
+        forwarder = Forwarder("http://target.test", transport=httpx.MockTransport(handler))
+        queue = DeliveryQueue(forwarder, storage, DeliverySettings(workers=2, backoff=0.01))
+        await queue.start()
+        fresh = capture(storage, "/fresh")
+        queue.submit(fresh)
+        while queue.depth or queue.in_flight:
+            await asyncio.sleep(0.01)
+        stats = queue.stats()
+        await queue.aclose()
+        await forwarder.aclose()
+        return fresh.id, stats
+
+    storage = RelayStorage(tmp_path / "relay.db", capacity=10)
+    kept = capture(storage, "/kept").id
+    storage.close()
+
+    # Reopening picks up the delivery left over from the previous run.
+    storage = RelayStorage(tmp_path / "relay.db", capacity=10)
+    fresh, stats = asyncio.run(drain(storage))
+    assert sorted(attempts) == ["/fresh", "/fresh", "/kept", "/kept"]
+    assert stats["delivered"] == 2 and stats["retried"] == 2 and stats["failed"] == 0
+    assert storage.get(kept).forwarded_status == storage.get(fresh).forwarded_status == 201
+    assert storage.pending_deliveries() == []
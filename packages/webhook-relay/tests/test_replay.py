@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+from webhook_relay.forwarding import Forwarder
+from webhook_relay.replay import ReplayJob, ReplaySettings
+from webhook_relay.storage import RelayStorage, RequestFilter
+
+
+def test_bulk_replay_keeps_path_order_paces_and_pauses() -> None:
+    storage = RelayStorage(None, capacity=100)
+    for i in range(30):
+        storage.insert(
+            method="POST",
+            path=f"/hooks/{i % 3}",
+            headers={},
+            body=str(i).encode(),
+            query_params={},
+            forwarded_status=None,
+            signature_valid=None,
+        )
+    storage.insert(
+        method="PUT",
+        path="/skip",
+        headers={},
+        body=b"",
+        query_params={},
+        forwarded_status=None,
+        signature_valid=None,
+    )
+    sent = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.001)
+        sent.append((request.url.path, int(request.content)))
+        return httpx.Response(500 if request.content == b"7" else 200)
+
+    async def run() -> tuple[dict, int, int]:
+        forwarder = Forwarder("http://target.test", transport=httpx.MockTransport(handler))
+        job = ReplayJob(
+            storage,
+            forwarder,
+            RequestFilter(method="POST"),
+            ReplaySettings(concurrency=3, rate=200, order="path"),
+        )
+        job.start()
+        await asyncio.sleep(0.05)
+        job.pause()
+        await asyncio.sleep(0.02)
+        paused_at = job.sent
+        await asyncio.sleep(0.05)
+        still = job.sent
+        job.resume()
+        await job.wait()
+        await forwarder.aclose()
+        return job.progress(), paused_at, still
+
+    progress, paused_at, still = asyncio.run(run())
+    assert 0 < paused_at == still < 30
+    assert progress["state"] == "done"
+    assert progress["total"] == progress["sent"] == 30
+    assert progress["failed"] == 1
+    assert progress["rate"] <= 200
+    for path in ("/hooks/0", "/hooks/1", "/hooks/2"):
+        bodies = [body for sent_path, body in sent if sent_path == path]
+        assert bodies == sorted(bodies) and len(bodies) == 10
+
+    results = storage.replay_results(progress["id"], limit=1000)
+    assert len(results) == 30
+    failed = storage.replay_results(progress["id"], failed_only=True)
+    assert [result.status for result in failed] == [500]
@@ -1,5 +1,9 @@
+import asyncio
+import json
+import time
+
 from fastapi.testclient import TestClient
-from webhook_relay.server import create_app
+from webhook_relay.server import ConnectionHub, create_app
 
 
 def test_capabilities_reports_websocket_disabled() -> None:
@@ -32,4 +36,179 @@ def test_catch_all_stores_request() -> None:
 
     list_response = client.get("/_relay/requests")
     assert list_response.status_code == 200
-    assert len(list_response.json()) == 1
+    listed = list_response.json()
+    assert isinstance(listed, list) and len(listed) == 1
+    assert listed[0]["path"] == "/webhook"
+
+
+def test_replay_reports_an_unreachable_target() -> None:
+    app = create_app(
+        # Nothing listens on the discard port, so the connection is refused.
+        forward_url="http://127.0.0.1:9",
+        storage_path=None,
+        signature_provider=None,
+        secret=None,
+        capacity=1000,
+        websocket_enabled=False,
+    )
+    saved = app.state.storage.insert(
+        method="POST",
+        path="/webhook",
+        headers={},
+        body=b"{}",
+        query_params={},
+        forwarded_status=None,
+        signature_valid=None,
+    )
+    response = TestClient(app).post(f"/_relay/replay/{saved.id}")
+    assert response.status_code == 200
+    assert response.json()["replayed"] is False
+    assert response.json()["reason"].startswith("ConnectError")
+
+
+def test_replay_refuses_a_request_whose_body_file_is_gone(tmp_path) -> None:
+    app = create_app(
+        forward_url="http://127.0.0.1:9",
+        storage_path=tmp_path / "relay.db",
+        signature_provider=None,
+        secret=None,
+        capacity=1000,
+        websocket_enabled=False,
+        spill_threshold=16,
+    )
+    saved = app.state.storage.insert(
+        method="POST",
+        path="/webhook",
+        headers={},
+        body=b"x" * 64,
+        query_params={},
+        forwarded_status=None,
+        signature_valid=None,
+    )
+    for path in (tmp_path / "relay.db-bodies").rglob("*"):
+        if path.is_file():
+            path.unlink()
+    response = TestClient(app).post(f"/_relay/replay/{saved.id}")
+    assert response.status_code == 410
+
+
+def test_request_listing_pages_filters_and_projects() -> None:
+    app = create_app(
+        forward_url=None,
+        storage_path=None,
+        signature_provider=None,
+        secret=None,
+        capacity=1000,
+        websocket_enabled=False,
+    )
+    client = TestClient(app)
+    for i in range(7):
+        client.post(f"/hooks/{i % 2}", content=f"body-{i}")
+    client.put("/other", content="x")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, "method": "post", "path_prefix": "/hooks/", "paged": True}
+        page = client.get("/_relay/requests", params={**params, "cursor": cursor or ""}).json()
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [item["path"] for item in seen] == [f"/hooks/{i % 2}" for i in reversed(range(7))]
+    assert "body" not in seen[0] and "headers" not in seen[0]
+
+    full = client.get("/_relay/requests", params={"limit": 1, "include_body": True}).json()
+    assert full[0]["body"] == "x"
+    until = client.get("/_relay/requests", params={"until": seen[-1]["timestamp"]}).json()
+    assert until == []
+    assert client.get("/_relay/requests", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+class _FakeSocket:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.received: list = []
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.received.append(json.loads(text)["n"])
+
+
+def test_broadcast_does_not_wait_for_slow_subscribers() -> None:
+    async def run() -> tuple[list, list, float]:
+        hub = ConnectionHub(queue_size=8)
+        fast = [_FakeSocket(0) for _ in range(300)]
+        slow = [_FakeSocket(0.05) for _ in range(5)]
+        for socket in fast + slow:
+            hub.subscribe(socket)
+        started = time.perf_counter()
+        for n in range(50):
+            hub.broadcast({"n": n})
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.01)
+        await hub.close()
+        return fast, slow, elapsed
+
+    fast, slow, elapsed = asyncio.run(run())
+    # Fifty events to 305 clients, five of them taking 50ms per message.
+    assert elapsed < 0.25
+    assert all(socket.received == list(range(50)) for socket in fast)
+    assert all(len(socket.received) < 10 for socket in slow)
+
+
+def test_search_ranks_and_follows_deletes() -> None:
+    app = create_app(
+        forward_url=None,
+        storage_path=None,
+        signature_provider=None,
+        secret=None,
+        capacity=3,
+        websocket_enabled=False,
+    )
+    client = TestClient(app)
+    client.post("/orders", json={"order_id": "ord-1001", "status": "paid"})
+    client.post("/orders", json={"order_id": "ord-1002", "note": "ord-1001 ord-1001"})
+    client.post("/refunds", json={"order_id": "ord-1003"}, headers={"X-Event": "refund.created"})
+    client.post("/orders", json={"order_id": "ord-1004"})
+
+    found = client.get("/_relay/search", params={"q": "ord-1001"}).json()
+    # The first request was pruned at capacity 3.
+    assert [item["path"] for item in found["items"]] == ["/orders"]
+    assert found["next_offset"] is None
+    assert len(client.get("/_relay/search", params={"q": "refund.created"}).json()["items"]) == 1
+
+    hit = client.get("/_relay/search", params={"q": "/refunds"}).json()["items"][0]
+    client.delete(f"/_relay/requests/{hit['id']}")
+    assert client.get("/_relay/search", params={"q": "ord-1003"}).json()["items"] == []
+    bad = client.get("/_relay/search", params={"q": "order_id AND", "raw": True})
+    assert bad.status_code == 400
+
+
+def test_metrics_report_stage_latencies_and_storage(tmp_path) -> None:
+    app = create_app(
+        forward_url=None,
+        storage_path=tmp_path / "relay.db",
+        signature_provider=None,
+        secret=None,
+        capacity=1000,
+        websocket_enabled=False,
+    )
+    with TestClient(app) as client:
+        for i in range(5):
+            client.post(f"/hooks/{i}", json={"n": i})
+        client.get("/_relay/requests")
+
+        stats = client.get("/_relay/metrics", params={"format": "json"}).json()
+        assert stats["storage"]["rows"] == 5 and stats["storage"]["db_bytes"] > 0
+        assert stats["stages"]["body_read"]["count"] == 5
+        assert stats["stages"]["forward"]["count"] == 0
+        assert stats["commit"]["count"] >= 1
+        assert stats["forward"] is None
+
+        text = client.get("/_relay/metrics")
+        assert text.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = text.text.splitlines()
+        assert 'webhook_relay_stage_seconds_count{stage="store"} 5' in lines
+        assert 'webhook_relay_stage_seconds_bucket{stage="store",le="+Inf"} 5' in lines
+        assert "webhook_relay_stored_requests 5" in lines
@@ -1,4 +1,9 @@
-from webhook_relay.storage import RelayStorage
+import queue
+import sqlite3
+import threading
+
+import pytest
+from webhook_relay.storage import RelayStorage, search_terms
 
 
 def test_storage_insert_and_get(tmp_path) -> None:
@@ -7,7 +12,7 @@ def test_storage_insert_and_get(tmp_path) -> None:
         method="POST",
         path="/hook",
         headers={"content-type": "application/json"},
-        body='{"ok":true}',
+        body=b'{"ok":true}',
         query_params={},
         forwarded_status=None,
         signature_valid=True,
@@ -15,3 +20,274 @@ def test_storage_insert_and_get(tmp_path) -> None:
     loaded = storage.get(saved.id)
     assert loaded is not None
     assert loaded.path == "/hook"
+
+
+def test_enqueued_requests_are_committed_in_batches(tmp_path) -> None:
+    storage = RelayStorage(tmp_path / "relay.db", capacity=50, batch_size=16, batch_delay=0.01)
+    saved = [
+        storage.enqueue(
+            method="POST",
+            path=f"/hook/{i}",
+            headers={},
+            body=b"{}",
+            query_params={},
+            forwarded_status=None,
+            signature_valid=None,
+        )
+        for i in range(200)
+    ]
+    # list waits for the writer, so it sees everything queued before it.
+    listed = storage.list()
+    assert {item.id for item in listed} == {item.id for item in saved[-50:]}
+    storage.close()
+
+    reopened = RelayStorage(tmp_path / "relay.db", capacity=50)
+    assert reopened.get(saved[-1].id) is not None
+    assert reopened.get(saved[0].id) is None
+
+
+def test_flush_ignores_later_requests_and_enqueue_is_bounded(tmp_path, monkeypatch) -> None:
+    storage = RelayStorage(tmp_path / "relay.db", capacity=1000, batch_size=1)
+    gates = {"/first": threading.Event(), "/later": threading.Event()}
+    write_batch = storage._write_batch
+
+    def gated(batch):
+        gates[batch[0][0].path].wait()
+        write_batch(batch)
+
+    monkeypatch.setattr(storage, "_write_batch", gated)
+    request = dict(
+        headers={}, body=b"{}", query_params={}, forwarded_status=None, signature_valid=None
+    )
+    storage.enqueue(method="POST", path="/first", **request)
+    flushed = threading.Thread(target=storage.flush)
+    flushed.start()
+    # The writer is stuck, so the bounded queue fills up and refuses more.
+    with pytest.raises(queue.Full):
+        for _ in range(1000):
+            storage.enqueue(method="POST", path="/later", **request)
+    gates["/first"].set()
+    flushed.join(timeout=10)
+    assert not flushed.is_alive()
+    assert storage.stats()["rows"] == 1
+    gates["/later"].set()
+    storage.close()
+
+
+def test_failed_batches_are_retried_before_they_count_as_committed(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("webhook_relay.storage.WRITE_RETRY_DELAY", 0.01)
+    storage = RelayStorage(tmp_path / "relay.db", capacity=10)
+    committed = []
+    storage.on_commit = committed.extend
+    write_batch = storage._write_batch
+    failures = [sqlite3.OperationalError("disk I/O error")] * 2
+
+    def flaky(batch):
+        if failures:
+            raise failures.pop()
+        write_batch(batch)
+
+    monkeypatch.setattr(storage, "_write_batch", flaky)
+    saved = storage.enqueue(
+        method="POST",
+        path="/hook",
+        headers={},
+        body=b"{}",
+        query_params={},
+        forwarded_status=None,
+        signature_valid=None,
+    )
+    assert storage.get(saved.id) is not None
+    storage.close()
+    assert [item.id for item in committed] == [saved.id]
+
+
+def test_reads_wait_only_for_requests_queued_before_them(tmp_path, monkeypatch) -> None:
+    storage = RelayStorage(tmp_path / "relay.db", capacity=1000, batch_size=1)
+    request = dict(
+        method="POST", headers={}, query_params={}, forwarded_status=None, signature_valid=None
+    )
+    gates = {"/before": threading.Event(), "/after": threading.Event()}
+    write_batch = storage._write_batch
+
+    def gated(batch):
+        gates[batch[0][0].path].wait()
+        write_batch(batch)
+
+    waiting = threading.Event()
+    wait_for = storage._wait_for
+
+    def announced(sequence):
+        waiting.set()
+        wait_for(sequence)
+
+    monkeypatch.setattr(storage, "_write_batch", gated)
+    monkeypatch.setattr(storage, "_wait_for", announced)
+    before = storage.enqueue(path="/before", body=b"ord-1", **request)
+    pages = []
+    reader = threading.Thread(target=lambda: pages.append(storage.page()[0]))
+    reader.start()
+    waiting.wait(timeout=10)
+    after = storage.enqueue(path="/after", body=b"ord-2", **request)
+    gates["/before"].set()
+    reader.join(timeout=10)
+    assert [item.id for item in pages[0]] == [before.id]
+    assert storage._uncommitted == {after.id: 2}
+
+    gates["/after"].set()
+    assert storage.count() == 2
+    assert [item.id for item in storage.search(search_terms("ord-2"))[0]] == [after.id]
+    storage.close()
+
+
+def test_file_store_uses_wal_index_and_reader_pool(tmp_path) -> None:
+    storage = RelayStorage(tmp_path / "relay.db", capacity=3, readers=2)
+    assert storage.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = storage.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM requests ORDER BY timestamp DESC"
+    ).fetchall()
+    assert "requests_timestamp" in str(plan)
+    for i in range(5):
+        storage.insert(
+            method="POST",
+            path=f"/hook/{i}",
+            headers={},
+            body=b"{}",
+            query_params={},
+            forwarded_status=None,
+            signature_valid=None,
+        )
+    assert [item.path for item in storage.list()] == ["/hook/4", "/hook/3", "/hook/2"]
+    assert storage.delete(storage.list()[0].id)
+    storage.close()
+
+    reopened = RelayStorage(tmp_path / "relay.db", capacity=3)
+    assert len(reopened.list()) == 2
+
+
+def test_bodies_keep_exact_bytes_compress_and_spill(tmp_path) -> None:
+    storage = RelayStorage(
+        tmp_path / "relay.db", capacity=2, compress_threshold=64, spill_threshold=4096
+    )
+    bodies = [bytes(range(256)) * 2, b'{"event": "batch"}' * 1000, b"\xff\x00small"]
+    saved = [
+        storage.insert(
+            method="POST",
+            path="/hook",
+            headers={},
+            body=body,
+            query_params={},
+            forwarded_status=None,
+            signature_valid=None,
+        )
+        for body in bodies[:2]
+    ]
+    encodings = dict(storage.conn.execute("SELECT id, body_encoding FROM requests"))
+    assert encodings == {saved[0].id: "zlib", saved[1].id: "file"}
+    spilled = list((tmp_path / "relay.db-bodies").rglob("*"))
+    assert len([path for path in spilled if path.is_file()]) == 1
+
+    assert storage.get(saved[0].id).body == bodies[0]
+    assert storage.get(saved[1].id).body == bodies[1]
+    listed = {item.id: item for item in storage.list()}
+    assert listed[saved[1].id].body is None and listed[saved[1].id].body_size == len(bodies[1])
+    loaded, _ = storage.page(include_body=True, load_bodies=True)
+    assert {item.id: item.body for item in loaded} == dict(zip((item.id for item in saved), bodies))
+
+    # Pruning the spilled request removes its file.
+    for _ in range(2):
+        storage.insert(
+            method="POST",
+            path="/hook",
+            headers={},
+            body=bodies[2],
+            query_params={},
+            forwarded_status=None,
+            signature_valid=None,
+        )
+    assert not [path for path in (tmp_path / "relay.db-bodies").rglob("*") if path.is_file()]
+    assert {item.body for item in storage.list()} == {bodies[2]}
+
+
+def test_rolled_back_prune_keeps_spilled_bodies(tmp_path, monkeypatch) -> None:
+    storage = RelayStorage(tmp_path / "relay.db", capacity=1, spill_threshold=16)
+    request = dict(
+        method="POST",
+        path="/hook",
+        headers={},
+        query_params={},
+        forwarded_status=None,
+        signature_valid=None,
+    )
+    spilled = storage.insert(body=b"x" * 64, **request)
+    prune = storage._prune
+
+    def failing():
+        prune()
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(storage, "_prune", failing)
+    with pytest.raises(sqlite3.OperationalError):
+        storage.insert(body=b"y" * 64, **request)
+    assert storage.get(spilled.id).body == b"x" * 64
+
+
+def test_missing_spilled_body_still_leaves_the_search_index(tmp_path) -> None:
+    storage = RelayStorage(tmp_path / "relay.db", capacity=10, spill_threshold=16)
+    spilled = storage.insert(
+        method="POST",
+        path="/hook",
+        headers={},
+        body=b"ord-1234 " * 8,
+        query_params={},
+        forwarded_status=None,
+        signature_valid=None,
+    )
+    for path in (tmp_path / "relay.db-bodies").rglob("*"):
+        if path.is_file():
+            path.unlink()
+    assert storage.delete(spilled.id)
+    # The contentless index only drops a row given the text it indexed.
+    check = "INSERT INTO requests_fts (requests_fts, rank) VALUES ('integrity-check', 1)"
+    storage.conn.execute(check)
+    assert storage.search(search_terms("ord-1234"))[0] == []
+
+
+def test_processes_sharing_a_file_prune_and_claim_together(tmp_path) -> None:
+    path = tmp_path / "relay.db"
+    workers = [RelayStorage(path, capacity=100, batch_size=8, run_id="run-1") for _ in range(3)]
+    delivered = set()
+
+    def ingest(storage: RelayStorage) -> None:
+        for i in range(150):
+            item = storage.enqueue(
+                method="POST",
+                path=f"/hook/{i}",
+                headers={},
+                body=b"{}",
+                query_params={},
+                forwarded_status=None,
+                signature_valid=None,
+                deliver=i % 2 == 0,
+            )
+            if i % 2 == 0:
+                delivered.add(item.id)
+        storage.flush()
+
+    threads = [threading.Thread(target=ingest, args=(storage,)) for storage in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert workers[0].count() == 100
+    pending = {d.request_id for d in workers[0].pending_deliveries()}
+    # Pruned requests leave the backlog; which ones survive depends on interleaving.
+    assert pending == delivered & {item.id for item in workers[0].list()}
+
+    # Siblings keep their own deliveries; a later run takes over all of them.
+    claimed = [{d.request_id for d in storage.claim_deliveries()} for storage in workers]
+    assert set().union(*claimed) == pending and sum(map(len, claimed)) == len(pending)
+    for storage in workers:
+        storage.close()
+    restarted = RelayStorage(path, capacity=100, run_id="run-2")
+    assert {d.request_id for d in restarted.claim_deliveries()} == pending